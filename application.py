@@ -1,23 +1,27 @@
 import os
+import json
 import dash
 import dash_bootstrap_components as dbc
 import dotenv
 from dash import dcc, html
 from dash.dependencies import Input, Output, State
 import openai
-from flask_caching import Cache
 from flask_session import Session
 import time
 from dash_bootstrap_templates import load_figure_template
-from flask import Flask, redirect, session, send_from_directory
-import psycopg2
+from flask import Flask, Response, abort, redirect, request, session, send_from_directory, stream_with_context
 from werkzeug.security import check_password_hash
 import bcrypt
 
 # Importar funções modularizadas para carregamento de dados
-from data_load import (get_available_data_types, load_data)
+from data_load import (get_available_data_types, validate_client_data)
 
-from data_load.cache_config import setup_diskcache, clear_client_cache
+from data_load.cache_config import setup_diskcache
+from data_load.memoize import init_memoize
+from data_load.db_pool import get_connection
+from data_load.prewarm import prewarm_client, prewarm_all_clients
+from data_load.tenant_sessions import init_tenant_sessions, new_session_id, tenant_login, tenant_logout, tenant_heartbeat
+from data_load.dataset_registry import register_dataset, preload_datasets, dataset_handle, essential_errors
 
 # import dos callbacks
 from callbacks.sidebar import register_sidebar_callbacks
@@ -39,11 +43,19 @@ from utils.sidebar_utils import (create_sidebar, get_available_data_types)
 #helpers de layout
 from utils import (color, content_style, button_style, login_color)
 
+# exportação das tabelas paginadas no servidor
+from utils.server_table import is_server_table, export_frame
+from utils.table_export import EXPORT_MIMETYPES, iter_export
+
 # =============================================================================
 # Setup caching for improved performance
 # =============================================================================
 cache = setup_diskcache()
 # cache, long_callback_manager = setup_diskcache()
+# Cálculos derivados dos callbacks ficam memorizados no diskcache
+init_memoize(cache)
+# Sessões ativas por empresa (protegem os dados dela na remoção por falta de memória)
+init_tenant_sessions(cache)
 dotenv.load_dotenv()
 openai.api_key = os.getenv("chatKey")
 
@@ -106,6 +118,10 @@ application.index_string = '''
 </html>
 '''
 
+# Pré-carregamento opcional de todos os clientes ao iniciar o worker
+if os.getenv("PREWARM_ON_STARTUP", "0") == "1":
+    prewarm_all_clients()
+
 register_sidebar_callbacks(application)
 register_clientes_callbacks(application)
 register_estoque_callbacks(application)
@@ -113,15 +129,6 @@ register_interacao_callbacks(application)
 register_data_callbacks(application)
 register_vendas_callbacks(application)
 
-# Configure caching for app
-app_cache = Cache(server, config={
-    'CACHE_TYPE': 'filesystem',
-    'CACHE_DIR': './flask_cache_dir',
-    'CACHE_DEFAULT_TIMEOUT': 900,  # 15 minutos de timeout padrão
-    'CACHE_THRESHOLD': 1000,  # Número máximo de itens no cache
-    'CACHE_OPTIONS': {'mode': 0o755}  # Permissões de diretório
-})
-
 # =============================================================================
 # Custom components for improved UI
 # =============================================================================
@@ -299,18 +306,10 @@ def validar_login(n_clicks, email, senha):
 
     # Buscar usuário no banco de dados
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST"), 
-            port=os.getenv("DB_PORT", 5432),
-            user=os.getenv("DB_USER", "adduser"),
-            password=os.getenv("DB_PASS"),
-            database="security"
-        )
-        cur = conn.cursor()
-        cur.execute("SELECT password_hash, company, is_active FROM security.users WHERE email = %s", (email.strip().lower(),))
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
+        with get_connection("security") as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT password_hash, company, is_active FROM security.users WHERE email = %s", (email.strip().lower(),))
+                result = cur.fetchone()
     except Exception as e:
         return dbc.Alert(f"Erro na conexão com o banco: {str(e)}", color="danger"), dash.no_update, dash.no_update
 
@@ -329,8 +328,19 @@ def validar_login(n_clicks, email, senha):
 
     try:
         print(f"Armazenando '{company}' na sessão")
+        cliente_anterior = session.get('cliente')
+        sessao_id = session.get('sessao_id') or new_session_id()
         session['cliente'] = company
+        session['sessao_id'] = sessao_id
         session.modified = True
+        
+        # Registrar a sessão na empresa (os dados dela ficam protegidos da remoção)
+        if cliente_anterior != company:
+            tenant_logout(cliente_anterior, sessao_id)
+        tenant_login(company, sessao_id)
+        
+        # Começar a carregar os dados da empresa enquanto o navegador redireciona
+        prewarm_client(company)
 
         login_success_script = """
         <script>
@@ -367,6 +377,13 @@ def atualizar_estilo_botao(email, senha):
 # =============================================================================
 
 # Rota raiz
+@server.before_request
+def renovar_sessao_empresa():
+    """Mantém a sessão da empresa ativa enquanto o usuário faz requisições"""
+    cliente = session.get('cliente')
+    if cliente:
+        tenant_heartbeat(cliente, session.get('sessao_id'))
+
 @server.route('/')
 def index():
     # Log para rastreamento
@@ -408,18 +425,22 @@ def login_page():
 @server.route('/logout/')
 def logout():
     """
-    Limpa o cache do usuário atual e encerra a sessão antes de redirecionar para a página de login
+    Encerra a sessão antes de redirecionar para a página de login
+    
+    O cache da empresa é mantido (outros usuários dela podem estar logados);
+    apenas a sessão deixa de ser contada como ativa.
     """
     try:
-        # Obter informações do cliente atual para limpar apenas o seu cache
+        # Obter informações do cliente atual
         cliente_atual = session.get('cliente', None)
+        sessao_id = session.get('sessao_id', None)
         
         # Limpar a sessão
         session.clear()
         
-        # Se temos informação do cliente, limpar apenas seu cache específico
+        # Liberar a sessão na empresa (sem varrer o cache)
         if cliente_atual:
-            clear_client_cache(cache, app_cache, cliente_atual)
+            tenant_logout(cliente_atual, sessao_id)
         
         # Retornar o HTML com o script de analytics em vez de apenas redirecionar
         logout_html = """
@@ -449,6 +470,43 @@ def logout():
         print(f"Erro durante logout: {str(e)}")
         return redirect('/')
 
+@server.route('/export/<table_id>.<fmt>')
+def export_table(table_id, fmt):
+    """
+    Exporta todas as linhas de uma tabela paginada no servidor (CSV ou Excel)
+
+    O arquivo é gerado a partir dos DataFrames em memória da empresa da sessão,
+    com o filtro e a ordenação atuais da tabela, e enviado em blocos.
+    """
+    cliente = session.get('cliente')
+    if not cliente:
+        return redirect('/app/login/')
+
+    if fmt not in EXPORT_MIMETYPES or not is_server_table(table_id):
+        abort(404)
+
+    data_type = request.args.get('data_type') or 'PF'
+    if data_type not in get_available_data_types(cliente):
+        abort(404)
+
+    try:
+        params = json.loads(request.args.get('params') or '{}')
+        sort_by = json.loads(request.args.get('sort_by') or '[]')
+        columns = json.loads(request.args.get('columns') or '[]')
+    except ValueError:
+        abort(400)
+    filter_query = request.args.get('filter_query', '')
+
+    df = export_frame(table_id, dataset_handle(cliente, data_type), params, filter_query, sort_by, columns)
+    print(f"[EXPORT] {table_id} ({cliente}_{data_type}): {len(df)} linhas em {fmt}")
+
+    filename = f"{table_id}_{cliente}_{data_type}_{time.strftime('%Y%m%d')}.{fmt}"
+    return Response(
+        stream_with_context(iter_export(df, fmt)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 @server.route('/debug-session/')
 def debug_session():
     # Retorna informações sobre a sessão atual
@@ -528,6 +586,26 @@ def display_page(pathname):
 # =============================================================================
 # Callback para renderizar o conteúdo conforme a URL
 # =============================================================================
+# DataFrames usados por cada página (carregados sob demanda ao abri-la)
+PAGE_DATASETS = {
+    "/segmentacao": ["df_analytics"],
+    "/app/": ["df_analytics"],
+    "/": ["df_analytics"],
+    "/recorrencia/mensal": ["df_RC_Mensal"],
+    "/recorrencia/trimestral": ["df_RC_Trimestral"],
+    "/recorrencia/anual": ["df_RC_Anual"],
+    "/retencao": ["df_RT_Anual"],
+    "/predicao": ["df_previsao_retorno"],
+    "/faturamento/anual": [
+        "df_fat_Anual", "df_fat_Anual_Geral", "df_fat_Mensal",
+        "df_fat_Mensal_lojas", "df_fat_Diario", "df_fat_Diario_lojas"
+    ],
+    "/estoque/vendas-atipicas": ["df_Vendas_Atipicas"],
+    "/estoque/produtos": ["df_metricas_compra"],
+    "/estoque/produtos-inativos": ["df_analise_curva_cobertura"],
+    "/estoque/giro-estoque": ["df_analise_curva_cobertura"],
+}
+
 @application.callback(
     Output("page-content-dashboard", "children"),
     Output("loading-output-overlay", "children"),
@@ -545,22 +623,17 @@ def render_page_content(pathname, data, client, data_type):
         # Forçar o carregamento se estiver vazio
         print(f"[DEBUG] Dados vazios, tentando carregar dados para {client}_{data_type}")
         try:
-            data_loaded = load_data(client, data_type, app_cache)
-            if data_loaded and not data_loaded.get("error", False):
-                data = {}  # Inicializa o dicionário para evitar erro abaixo
-                # Converter DataFrames para formato JSON
-                for key, df in data_loaded.items():
-                    if key.startswith("df_") or key == "df":
-                        if df is not None:
-                            data[key] = df.to_json(date_format='iso', orient='split')
-                        else:
-                            data[key] = None
-                    else:
-                        data[key] = df
-                # Adicionar informação do cliente
-                data["client_info"] = f"{client}_{data_type}"
-            else:
-                print(f"[ERRO] Falha ao carregar dados: {data_loaded.get('message', 'Erro desconhecido')}")
+            if client and data_type:
+                valid, missing_files = validate_client_data(client, data_type)
+                if valid:
+                    # Registrar o dataset no servidor (leitura sob demanda) e usar apenas o handle
+                    data = register_dataset(client, data_type)
+                    errors = essential_errors(data)
+                    if errors:
+                        print(f"[ERRO] Falha ao carregar dados: Erros em arquivos essenciais: {'; '.join(errors)}")
+                        data = None
+                else:
+                    print(f"[ERRO] Falha ao carregar dados: arquivos ausentes {missing_files}")
         except Exception as e:
             print(f"[ERRO] Exceção ao carregar dados: {str(e)}")
             # Continuar com data=None para mostrar mensagem de carregamento
@@ -588,6 +661,9 @@ def render_page_content(pathname, data, client, data_type):
             )
         ], style=content_style), None
     
+    # Ler em paralelo apenas os DataFrames que a página vai usar
+    preload_datasets(data, PAGE_DATASETS.get(pathname, []))
+    
     # Pequeno delay para melhor experiência do usuário
     time.sleep(0.2)
     
@@ -1,10 +1,69 @@
 import dash
-from dash import Input, Output, html, dash_table
+from dash import Input, Output, html
 import pandas as pd
-import io
 
 from utils.formatters import formatar_percentual, formatar_numero, format_iso_date
 from utils.helpers import color, button_style, create_metric_row
+from utils.server_table import create_server_table, register_server_table
+from data_load.dataset_registry import get_dataframe
+
+# Filtro e ordenação das colunas formatadas usam os valores brutos
+COLUNAS_ORIGEM_PREVISAO = {
+    "prob_media_fmt": "prob_media",
+    "ultima_compra_fmt": "ultima_compra",
+    "proxima_compra_fmt": "proxima_compra"
+}
+
+def filtrar_previsao(df_previsao_retorno, situacao, padrao):
+    """
+    Aplica os filtros de situação (ATIVO/INATIVO) e de padrão de compra
+
+    Args:
+        df_previsao_retorno (DataFrame): Previsões de retorno dos clientes
+        situacao (str): 'ATIVO', 'INATIVO' ou 'Todos'
+        padrao (str): Padrão de compra (busca parcial) ou 'Todos'
+
+    Returns:
+        DataFrame filtrado, com a coluna auxiliar 'situacao_grupo'
+    """
+    # Cópia rasa: com o Copy-on-Write, a coluna auxiliar não altera o DataFrame recebido
+    df = df_previsao_retorno.copy(deep=False)
+    
+    # Adicionar coluna auxiliar para agrupar situações
+    df['situacao_grupo'] = df['situacao'].astype(str).str.upper().str.contains("INATIVO", regex=False).map(
+        {True: "INATIVO", False: "ATIVO"}
+    )
+    
+    if situacao and situacao != 'Todos':
+        df = df[df['situacao_grupo'] == situacao]
+    
+    if padrao and padrao != 'Todos':
+        df = df[df['padrao_compra'].str.contains(padrao, case=False, na=False, regex=False)]
+    
+    return df
+
+def carregar_previsao_clientes(data, params):
+    """Fonte da tabela 'client-table': previsões filtradas, com valores brutos"""
+    if data.get("df_previsao_retorno") is None:
+        return None
+    df_previsao_retorno = get_dataframe(data, "df_previsao_retorno")
+    return filtrar_previsao(df_previsao_retorno, params.get("situacao"), params.get("padrao"))
+
+def formatar_pagina_previsao(df_page):
+    """Formata apenas as linhas da página exibida"""
+    df_page['prob_media_fmt'] = df_page['prob_media'].apply(
+        lambda x: formatar_percentual(x * 100) if pd.notnull(x) else "N/A"
+    )
+    df_page['ultima_compra_fmt'] = df_page['ultima_compra'].apply(
+        lambda x: format_iso_date(x) if pd.notnull(x) else "N/A"
+    )
+    df_page['proxima_compra_fmt'] = df_page['proxima_compra'].apply(
+        lambda x: format_iso_date(x) if pd.notnull(x) else "N/A"
+    )
+    df_page['regularidade'] = df_page['regularidade'].apply(
+        lambda x: f"{round(x, 2):.2f}".replace(".", ",") if pd.notnull(x) else "N/A"
+    )
+    return df_page
 
 def register_predicao_callbacks(app):
     """
@@ -14,6 +73,12 @@ def register_predicao_callbacks(app):
         app: A instância do aplicativo Dash
     """
 
+    register_server_table(
+        app, 'client-table', carregar_previsao_clientes,
+        format_page=formatar_pagina_previsao, source_columns=COLUNAS_ORIGEM_PREVISAO,
+        clear_selection=True
+    )
+
     @app.callback(
         [Output("tabela-retorno-header", "children"),
         Output("tabela-retorno-content", "children")],
@@ -29,53 +94,17 @@ def register_predicao_callbacks(app):
             return "Tabela de Previsão de Retorno", "Dados não disponíveis."
         
         # Obter dados de previsão de retorno
-        df_previsao_retorno = pd.read_json(io.StringIO(data["df_previsao_retorno"]), orient='split')
-
-        # Calcular média de dias para padrões de compra dinâmicos (se houver a coluna)
-        if 'dias_ate_proxima' in df_previsao_retorno.columns:
-            media_dias = df_previsao_retorno['dias_ate_proxima'].mean()
-            media_meses = round(media_dias / 30)
-        else:
-            media_meses = 0
-        
-        # Formatar dados para exibição
-        df_cliente_display = df_previsao_retorno.copy()
-        
-        # Adicionar coluna auxiliar para agrupar situações
-        df_cliente_display['situacao_grupo'] = df_cliente_display['situacao'].apply(
-            lambda x: "INATIVO" if "INATIVO" in str(x).upper() else "ATIVO"
-        )
-        
-        # Formatar colunas para exibição
-        df_cliente_display['prob_media_fmt'] = df_cliente_display['prob_media'].apply(
-            lambda x: formatar_percentual(x * 100) if pd.notnull(x) else "N/A"
-        )
-        
-        df_cliente_display['ultima_compra_fmt'] = df_cliente_display['ultima_compra'].apply(
-            lambda x: format_iso_date(x) if pd.notnull(x) else "N/A"
-        )
-        
-        df_cliente_display['proxima_compra_fmt'] = df_cliente_display['proxima_compra'].apply(
-            lambda x: format_iso_date(x) if pd.notnull(x) else "N/A"
-        )
+        df_previsao_retorno = get_dataframe(data, "df_previsao_retorno")
 
-        df_cliente_display['regularidade'] = df_cliente_display['regularidade'].apply(
-            lambda x: f"{round(x, 2):.2f}".replace(".", ",") if pd.notnull(x) else "N/A"
-        )
-        
-        # Aplicar filtros baseados na categoria de previsão e nos filtros selecionados
-        filtered_df = df_cliente_display
+        # Aplicar filtros de situação e de padrão de compra (valores brutos)
+        filtered_df = filtrar_previsao(df_previsao_retorno, selected_situacao, selected_padrao)
         header_text = "Tabela de Previsão de Retorno"
         filter_info = []
         
-        # Aplicar filtro de situação
         if selected_situacao and selected_situacao != 'Todos':
-            filtered_df = filtered_df[filtered_df['situacao_grupo'] == selected_situacao]
             filter_info.append(f"Situação: {selected_situacao}")
         
-        # Aplicar filtro de padrão de compra
         if selected_padrao and selected_padrao != 'Todos':
-            filtered_df = filtered_df[filtered_df['padrao_compra'].str.contains(selected_padrao, case=False, na=False)]
             filter_info.append(f"Padrão: {selected_padrao}")
         
         # Construir o título baseado nos filtros aplicados
@@ -110,12 +139,12 @@ def register_predicao_callbacks(app):
             {"name": "Padrão de Compra", "id": "padrao_compra"}
         ]
         
-        # Enhanced modern table
-        table = dash_table.DataTable(
-            id='client-table',
+        # Enhanced modern table (paginada no servidor: o navegador recebe apenas a página atual)
+        table = create_server_table(
+            'client-table',
             columns=columns,
-            data=filtered_df.to_dict("records"),
             page_size=10,
+            params={"situacao": selected_situacao, "padrao": selected_padrao},
             style_table={"overflowX": "auto"},
             style_cell={
                 "textAlign": "left",
@@ -165,8 +194,6 @@ def register_predicao_callbacks(app):
                     "backgroundColor": "rgba(0, 0, 0, 0.05)"
                 }
             ],
-            sort_action="native",
-            filter_action="native",
             row_selectable="single",
             selected_rows=[],
         )
@@ -191,14 +218,8 @@ def register_predicao_callbacks(app):
             ], style={"marginBottom": "1rem", "fontSize": "0.9rem", "color": "#666"})
         ])
         
-        # Action buttons
+        # Action buttons (a exportação fica nos links da própria tabela)
         action_buttons = html.Div([
-            html.Button(
-                [html.I(className="fas fa-file-excel me-2"), "Exportar para Excel"],
-                id="btn-export-clientes",
-                className="btn btn-success mb-3 me-2",
-                style=button_style
-            ),
             html.Button(
                 [html.I(className="fas fa-sync-alt me-2"), "Limpar Filtros"],
                 id="btn-clear-filters",
@@ -207,7 +228,7 @@ def register_predicao_callbacks(app):
             )
         ], className="mb-3")
         
-        return header_text, html.Div([summary, action_buttons, table, html.Div(id="client-export-status")])
+        return header_text, html.Div([summary, action_buttons, *table])
     
     @app.callback(
         Output('client-filter-padrao-compra', 'options'),
@@ -232,7 +253,7 @@ def register_predicao_callbacks(app):
         
         # Se houver dados disponíveis e contém informação de dias até próxima compra
         if data is not None and data.get("df_previsao_retorno") is not None:
-            df_previsao_retorno = pd.read_json(io.StringIO(data["df_previsao_retorno"]), orient='split')
+            df_previsao_retorno = get_dataframe(data, "df_previsao_retorno")
             if 'dias_ate_proxima' in df_previsao_retorno.columns:
                 media_dias = df_previsao_retorno['dias_ate_proxima'].mean()
                 media_meses = round(media_dias / 30)
@@ -269,7 +290,7 @@ def register_predicao_callbacks(app):
         selected_cliente = table_data[selected_rows[0]]['nome']
         
         # Obter dados de previsão de retorno
-        df_previsao_retorno = pd.read_json(io.StringIO(data["df_previsao_retorno"]), orient='split')
+        df_previsao_retorno = get_dataframe(data, "df_previsao_retorno")
         
         # Verificar se o cliente selecionado existe nos dados
         if selected_cliente not in df_previsao_retorno['nome'].values:
@@ -321,93 +342,6 @@ def register_predicao_callbacks(app):
             html.Div(id="cliente-historico-container")
         ], hide_message_style
     
-    # Callback para filtrar clientes por situação
-    @app.callback(
-        Output('client-table', 'data'),
-        [Input('client-filter-situacao', 'value'),
-        Input('client-filter-padrao-compra', 'value'),
-        Input('predicao-pie', 'clickData'),
-        Input('predicao-bar', 'clickData')],
-        Input("selected-data", "data")
-    )
-    def filter_clients_by_status_and_padrao(selected_situacao, selected_padrao, clickData_pie, clickData_bar, data):
-        ctx = dash.callback_context
-        
-        if data is None or data.get("df_previsao_retorno") is None:
-            return []
-                
-        # Obter dados de previsão de retorno
-        df_previsao_retorno = pd.read_json(io.StringIO(data["df_previsao_retorno"]), orient='split')
-        
-        # Formatar dados para exibição
-        df_cliente_display = df_previsao_retorno.copy()
-        
-        # Adicionar coluna auxiliar para agrupar situações em ATIVO ou INATIVO
-        df_cliente_display['situacao_grupo'] = df_cliente_display['situacao'].apply(
-            lambda x: "INATIVO" if "INATIVO" in str(x).upper() else "ATIVO"
-        )
-        
-        # Formatar colunas para exibição
-        df_cliente_display['prob_media_fmt'] = df_cliente_display['prob_media'].apply(
-            lambda x: formatar_percentual(x * 100) if pd.notnull(x) else "N/A"
-        )
-        
-        df_cliente_display['ultima_compra_fmt'] = df_cliente_display['ultima_compra'].apply(
-            lambda x: format_iso_date(x) if pd.notnull(x) else "N/A"
-        )
-        
-        df_cliente_display['proxima_compra_fmt'] = df_cliente_display['proxima_compra'].apply(
-            lambda x: format_iso_date(x) if pd.notnull(x) else "N/A"
-        )
-        
-        # Aplicar filtro de situação
-        if selected_situacao and selected_situacao != 'Todos':
-            df_cliente_display = df_cliente_display[df_cliente_display['situacao_grupo'] == selected_situacao]
-        
-        # Aplicar filtro de padrão de compra
-        if selected_padrao and selected_padrao != 'Todos':
-            df_cliente_display = df_cliente_display[df_cliente_display['padrao_compra'].str.contains(selected_padrao, case=False, na=False)]
-        
-        # Verificar se houve clique nos gráficos e aplicar filtro adicional
-        trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
-        
-        if trigger_id == 'predicao-pie' and clickData_pie:
-            categoria = clickData_pie['points'][0]['label']
-            if categoria == "Alta Probabilidade de Compra":
-                df_cliente_display = df_cliente_display[df_cliente_display['prob_media'] > 0.5]
-            elif categoria == "Baixa Probabilidade de Compra":
-                df_cliente_display = df_cliente_display[df_cliente_display['prob_media'] <= 0.5]
-        
-        elif trigger_id == 'predicao-bar' and clickData_bar:
-            # Aqui você pode adicionar lógica para filtrar baseado no clique do gráfico de barras
-            # Por exemplo, pode ser algo como:
-            categoria = clickData_bar['points'][0]['x']
-            if categoria == "Alta Probabilidade de Compra":
-                df_cliente_display = df_cliente_display[df_cliente_display['prob_media'] > 0.5]
-            elif categoria == "Baixa Probabilidade de Compra":
-                df_cliente_display = df_cliente_display[df_cliente_display['prob_media'] <= 0.5]
-                
-        return df_cliente_display.to_dict('records')
-    
-    # Callback para o botão de exportação Excel
-    @app.callback(
-        Output("client-export-status", "children"),
-        Input("btn-export-clientes", "n_clicks"),
-        Input("selected-data", "data"),
-        prevent_initial_call=True
-    )
-    def export_clientes_to_excel(n_clicks, data):
-        if n_clicks is None or data is None or data.get("df_previsao_retorno") is None:
-            return ""
-            
-        # Este callback apenas simularia a exportação
-        # Em um ambiente real, você usaria dcc.Download e send_data_frame para exportar
-        
-        return html.Div([
-            html.P("Dados exportados com sucesso!", className="text-success mt-2"),
-            html.P("Arquivo salvo como: previsao_retorno_clientes.xlsx", className="text-muted small")
-        ])
-    
     @app.callback(
         [Output('client-filter-situacao', 'value'),
         Output('client-filter-padrao-compra', 'value')],
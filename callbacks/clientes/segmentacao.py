@@ -1,7 +1,33 @@
-from dash import Input, Output, State, html, dash_table
-import pandas as pd
-import io
+from dash import Input, Output, State, html
 from utils import formatar_moeda, formatar_numero
+from utils.server_table import create_server_table, register_server_table
+from data_load.segment_index import SEGMENT_COLUMNS, get_segment_index, segment_rows
+
+COL_RENAME = {
+    "id_cliente": "Código do Cliente",
+    "nome": "Cliente",
+    "Recency": "Recência (dias)",
+    "Frequency": "Frequência",
+    "Monetary": "Valor Monetário (R$)",
+    "Age": "Antiguidade (dias)",
+    "cpf": "CPF",
+    "cnpj": "CNPJ",
+    "email": "E-mail",
+    "telefone": "Contato"
+}
+
+def carregar_clientes_segmento(data, params):
+    """Fonte da tabela 'client-segment-table': fatia do índice de segmentos (valores brutos)"""
+    index = get_segment_index(data)
+    if index is None:
+        return None
+    return segment_rows(index, params.get("segmento", "Todos"))
+
+def formatar_pagina_clientes(df_page):
+    """Usa o valor monetário já formatado no índice de segmentos"""
+    if 'Monetary_fmt' in df_page.columns:
+        df_page['Monetary'] = df_page['Monetary_fmt']
+    return df_page
 
 def register_segmentacao_callbacks(app):
     """
@@ -11,6 +37,8 @@ def register_segmentacao_callbacks(app):
         app: A instância do aplicativo Dash
     """
     
+    register_server_table(app, 'client-segment-table', carregar_clientes_segmento, format_page=formatar_pagina_clientes)
+    
     @app.callback(
         [Output("client-list-header", "children"),
          Output("client-list", "children")],
@@ -28,56 +56,32 @@ def register_segmentacao_callbacks(app):
                 ])
             ])
         
-        if data.get("df_analytics") is None:
+        # Índice de segmentos montado ao abrir a página (fatia por posição, sem filtrar)
+        index = get_segment_index(data)
+        if index is None:
             return "Clientes do Segmento Selecionado", "Dados não disponíveis."
         
-        df_analytics = pd.read_json(io.StringIO(data["df_analytics"]), orient='split')
-        
         # Extrair o segmento selecionado do clickData
         selected_segment = clickData["points"][0]["x"]
         header_text = f"Clientes do Segmento: {selected_segment}"
-        
-        # Filtrar o DataFrame para o segmento selecionado ou mostrar todos
         if selected_segment == "Todos":
-            filtered_df = df_analytics  # Não filtra, usa todos os registros
             header_text = "Todos os Clientes"
-        else:
-            filtered_df = df_analytics[df_analytics["Segmento"] == selected_segment]
         
-        if filtered_df.empty:
+        resumo = index["summary"].get(selected_segment)
+        if resumo is None or resumo["clientes"] == 0:
             return header_text, "Nenhum cliente encontrado para o segmento selecionado."
         
-        # Determinar colunas de exibição
-        display_columns = ["id_cliente", "nome", "Recency", "Frequency", "Monetary", "Age", "cpf", "cnpj", "email", "telefone"]
-        col_rename = {
-            "id_cliente": "Código do Cliente",
-            "nome": "Cliente",
-            "Recency": "Recência (dias)",
-            "Frequency": "Frequência",
-            "Monetary": "Valor Monetário (R$)",
-            "Age": "Antiguidade (dias)",
-            "cpf": "CPF",
-            "cnpj": "CNPJ",
-            "email": "E-mail",
-            "telefone": "Contato"
-        }
-        
         # Usar apenas colunas que existem no DataFrame
-        existing_columns = [col for col in display_columns if col in filtered_df.columns]
+        existing_columns = [col for col in SEGMENT_COLUMNS if col in index["display"].columns]
         if not existing_columns:
             return header_text, "Estrutura de dados incompatível para exibição de detalhes."
         
-        # Formatar valores monetários
-        filtered_df_display = filtered_df[existing_columns].copy()
-        if 'Monetary' in filtered_df_display.columns:
-            filtered_df_display['Monetary'] = filtered_df_display['Monetary'].apply(lambda x: formatar_moeda(x))
-        
-        # Criar tabela aprimorada
-        table = dash_table.DataTable(
-            id='client-segment-table',  # ID único para a tabela
-            columns=[{"name": col_rename.get(col, col), "id": col} for col in existing_columns],
-            data=filtered_df_display.to_dict("records"),
+        # Tabela paginada no servidor: o navegador recebe apenas a página atual
+        table = create_server_table(
+            'client-segment-table',  # ID único para a tabela
+            columns=[{"name": COL_RENAME.get(col, col), "id": col} for col in existing_columns],
             page_size=10,
+            params={"segmento": selected_segment},
             style_table={"overflowX": "auto"},
             style_cell={
                 "textAlign": "left",
@@ -105,25 +109,21 @@ def register_segmentacao_callbacks(app):
                     "if": {"column_id": "id_cliente"},
                     "width": "100px"
                 }
-            ],
-            filter_action="native",
-            sort_action="native",
-            sort_mode="multi",
-            export_format="xlsx"
+            ]
         )
         
-        # Adicionar resumo acima da tabela
+        # Adicionar resumo acima da tabela (totais calculados no índice)
         summary = html.Div([
             html.P([
                 f"Exibindo ", 
-                html.Strong(formatar_numero(len(filtered_df))), 
+                html.Strong(formatar_numero(resumo["clientes"])), 
                 f" clientes do segmento ", 
                 html.Strong(selected_segment),
                 f". Valor monetário médio: ",
-                html.Strong(formatar_moeda(filtered_df['Monetary'].mean())),
+                html.Strong(formatar_moeda(resumo["monetary_medio"])),
                 f". Frequência média: ",
-                html.Strong(f"{filtered_df['Frequency'].mean():.1f}".replace(".", ",") + " compras")
+                html.Strong(f"{resumo['frequencia_media']:.1f}".replace(".", ",") + " compras")
             ], style={"marginBottom": "1rem", "fontSize": "0.9rem", "color": "#666"})
         ])
         
-        return header_text, html.Div([summary, table])
\ No newline at end of file
+        return header_text, html.Div([summary, *table])
\ No newline at end of file
@@ -1,13 +1,139 @@
-import io
+import numpy as np
 import pandas as pd
 from dash import html, callback_context
 from dash.dependencies import Input, Output, State
-from dash import dash_table
 from utils import color
 from dash import no_update
+from data_load.dataset_registry import get_dataframe, get_dataset
+from data_load.memoize import memoize_dataset
+from utils.server_table import create_server_table, register_server_table
+
+@memoize_dataset
+def calcular_vendas_por_categoria(data):
+    """Vendas dos últimos 90 dias por categoria (produtos das curvas A, B e C), em ordem decrescente"""
+    df_curva_cobertura = get_dataframe(data, "df_analise_curva_cobertura")
+    df_com_vendas = df_curva_cobertura[df_curva_cobertura['Curva ABC'].isin(['A', 'B', 'C'])]
+    categoria_vendas = df_com_vendas.groupby('Categoria')['valor_vendas_ultimos_90_dias'].sum().reset_index()
+    total_vendas = categoria_vendas['valor_vendas_ultimos_90_dias'].sum()
+    categoria_vendas['Porcentagem'] = (categoria_vendas['valor_vendas_ultimos_90_dias'] / total_vendas * 100).round(1)
+    return categoria_vendas.sort_values(by='valor_vendas_ultimos_90_dias', ascending=False)
+
+def _curva_cobertura(data):
+    """df_analise_curva_cobertura do dataset em memória (sem cópia; não deve ser alterado)"""
+    dataset = get_dataset(data["client"], data["data_type"]) if data and data.get("client") else None
+    df_curva_cobertura = dataset.get("df_analise_curva_cobertura") if dataset is not None else None
+    if df_curva_cobertura is None or df_curva_cobertura.empty:
+        raise ValueError("DataFrame está vazio")
+    return df_curva_cobertura
+
+@memoize_dataset
+def posicoes_filtradas(data, coluna_filtro, valor_filtro):
+    """
+    Posições (iloc) dos produtos com coluna_filtro == valor_filtro em df_analise_curva_cobertura
+
+    Memoriza apenas o vetor de posições, não o DataFrame filtrado, para que
+    cada clique leia do cache poucos bytes em vez de uma cópia dos dados.
+    """
+    df_curva_cobertura = _curva_cobertura(data)
+    return np.flatnonzero((df_curva_cobertura[coluna_filtro] == valor_filtro).to_numpy(dtype=bool, na_value=False))
+
+def preparar_tabela_produtos(data, coluna_filtro, valor_filtro):
+    """
+    Produtos filtrados por uma coluna (ex: 'Curva ABC') com as colunas exibidas nas tabelas
+    
+    O filtro é memorizado como posições das linhas (posicoes_filtradas) e
+    aplicado ao DataFrame já em memória.
+    
+    Args:
+        data (dict): Handle do dcc.Store 'selected-data'
+        coluna_filtro (str): Coluna usada no filtro
+        valor_filtro: Valor clicado no gráfico (None = todos os produtos)
+    
+    Returns:
+        DataFrame com as colunas das tabelas (valores brutos) ou None se
+        nenhuma coluna existir
+    """
+    df_curva_cobertura = _curva_cobertura(data)
+    
+    # Aplicar filtro ao DataFrame
+    df_filtrado = df_curva_cobertura
+    if valor_filtro:
+        df_filtrado = df_filtrado.iloc[posicoes_filtradas(data, coluna_filtro, valor_filtro)]
+    
+    # Selecionar colunas relevantes para exibição na tabela
+    colunas_base = [
+        'SKU', 
+        'ID Categoria',
+        'EAN',
+        'Descrição do Produto', 
+        'Categoria', 
+        'Estoque Total', 
+        'Situação do Produto', 
+        'Curva ABC',
+        'Data Última Venda'
+    ]
+    
+    # Identificar e adicionar colunas de estoque por loja disponíveis
+    colunas_estoque_loja = [col for col in df_curva_cobertura.columns if col.startswith('Estoque Loja')]
+    
+    # Combinar colunas base com colunas de estoque de loja
+    colunas_exibir = colunas_base + colunas_estoque_loja
+    # Verificar se todas as colunas existem no DataFrame
+    colunas_existentes = [col for col in colunas_exibir if col in df_filtrado.columns]
+    
+    if not colunas_existentes:
+        return None
+    
+    df_exibir = df_filtrado[colunas_existentes]
+    
+    # Datas brutas (filtro e ordenação); o texto é gerado por página em formatar_pagina_produtos
+    if 'Data Última Venda' in df_exibir.columns:
+        df_exibir['Data Última Venda'] = pd.to_datetime(df_exibir['Data Última Venda'], errors='coerce')
+    
+    return df_exibir
+
+def carregar_produtos_giro(data, params):
+    """
+    Fonte das tabelas 'datatable-curva-abc' e 'datatable-situacao'
+
+    Args:
+        data (dict): Handle do dcc.Store 'selected-data'
+        params (dict): {'coluna': coluna do filtro, 'valor': valor clicado no gráfico}
+
+    Returns:
+        DataFrame com valores brutos ou None
+    """
+    if data.get("df_analise_curva_cobertura") is None:
+        return None
+    return preparar_tabela_produtos(data, params.get("coluna"), params.get("valor"))
+
+def formatar_pagina_produtos(df_page):
+    """Formata a data da última venda apenas das linhas exibidas"""
+    if 'Data Última Venda' in df_page.columns:
+        df_page['data_ultima_venda_formatada'] = df_page['Data Última Venda'].dt.strftime('%d/%m/%Y')
+    return df_page
+
+# Filtro e ordenação das colunas formatadas usam os valores brutos
+COLUNAS_ORIGEM_PRODUTOS = {
+    "data_ultima_venda_formatada": "Data Última Venda"
+}
+
+def colunas_tabela_produtos(df_exibir):
+    """Colunas do DataTable para as colunas de preparar_tabela_produtos"""
+    return [
+        {"name": col, "id": "data_ultima_venda_formatada" if col == 'Data Última Venda' else col}
+        for col in df_exibir.columns
+    ]
 
 def register_giro_estoque_callbacks(app):
 
+    for table_id in ('datatable-curva-abc', 'datatable-situacao'):
+        register_server_table(
+            app, table_id, carregar_produtos_giro,
+            format_page=formatar_pagina_produtos, source_columns=COLUNAS_ORIGEM_PRODUTOS,
+            clear_selection=True
+        )
+
     @app.callback(
         [Output("lista-categorias-content", "children"),
         Output("pagina-atual", "children"),
@@ -33,17 +159,20 @@ def register_giro_estoque_callbacks(app):
             elif trigger_id == "btn-proxima-pagina":
                 pagina_atual += 1
         
-        # Carregar dados do Store
-        df_curva_cobertura = pd.read_json(io.StringIO(data["df_analise_curva_cobertura"]), orient='split')
-        df_com_vendas = df_curva_cobertura[df_curva_cobertura['Curva ABC'].isin(['A', 'B', 'C'])]
-        categoria_vendas = df_com_vendas.groupby('Categoria')['valor_vendas_ultimos_90_dias'].sum().reset_index()
-        total_vendas = categoria_vendas['valor_vendas_ultimos_90_dias'].sum()
-        categoria_vendas['Porcentagem'] = (categoria_vendas['valor_vendas_ultimos_90_dias'] / total_vendas * 100).round(1)
-        categoria_vendas = categoria_vendas.sort_values(by='valor_vendas_ultimos_90_dias', ascending=False)
+        # Agregação por categoria (memorizada por versão dos dados)
+        categoria_vendas = calcular_vendas_por_categoria(data)
+        
+        # Dividir a lista em páginas
+        itens_por_pagina = 10
+        total_paginas = (len(categoria_vendas) + itens_por_pagina - 1) // itens_por_pagina
         
-        # Criar elementos da lista ordenada
-        lista_categorias = []
-        for index, row in categoria_vendas.iterrows():
+        # Calcular o índice inicial e final para a página atual
+        inicio = (pagina_atual - 1) * itens_por_pagina
+        fim = min(inicio + itens_por_pagina, len(categoria_vendas))
+        
+        # Criar elementos apenas para os itens da página atual
+        itens_pagina_atual = []
+        for index, row in categoria_vendas.iloc[inicio:fim].iterrows():
             categoria = row['Categoria']
             valor = row['valor_vendas_ultimos_90_dias']
             porcentagem = row['Porcentagem']
@@ -62,18 +191,7 @@ def register_giro_estoque_callbacks(app):
                 ], className="d-flex align-items-center"),
             ], className="d-flex justify-content-between py-2 border-bottom")
             
-            lista_categorias.append(item)
-        
-        # Dividir a lista em páginas
-        itens_por_pagina = 10
-        total_paginas = (len(lista_categorias) + itens_por_pagina - 1) // itens_por_pagina
-        
-        # Calcular o índice inicial e final para a página atual
-        inicio = (pagina_atual - 1) * itens_por_pagina
-        fim = min(inicio + itens_por_pagina, len(lista_categorias))
-        
-        # Selecionar apenas os itens da página atual
-        itens_pagina_atual = lista_categorias[inicio:fim]
+            itens_pagina_atual.append(item)
         
         # Estados dos botões de paginação
         btn_anterior_disabled = pagina_atual <= 1
@@ -108,73 +226,35 @@ def register_giro_estoque_callbacks(app):
                     html.P("Os dados de análise não estão disponíveis.", className="text-center text-muted")
                 ]), no_update
             
-            # Carregar dados com tratamento de erro
+            # Extrair o filtro com base no clique
+            filtro_curva = None
+            if curva_click_data and 'points' in curva_click_data and curva_click_data['points']:
+                filtro_curva = curva_click_data['points'][0]['x']
+            
+            # Carregar e filtrar os dados (memorizado por versão dos dados e filtro)
             try:
-                df_curva_cobertura = pd.read_json(io.StringIO(data["df_analise_curva_cobertura"]), orient='split')
-                if df_curva_cobertura.empty:
-                    raise ValueError("DataFrame está vazio")
+                df_exibir = preparar_tabela_produtos(data, 'Curva ABC', filtro_curva)
             except Exception as e:
                 return html.Div([
                     html.P(f"Erro ao carregar os dados: {str(e)}", className="text-danger text-center my-4"),
                     html.I(className="fas fa-file-excel fa-3x text-danger d-block text-center mb-3")
                 ]), no_update
             
-            # Extrair o filtro com base no clique
-            filtro_curva = None
-            if curva_click_data and 'points' in curva_click_data and curva_click_data['points']:
-                filtro_curva = curva_click_data['points'][0]['x']
-            
-            # Aplicar filtro ao DataFrame
-            df_filtrado = df_curva_cobertura.copy()
-            if filtro_curva:
-                df_filtrado = df_filtrado[df_filtrado['Curva ABC'] == filtro_curva]
-            
             # Atualizar o gráfico de curva ABC
             atualizar_grafico_curva_abc(curva_figure, filtro_curva)
             
-            # Selecionar colunas relevantes para exibição na tabela
-            colunas_base = [
-                'SKU', 
-                'ID Categoria',
-                'EAN',
-                'Descrição do Produto', 
-                'Categoria', 
-                'Estoque Total', 
-                'Situação do Produto', 
-                'Curva ABC',
-                'Data Última Venda'
-            ]
-            
-            # Identificar e adicionar colunas de estoque por loja disponíveis
-            colunas_estoque_loja = [col for col in df_curva_cobertura.columns if col.startswith('Estoque Loja')]
-            
-            # Combinar colunas base com colunas de estoque de loja
-            colunas_exibir = colunas_base + colunas_estoque_loja
-            # Verificar se todas as colunas existem no DataFrame
-            colunas_existentes = [col for col in colunas_exibir if col in df_filtrado.columns]
-            
-            if not colunas_existentes:
+            if df_exibir is None:
                 return html.Div([
                     html.P("Nenhuma coluna válida encontrada nos dados", className="text-warning text-center my-4"),
                     html.I(className="fas fa-columns fa-3x text-warning d-block text-center mb-3")
                 ]), curva_figure
             
-            df_exibir = df_filtrado[colunas_existentes].copy()
-            
-            # Formatar a data
-            if 'Data Última Venda' in df_exibir.columns:
-                df_exibir['Data Última Venda'] = pd.to_datetime(df_exibir['Data Última Venda'], errors='coerce').dt.strftime('%d/%m/%Y')
-            
-            # Criar componente da tabela
-            table = dash_table.DataTable(
-                id='datatable-curva-abc',
-                columns=[{"name": col, "id": col} for col in df_exibir.columns],
-                data=df_exibir.reset_index().to_dict("records"),
-                filter_action="native",
-                sort_action="native",
-                sort_mode="multi",
+            # Tabela paginada no servidor: o navegador recebe apenas a página atual
+            table = create_server_table(
+                'datatable-curva-abc',
+                columns=colunas_tabela_produtos(df_exibir),
                 page_size=10,
-                export_format="xlsx",
+                params={"coluna": 'Curva ABC', "valor": filtro_curva},
                 row_selectable="single",
                 selected_rows=[],
                 style_table={"overflowX": "auto"},
@@ -213,7 +293,7 @@ def register_giro_estoque_callbacks(app):
                         html.Strong(f"{len(df_exibir)}"), 
                         f" produtos - {titulo_filtro}"
                     ], style={"marginBottom": "1rem", "fontSize": "0.9rem", "color": "#666"}),
-                    table
+                    *table
                 ]), curva_figure
             else:
                 return html.Div([
@@ -255,73 +335,35 @@ def register_giro_estoque_callbacks(app):
                     html.P("Os dados de análise não estão disponíveis.", className="text-center text-muted")
                 ]), no_update
             
-            # Carregar dados com tratamento de erro
+            # Extrair o filtro com base no clique
+            filtro_situacao = None
+            if situacao_click_data and 'points' in situacao_click_data and situacao_click_data['points']:
+                filtro_situacao = situacao_click_data['points'][0]['x']
+            
+            # Carregar e filtrar os dados (memorizado por versão dos dados e filtro)
             try:
-                df_curva_cobertura = pd.read_json(io.StringIO(data["df_analise_curva_cobertura"]), orient='split')
-                if df_curva_cobertura.empty:
-                    raise ValueError("DataFrame está vazio")
+                df_exibir = preparar_tabela_produtos(data, 'Situação do Produto', filtro_situacao)
             except Exception as e:
                 return html.Div([
                     html.P(f"Erro ao carregar os dados: {str(e)}", className="text-danger text-center my-4"),
                     html.I(className="fas fa-file-excel fa-3x text-danger d-block text-center mb-3")
                 ]), no_update
             
-            # Extrair o filtro com base no clique
-            filtro_situacao = None
-            if situacao_click_data and 'points' in situacao_click_data and situacao_click_data['points']:
-                filtro_situacao = situacao_click_data['points'][0]['x']
-            
-            # Aplicar filtro ao DataFrame
-            df_filtrado = df_curva_cobertura.copy()
-            if filtro_situacao:
-                df_filtrado = df_filtrado[df_filtrado['Situação do Produto'] == filtro_situacao]
-            
             # Atualizar o gráfico de situação
             atualizar_grafico_situacao(situacao_figure, filtro_situacao)
             
-            # Selecionar colunas relevantes para exibição na tabela
-            colunas_base = [
-                'SKU', 
-                'ID Categoria',
-                'EAN',
-                'Descrição do Produto', 
-                'Categoria', 
-                'Estoque Total', 
-                'Situação do Produto', 
-                'Curva ABC',
-                'Data Última Venda'
-            ]
-            
-            # Identificar e adicionar colunas de estoque por loja disponíveis
-            colunas_estoque_loja = [col for col in df_curva_cobertura.columns if col.startswith('Estoque Loja')]
-            
-            # Combinar colunas base com colunas de estoque de loja
-            colunas_exibir = colunas_base + colunas_estoque_loja
-            # Verificar se todas as colunas existem no DataFrame
-            colunas_existentes = [col for col in colunas_exibir if col in df_filtrado.columns]
-            
-            if not colunas_existentes:
+            if df_exibir is None:
                 return html.Div([
                     html.P("Nenhuma coluna válida encontrada nos dados", className="text-warning text-center my-4"),
                     html.I(className="fas fa-columns fa-3x text-warning d-block text-center mb-3")
                 ]), situacao_figure
             
-            df_exibir = df_filtrado[colunas_existentes].copy()
-            
-            # Formatar a data
-            if 'Data Última Venda' in df_exibir.columns:
-                df_exibir['Data Última Venda'] = pd.to_datetime(df_exibir['Data Última Venda'], errors='coerce').dt.strftime('%d/%m/%Y')
-            
-            # Criar componente da tabela
-            table = dash_table.DataTable(
-                id='datatable-situacao',
-                columns=[{"name": col, "id": col} for col in df_exibir.columns],
-                data=df_exibir.reset_index().to_dict("records"),
-                filter_action="native",
-                sort_action="native",
-                sort_mode="multi",
+            # Tabela paginada no servidor: o navegador recebe apenas a página atual
+            table = create_server_table(
+                'datatable-situacao',
+                columns=colunas_tabela_produtos(df_exibir),
                 page_size=10,
-                export_format="xlsx",
+                params={"coluna": 'Situação do Produto', "valor": filtro_situacao},
                 row_selectable="single",
                 selected_rows=[],
                 style_table={"overflowX": "auto"},
@@ -360,7 +402,7 @@ def register_giro_estoque_callbacks(app):
                         html.Strong(f"{len(df_exibir)}"), 
                         f" produtos - {titulo_filtro}"
                     ], style={"marginBottom": "1rem", "fontSize": "0.9rem", "color": "#666"}),
-                    table
+                    *table
                 ]), situacao_figure
             else:
                 return html.Div([
@@ -1,13 +1,14 @@
-import io
 import dash
 import pandas as pd
 import plotly.express as px
-from dash import Input, Output, State, html, dcc, dash_table
+from dash import Input, Output, State, html, dcc
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 from utils.formatters import format_iso_date, formatar_moeda, formatar_numero
 from utils.helpers import color, create_metric_row, gradient_colors
+from utils.server_table import create_server_table, register_server_table
+from data_load.dataset_registry import get_dataframe
 
 def criar_grafico_simulado(produto, valores, meses_labels):
     """
@@ -359,6 +360,116 @@ def criar_grafico_produto(df_produto, id_produto):
         )
         return fig
 
+# Colunas exibidas na lista de produtos por criticidade
+COLUNAS_CRITICIDADE = [
+    "id_produto", 
+    "nome_produto", 
+    "estoque_atual", 
+    # "critico", 
+    "media_3M", 
+    "cobertura_percentual_30d", 
+    "cobertura_dias",
+    "sugestao_1m", 
+    "sugestao_3m", 
+    "data_ultima_compra", 
+    "ultima_qtd_comprada", 
+    "ultimo_preco_compra", 
+    "ultimo_fornecedor", 
+    "data_penultima_compra",
+    "penultima_qtd_comprada",
+    "penultimo_preco_compra",
+    "penultimo_fornecedor",
+    "data_antepenultima_compra",
+    "antepenultima_qtd_comprada", 
+    "antepenultimo_preco_compra", 
+    "antepenultimo_fornecedor"
+]
+
+# Renomear colunas para melhor visualização
+COL_RENAME_CRITICIDADE = {
+    "id_produto": "Código",
+    "nome_produto": "Produto",
+    "estoque_atual": "Estoque Atual",
+    # "critico": "Reposição Não-Local (Crítico)",
+    "media_3M": "Consumo Médio (3M)",
+    "cobertura_percentual_30d": "% Cobertura (30d)",
+    "cobertura_dias": "Cobertura em Dias",
+    "sugestao_1m": "Sugestão (1M)",
+    "sugestao_3m": "Sugestão (3M)",
+    # ultima compra
+    "data_ultima_compra": "Data Última Compra",
+    "ultima_qtd_comprada": "Última Quantidade Comprada",
+    "ultimo_preco_compra": "Útimo Preço de Compra",
+    "ultimo_fornecedor": "Útimo Fornecedor",
+    # penúltima compra
+    "data_penultima_compra": "Data Penúltima Compra",
+    "penultima_qtd_comprada": "Penúltima Quantidade Comprada",
+    "penultimo_preco_compra": "Penúltimo Preço de Compra",
+    "penultimo_fornecedor": "Penúltimo Fornecedor",
+    # antepenúltima compra
+    "data_antepenultima_compra": "Data Antepenúltima Compra",
+    "antepenultima_qtd_comprada": "Antepenúltima Quantidade Comprada",
+    "antepenultimo_preco_compra": "Antepenúltimo Preço de Compra",
+    "antepenultimo_fornecedor": "Antepenúltimo Fornecedor"
+}
+
+def carregar_produtos_criticidade(data, params):
+    """
+    Fonte da tabela 'produtos-criticidade-table': produtos do nível de cobertura selecionado
+
+    Args:
+        data (dict): Handle do dcc.Store 'selected-data'
+        params (dict): {'criticidade': nível ou 'TODOS', 'filtro_criticos': bool}
+
+    Returns:
+        DataFrame com as colunas exibidas (valores brutos)
+    """
+    df_produtos = get_dataframe(data, "df_metricas_compra")
+    if df_produtos is None:
+        return pd.DataFrame()
+
+    if params.get("filtro_criticos"):
+        df_produtos = df_produtos[df_produtos['critico'] == True]
+
+    criticidade = params.get("criticidade")
+    if criticidade != 'TODOS':
+        # Filtrar TODOS os produtos desta criticidade
+        df_produtos = df_produtos[df_produtos["criticidade"] == criticidade]
+
+    return df_produtos[[col for col in COLUNAS_CRITICIDADE if col in df_produtos.columns]]
+
+def format_currency_safely(value):
+    """Formata um custo como moeda, mantendo valores já formatados e vazios"""
+    try:
+        if pd.isna(value) or value == "":
+            return ""
+        # Se já for uma string que começa com R$, retornar diretamente
+        if isinstance(value, str) and value.strip().startswith('R$'):
+            return value
+        # Caso contrário, tentar converter para float e formatar
+        return formatar_moeda(float(value)) if value != 0 else ""
+    except (ValueError, TypeError):
+        # Em caso de erro, retornar o valor original
+        return str(value) if not pd.isna(value) else ""
+
+def formatar_pagina_criticidade(df_page):
+    """Formatação especial de percentuais, valores monetários e datas das linhas exibidas"""
+    if 'cobertura_percentual_30d' in df_page.columns:
+        df_page['cobertura_percentual_30d'] = df_page['cobertura_percentual_30d'].apply(
+            lambda x: f"{x:.1f}%".replace(".", ",")
+        )
+
+    for custo_col in ['ultimo_preco_compra', 'penultimo_preco_compra', 'antepenultimo_preco_compra']:
+        if custo_col in df_page.columns:
+            df_page[custo_col] = df_page[custo_col].apply(format_currency_safely)
+
+    for data_col in ['data_ultima_compra', 'data_penultima_compra', 'data_antepenultima_compra']:
+        if data_col in df_page.columns:
+            df_page[data_col] = df_page[data_col].apply(
+                lambda x: format_iso_date(x) if not pd.isna(x) else ""
+            )
+    return df_page
+
 def register_produtos_callbacks(app):
     """
     Registra todos os callbacks relacionados à página de produtos de estoque.
@@ -367,6 +478,11 @@ def register_produtos_callbacks(app):
         app: A instância do aplicativo Dash
     """
     
+    register_server_table(
+        app, 'produtos-criticidade-table', carregar_produtos_criticidade,
+        format_page=formatar_pagina_criticidade
+    )
+    
     @app.callback(
     [Output("produto-consumo-header", "children"),
      Output("produto-consumo-grafico", "children")],
@@ -426,7 +542,7 @@ def register_produtos_callbacks(app):
                 nome_produto = f"Produto {id_produto}"
             
             # Carregar dados de produtos
-            df_produtos = pd.read_json(io.StringIO(data["df_metricas_compra"]), orient='split')
+            df_produtos = get_dataframe(data, "df_metricas_compra")
             
             # Verificar se o produto existe no dataframe
             # Tentar diferentes formatos de código para aumentar compatibilidade
@@ -635,7 +751,7 @@ def register_produtos_callbacks(app):
             return dash.no_update
         
         # Carregamos os dados
-        df_criticos = pd.read_json(io.StringIO(produtos_data), orient='split')
+        df_criticos = get_dataframe(produtos_data, "df_metricas_compra")
         
         # Se o filtro estiver ativo, filtrar para mostrar apenas produtos críticos
         if filtro_ativo:
@@ -719,7 +835,7 @@ def register_produtos_callbacks(app):
             return dash.no_update
         
         # Carregamos os dados
-        df_criticos = pd.read_json(io.StringIO(produtos_data), orient='split')
+        df_criticos = get_dataframe(produtos_data, "df_metricas_compra")
         
         # Verificar a coluna de descrição do produto
         produto_col = 'nome_produto' if 'nome_produto' in df_criticos.columns else 'Produto' if 'Produto' in df_criticos.columns else None
@@ -811,7 +927,7 @@ def register_produtos_callbacks(app):
             return dash.no_update
         
         # Carregamos os dados
-        df_criticos = pd.read_json(io.StringIO(produtos_data), orient='split')
+        df_criticos = get_dataframe(produtos_data, "df_metricas_compra")
         
         # Se o filtro estiver ativo, mostrar apenas informações de produtos críticos
         if filtro_ativo:
@@ -878,20 +994,6 @@ def register_produtos_callbacks(app):
                     className="text-center text-muted my-4")
             ])
         
-        df_produtos = pd.read_json(io.StringIO(data["df_metricas_compra"]), orient='split')
-
-        if filtro_ativo:
-            df_produtos = df_produtos[df_produtos['critico'] == True]
-        
-        # Converta as colunas de string para lowercase para facilitar buscas case-insensitive
-        string_columns = df_produtos.select_dtypes(include=['object']).columns
-        for col in string_columns:
-            try:
-                # Tentar converter para lowercase, mas ignorar erros (se houver valores não-string)
-                df_produtos[f"{col}_lower"] = df_produtos[col].str.lower()
-            except:
-                pass
-        
         # Determine which chart was clicked
         trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
         
@@ -913,113 +1015,26 @@ def register_produtos_callbacks(app):
         # Checar se foi selecionado "Todos"
         if selected_criticidade == 'TODOS':
             header_text = "Todos os Produtos"
-            filtered_df = df_produtos  # Usar todo o DataFrame
         else:
             header_text = f"Produtos com Criticidade: {selected_criticidade}"
-            # Filtrar TODOS os produtos desta criticidade
-            filtered_df = df_produtos[df_produtos["criticidade"] == selected_criticidade]
         
-        if filtered_df.empty:
-            return header_text, "Nenhum produto encontrado para a criticidade selecionada."
+        params = {"criticidade": selected_criticidade, "filtro_criticos": bool(filtro_ativo)}
+        filtered_df = carregar_produtos_criticidade(data, params)
         
-        # Determinar colunas de exibição
-        display_columns = [
-            "id_produto", 
-            "nome_produto", 
-            "estoque_atual", 
-            # "critico", 
-            "media_3M", 
-            "cobertura_percentual_30d", 
-            "cobertura_dias",
-            "sugestao_1m", 
-            "sugestao_3m", 
-            "data_ultima_compra", 
-            "ultima_qtd_comprada", 
-            "ultimo_preco_compra", 
-            "ultimo_fornecedor", 
-            "data_penultima_compra",
-            "penultima_qtd_comprada",
-            "penultimo_preco_compra",
-            "penultimo_fornecedor",
-            "data_antepenultima_compra",
-            "antepenultima_qtd_comprada", 
-            "antepenultimo_preco_compra", 
-            "antepenultimo_fornecedor"
-        ]
-        
-        # Usar apenas colunas que existem no DataFrame
-        existing_columns = [col for col in display_columns if col in filtered_df.columns]
+        # Apenas as colunas de exibição que existem no DataFrame
+        existing_columns = list(filtered_df.columns)
         if not existing_columns:
             return header_text, "Estrutura de dados incompatível para exibição de detalhes."
         
-        # Renomear colunas para melhor visualização
-        col_rename = {
-            "id_produto": "Código",
-            "nome_produto": "Produto",
-            "estoque_atual": "Estoque Atual",
-            # "critico": "Reposição Não-Local (Crítico)",
-            "media_3M": "Consumo Médio (3M)",
-            "cobertura_percentual_30d": "% Cobertura (30d)",
-            "cobertura_dias": "Cobertura em Dias",
-            "sugestao_1m": "Sugestão (1M)",
-            "sugestao_3m": "Sugestão (3M)",
-            # ultima compra
-            "data_ultima_compra": "Data Última Compra",
-            "ultima_qtd_comprada": "Última Quantidade Comprada",
-            "ultimo_preco_compra": "Útimo Preço de Compra",
-            "ultimo_fornecedor": "Útimo Fornecedor",
-            # penúltima compra
-            "data_penultima_compra": "Data Penúltima Compra",
-            "penultima_qtd_comprada": "Penúltima Quantidade Comprada",
-            "penultimo_preco_compra": "Penúltimo Preço de Compra",
-            "penultimo_fornecedor": "Penúltimo Fornecedor",
-            # antepenúltima compra
-            "data_antepenultima_compra": "Data Antepenúltima Compra",
-            "antepenultima_qtd_comprada": "Antepenúltima Quantidade Comprada",
-            "antepenultimo_preco_compra": "Antepenúltimo Preço de Compra",
-            "antepenultimo_fornecedor": "Antepenúltimo Fornecedor"
-        }
-        
-        # Formatação especial para valores monetários e percentuais
-        filtered_df_display = filtered_df[existing_columns].copy()
-        
-        if 'cobertura_percentual_30d' in filtered_df_display.columns:
-            filtered_df_display['cobertura_percentual_30d'] = filtered_df_display['cobertura_percentual_30d'].apply(
-                lambda x: f"{x:.1f}%".replace(".", ",")
-            )
-        
-        # Verificar e converter para o formato correto antes de aplicar formatação
-        for custo_col in ['ultimo_preco_compra', 'penultimo_preco_compra', 'antepenultimo_preco_compra']:
-            if custo_col in filtered_df_display.columns:
-                # Verificar se a coluna já está formatada como string de moeda
-                def format_currency_safely(value):
-                    try:
-                        if pd.isna(value) or value == "":
-                            return ""
-                        # Se já for uma string que começa com R$, retornar diretamente
-                        if isinstance(value, str) and value.strip().startswith('R$'):
-                            return value
-                        # Caso contrário, tentar converter para float e formatar
-                        return formatar_moeda(float(value)) if value != 0 else ""
-                    except (ValueError, TypeError):
-                        # Em caso de erro, retornar o valor original
-                        return str(value) if not pd.isna(value) else ""
-                
-                filtered_df_display[custo_col] = filtered_df_display[custo_col].apply(format_currency_safely)
-        
-        # Formatar datas
-        for data_col in ['data_ultima_compra', 'data_penultima_compra', 'data_antepenultima_compra']:
-            if data_col in filtered_df_display.columns:
-                filtered_df_display[data_col] = filtered_df_display[data_col].apply(
-                    lambda x: format_iso_date(x) if not pd.isna(x) else ""
-                )
+        if filtered_df.empty:
+            return header_text, "Nenhum produto encontrado para a criticidade selecionada."
         
-        # Criar tabela aprimorada com filtro case-insensitive
-        table = dash_table.DataTable(
-            id='produtos-criticidade-table',  # ID único para a tabela
-            columns=[{"name": col_rename.get(col, col), "id": col} for col in existing_columns],
-            data=filtered_df_display.to_dict("records"),
+        # Criar tabela paginada, filtrada e ordenada no servidor (filtro sem diferenciar maiúsculas/minúsculas)
+        table = create_server_table(
+            'produtos-criticidade-table',  # ID único para a tabela
+            columns=[{"name": COL_RENAME_CRITICIDADE.get(col, col), "id": col} for col in existing_columns],
             page_size=10,  # Aumentado para mostrar mais produtos por página
+            params=params,
             style_table={"overflowX": "auto"},
             style_cell={
                 "textAlign": "left",
@@ -1051,15 +1066,7 @@ def register_produtos_callbacks(app):
                     "if": {"row_index": "odd"},
                     "backgroundColor": "rgb(248, 248, 248)"
                 }
-            ],
-            filter_action="native",
-            sort_action="native",
-            sort_mode="multi",
-            export_format="xlsx",
-            # Configuração para tornar o filtro case-insensitive
-            filter_options={
-                'case': 'insensitive'   # Ignora maiúsculas/minúsculas nos filtros
-            }
+            ]
         )
         
         # Adicionar resumo acima da tabela
@@ -1073,4 +1080,4 @@ def register_produtos_callbacks(app):
             ], style={"marginBottom": "1rem", "fontSize": "0.9rem", "color": "#666"})
         ])
         
-        return header_text, html.Div([summary, table])
\ No newline at end of file
+        return header_text, html.Div([summary, *table])
\ No newline at end of file
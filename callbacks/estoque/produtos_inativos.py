@@ -1,22 +1,58 @@
 import os
 import warnings
 import dash
-from dash import Input, Output, html, dash_table, dcc
-import dotenv
+from dash import Input, Output, State, html, dcc
 import numpy as np
 import plotly.graph_objects as go
 import pandas as pd
-import io
 import datetime
 from datetime import datetime, timedelta
 
-import psycopg2
-from utils import formatar_numero
+from utils import formatar_numero, formatar_numero_serie
 from utils.helpers import color
+from utils.posicao_estoque import normalizar_id_produto
+from data_load.dataset_registry import get_dataframe, get_dataframe_rows
+from utils.server_table import create_server_table, register_server_table
 
 warnings.filterwarnings('ignore')
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+def carregar_produtos_inativos(data, params):
+    """
+    Fonte da tabela 'datatable-produtos-inativos': produtos sem venda há pelo menos params['dias'] dias
+
+    Args:
+        data (dict): Handle do dcc.Store 'selected-data'
+        params (dict): {'dias': dias mínimos de inatividade}
+
+    Returns:
+        DataFrame com valores brutos (inclui 'dias_inativo') ou None
+    """
+    if data.get("df_analise_curva_cobertura") is None:
+        return None
+
+    df_produtos = get_dataframe(data, "df_analise_curva_cobertura")
+
+    # Usar errors='coerce' para tratar valores problemáticos como "0" ou vazios
+    df_produtos['Data Última Venda'] = pd.to_datetime(df_produtos['Data Última Venda'], errors='coerce')
+
+    # Os dias de inatividade vêm da recência calculada no ETL
+    df_produtos['dias_inativo'] = df_produtos['Recência (dias)']
+
+    return df_produtos[df_produtos['dias_inativo'] >= params.get("dias", 0)]
+
+def formatar_pagina_inativos(df_page):
+    """Formata as datas e os dias de inatividade apenas das linhas exibidas"""
+    df_page['recencia_formatada'] = df_page['Data Última Venda'].dt.strftime('%d/%m/%Y')
+    df_page['dias_inativo_formatado'] = formatar_numero_serie(df_page['dias_inativo'], 0)
+    return df_page
+
+# Filtro e ordenação das colunas formatadas usam os valores brutos
+COLUNAS_ORIGEM_INATIVOS = {
+    "dias_inativo_formatado": "dias_inativo",
+    "recencia_formatada": "Data Última Venda"
+}
+
 def register_produtos_inativos_callbacks(app):
     """
     Registra todos os callbacks relacionados à página de produtos inativos.
@@ -25,6 +61,12 @@ def register_produtos_inativos_callbacks(app):
         app: A instância do aplicativo Dash
     """
     
+    register_server_table(
+        app, 'datatable-produtos-inativos', carregar_produtos_inativos,
+        format_page=formatar_pagina_inativos, source_columns=COLUNAS_ORIGEM_INATIVOS,
+        clear_selection=True
+    )
+    
     @app.callback(
         [Output("table-produtos-inativos", 'children'),
          Output("tempo-inatividade-display", 'children'),
@@ -41,25 +83,8 @@ def register_produtos_inativos_callbacks(app):
                 "Nenhum produto encontrado"
             )
             
-        # Carregar os dados do DataFrame
-        df_produtos = pd.read_json(io.StringIO(data["df_analise_curva_cobertura"]), orient='split')
-        
-        # Garantir que a coluna 'Data Última Venda' esteja no formato de data
-        if 'Data Última Venda' in df_produtos.columns and df_produtos['Data Última Venda'].dtype == 'object':
-            # Usar errors='coerce' para tratar valores problemáticos como "0" ou vazios
-            df_produtos['Data Última Venda'] = pd.to_datetime(df_produtos['Data Última Venda'], errors='coerce')
-            
-            # Definir uma data padrão para valores que não puderam ser convertidos (NULL/NaT)
-            # Usando a data atual para calcular corretamente os dias de inatividade
-            data_atual = datetime.now()
-            df_produtos['Data Última Venda'].fillna(data_atual, inplace=True)
-        
-        # Calcular os dias de inatividade
-        data_atual = datetime.now()
-        df_produtos['dias_inativo'] = df_produtos['Recência (dias)']
-        
-        # Filtramos os produtos inativos pelo número de dias
-        df_filtrado = df_produtos[df_produtos['dias_inativo'] >= dias_selecionados].copy()
+        # Carregar os produtos inativos há pelo menos os dias selecionados
+        df_filtrado = carregar_produtos_inativos(data, {"dias": dias_selecionados})
         
         # Formatamos o texto do período
         if dias_selecionados < 30:
@@ -74,11 +99,6 @@ def register_produtos_inativos_callbacks(app):
         texto_tempo = f"Produtos inativos há mais de {periodo_texto}"
         texto_contagem = f"Total de {len(df_filtrado)} produtos encontrados"
         
-        df_filtrado['Data Última Venda'] = pd.to_datetime(df_filtrado['Data Última Venda'], errors='coerce')
-        # Formatamos as datas e valores para a tabela
-        df_filtrado['recencia_formatada'] = df_filtrado['Data Última Venda'].dt.strftime('%d/%m/%Y')
-        df_filtrado['dias_inativo_formatado'] = df_filtrado['dias_inativo'].apply(lambda x: formatar_numero(x, 0))
-        
         # Determinamos quais colunas mostrar (adaptando se certas colunas existirem)
         columns = [
             {"name": "ID", "id": "SKU"},
@@ -88,16 +108,12 @@ def register_produtos_inativos_callbacks(app):
             {"name": "Última Venda", "id": "recencia_formatada"},
         ]
 
-        # Criamos a tabela com os dados filtrados
-        table = dash_table.DataTable(
-            id='datatable-produtos-inativos',
+        # Criamos a tabela paginada no servidor (o navegador recebe apenas a página atual)
+        table = create_server_table(
+            'datatable-produtos-inativos',
             columns=columns,
-            data=df_filtrado.reset_index().to_dict("records"),
-            filter_action="native",
-            sort_action="native",
-            sort_mode="multi",
             page_size=10,
-            export_format="xlsx",
+            params={"dias": dias_selecionados},
             row_selectable="single",
             selected_rows=[],
             style_table={"overflowX": "auto"},
@@ -135,7 +151,7 @@ def register_produtos_inativos_callbacks(app):
                     html.Strong(formatar_numero(len(df_filtrado))), 
                     " produtos."
                 ], style={"marginBottom": "1rem", "fontSize": "0.9rem", "color": "#666"}),
-                table
+                *table
             ])
         else:
             table_container = html.Div([
@@ -174,9 +190,10 @@ def register_produtos_inativos_callbacks(app):
 
     @app.callback(
         Output('produto-analise-detalhada', 'children'),
-        [Input('produto-selecionado-store', 'data')]
+        [Input('produto-selecionado-store', 'data')],
+        [State('selected-data', 'data')]
     )
-    def mostrar_analise_produto(produto_data):
+    def mostrar_analise_produto(produto_data, data):
         """
         Realiza a análise de estoque do produto selecionado e mostra os gráficos
         e informações detalhadas.
@@ -184,17 +201,14 @@ def register_produtos_inativos_callbacks(app):
         if not produto_data:
             return html.Div("")
             
-        nome_produto = produto_data['desc_produto']
-        
         try:
-            # Conectar ao banco para obter os dados
-            # (Aqui estamos simulando os dados para o exemplo)
-            resultado = obter_dados_estoque_produto(nome_produto)
+            # Histórico pré-calculado pelo processamento noturno (sem acesso ao banco)
+            resultado = carregar_historico_produto(data, produto_data.get('id_produto'))
             
             if resultado is None:
+                # Cliente ainda sem historico_estoque (etapa do ETL não executada) ou produto sem movimentos
                 return html.Div([
-                    html.P("Não foi possível analisar este produto. Verifique se existem dados de estoque disponíveis.",
-                           className="text-danger")
+                    html.P("Histórico de estoque indisponível para este produto.", className="text-muted")
                 ])
                 
             # Criar os gráficos e análises baseado no DataFrame retornado
@@ -445,179 +459,34 @@ def register_produtos_inativos_callbacks(app):
 
 
 ################################################################################################################################################
-#"Função para puxar dados da aws e fazer analise de giro de estoque do produto")
+# Histórico de estoque do produto (pré-calculado pela etapa historico_estoque do ETL)
 ################################################################################################################################################
-def obter_dados_estoque_produto(nome_produto):
+def carregar_historico_produto(data, id_produto):
     """
-    Analisa o estoque diário de um produto específico pelo ID
+    Lê a evolução diária de estoque de um produto do histórico pré-calculado
     
     Args:
-        id_produto: ID do produto para análise
+        data: Handle do dcc.Store 'selected-data'
+        id_produto: ID (SKU) do produto
     
     Returns:
-        DataFrame com evolução diária e gráficos gerados
+        DataFrame com evolução diária e métricas em attrs, ou None se o
+        histórico do produto não estiver disponível
     """
-    print(f"Iniciando análise para o produto ID: {nome_produto}")
-    dotenv.load_dotenv()
+    if id_produto is None:
+        return None
     
-    try:
-        # Conectar ao PostgreSQL
-        print("Conectando ao banco de dados...")
-        conn = psycopg2.connect(
-            host= os.getenv("DB_HOST"),
-            dbname="add",
-            user= os.getenv("DB_USER"),
-            password= os.getenv("DB_PASS"),
-            port= os.getenv("DB_PORT"),
-        )
-        
-        # Consultar dados do produto
-        query_produto = f"SELECT * FROM maloka_core.produto WHERE nome = '{nome_produto}'"
-        df_produto = pd.read_sql_query(query_produto, conn)
-        
-        if len(df_produto) == 0:
-            print(f"ERRO: Produto com ID {nome_produto} não encontrado.")
-            return None
-            
-        # Se o produto foi encontrado, obtenha o ID para buscar os movimentos
-        id_produto = df_produto['id_produto'].iloc[0] if 'id_produto' in df_produto.columns else None
-        nome_produto_db = df_produto['nome'].iloc[0]
-        print(f"Produto encontrado: {nome_produto_db}" + (f" (ID: {id_produto})" if id_produto else ""))
-        
-        
-        # Consultar movimentos do produto
-        query_estoque = f"""
-        SELECT * FROM maloka_core.estoque_movimento 
-        WHERE id_produto = '{id_produto}'
-        ORDER BY data_movimento ASC
-        """
-        
-        df_movimentos = pd.read_sql_query(query_estoque, conn)
-        
-        # Fechar conexão
-        conn.close()
-        
-        if len(df_movimentos) == 0:
-            print(f"ERRO: Nenhum movimento de estoque encontrado para o produto {id_produto}.")
-            return None
-            
-        print(f"Encontrados {len(df_movimentos)} registros de movimento.")
-        
-        # Processamento dos dados
-        df_movimentos['data_movimento'] = pd.to_datetime(df_movimentos['data_movimento'])
-        
-        # Determinar período de análise
-        data_inicial = df_movimentos['data_movimento'].min()
-        data_final = df_movimentos['data_movimento'].max()
-        
-        # Limitar a análise apenas ao último ano
-        data_um_ano_atras = data_final - timedelta(days=365)
-        data_inicial_original = data_inicial
-        data_inicial = max(data_inicial, data_um_ano_atras)
-        
-        # Filtrar movimentos apenas do último ano
-        df_movimentos = df_movimentos[df_movimentos['data_movimento'] >= data_inicial]
-        
-        print(f"Período de análise: {data_inicial.strftime('%d/%m/%Y')} até {data_final.strftime('%d/%m/%Y')}")
-        print(f"Nota: Análise limitada ao último ano (dados originais começam em {data_inicial_original.strftime('%d/%m/%Y')})")
-        
-        # Criar DataFrame com todas as datas no intervalo
-        todas_datas = pd.date_range(start=data_inicial, end=data_final, freq='D')
-        df_diario = pd.DataFrame({'data': todas_datas})
-        
-        # Para cada data, encontrar o estoque mais recente (último movimento até essa data)
-        estoque_diario = []
-        
-        # Obter o estoque inicial (último movimento antes do período analisado)
-        movimentos_anteriores = df_movimentos[df_movimentos['data_movimento'] < data_inicial]
-        estoque_inicial = 0
-        if len(movimentos_anteriores) > 0:
-            estoque_inicial = movimentos_anteriores.iloc[-1]['estoque_depois']
-        
-        for data in df_diario['data']:
-            # Filtrar movimentos até esta data
-            movimentos_ate_data = df_movimentos[df_movimentos['data_movimento'] <= data]
-            
-            if len(movimentos_ate_data) > 0:
-                # Último movimento
-                ultimo_movimento = movimentos_ate_data.iloc[-1]
-                estoque = ultimo_movimento['estoque_depois']
-                ultima_movimentacao = ultimo_movimento['data_movimento']
-                tipo_ultimo_movimento = ultimo_movimento['tipo']
-            else:
-                estoque = estoque_inicial
-                ultima_movimentacao = None
-                tipo_ultimo_movimento = None
-            
-            estoque_diario.append({
-                'data': data,
-                'estoque': estoque,
-                'ultima_movimentacao': ultima_movimentacao,
-                'tipo_ultimo_movimento': tipo_ultimo_movimento
-            })
-       
-        # Criar DataFrame com evolução diária
-        df_evolucao_diaria = pd.DataFrame(estoque_diario)
-        estoque_medio = df_evolucao_diaria['estoque'].mean()
-        estoque_atual = df_evolucao_diaria['estoque'].iloc[-1]
-
-        # Calcular dias com zero estoque
-        dias_zerados = sum(df_evolucao_diaria['estoque'] <= 0)
-        pct_dias_zerados = (dias_zerados / len(df_evolucao_diaria)) * 100
-            
-        # Adicionar média móvel para suavizar flutuações
-        df_evolucao_diaria['media_movel_7d'] = df_evolucao_diaria['estoque'].rolling(window=7, min_periods=1).mean()
-            
-        # Calcular métricas de giro e cobertura de estoque
-        # 1. Calcular total de saídas no período
-        saidas = df_movimentos[df_movimentos['tipo'] == 'S']
-        total_saidas = saidas['quantidade'].sum() if len(saidas) > 0 else 0
-            
-        # 2. Calcular média diária de saídas (demanda média diária)
-        dias_periodo = (data_final - data_inicial).days + 1
-        demanda_media_diaria = total_saidas / dias_periodo if dias_periodo > 0 else 0
-            
-        # 3. Calcular índice de giro de estoque (anualizado)
-        # Giro = (Total de saídas no período / Estoque médio) * (365 / dias no período)
-        if estoque_medio > 0:
-            giro_estoque = (total_saidas / estoque_medio) * (365 / dias_periodo)
-        else:
-            giro_estoque = float('inf') if total_saidas > 0 else 0
-        
-        # 4. Calcular cobertura de estoque (em dias)
-        # Cobertura = Estoque atual / demanda média diária
-        if demanda_media_diaria > 0:
-            cobertura_estoque = estoque_atual / demanda_media_diaria
-        else:
-            cobertura_estoque = float('inf') if estoque_atual > 0 else 0    
-        
-        # Calcular tendência (primeiros 10% vs últimos 10%)
-        n_amostras = len(df_evolucao_diaria)
-        n_amostras_10pct = max(1, int(n_amostras * 0.1))
-
-        estoque_inicial = df_evolucao_diaria['estoque'].iloc[:n_amostras_10pct].mean()
-        estoque_final = df_evolucao_diaria['estoque'].iloc[-n_amostras_10pct:].mean()
-
-        # Adicionar giro e cobertura ao DataFrame como atributos personalizados
-        df_evolucao_diaria.attrs['giro_estoque'] = giro_estoque
-        df_evolucao_diaria.attrs['cobertura_estoque'] = cobertura_estoque
-        df_evolucao_diaria.attrs['estoque_medio'] = estoque_medio
-        df_evolucao_diaria.attrs['dias_zerados'] = dias_zerados
-        df_evolucao_diaria.attrs['pct_dias_zerados'] = pct_dias_zerados
-
-        # Adicionar também outros metadados úteis
-        if estoque_inicial > 0:
-            variacao_pct = ((estoque_final - estoque_inicial) / estoque_inicial) * 100
-        else:
-            variacao_pct = float('inf') if estoque_final > 0 else 0
-            
-        df_evolucao_diaria.attrs['variacao_pct'] = variacao_pct
-        df_evolucao_diaria.attrs['demanda_media_diaria'] = demanda_media_diaria
-
-        return df_evolucao_diaria
-        
-    except Exception as e:
-        print(f"Erro na análise: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    chave = normalizar_id_produto(id_produto)
+    df_serie = get_dataframe_rows(data, "df_historico_estoque", chave)
+    df_metricas = get_dataframe_rows(data, "df_historico_estoque_metricas", chave)
+    if df_serie is None or df_serie.empty or df_metricas is None or df_metricas.empty:
         return None
+    
+    df_evolucao_diaria = df_serie.reset_index(drop=True)
+    metricas = df_metricas.iloc[0]
+    for chave_metrica in ['giro_estoque', 'cobertura_estoque', 'estoque_medio', 'dias_zerados',
+                          'pct_dias_zerados', 'variacao_pct', 'demanda_media_diaria']:
+        df_evolucao_diaria.attrs[chave_metrica] = metricas[chave_metrica]
+    
+    print(f"Histórico pré-calculado do produto {chave}: {len(df_evolucao_diaria)} dias")
+    return df_evolucao_diaria
@@ -1,10 +1,11 @@
 from dash import Input, Output, State, html, dcc
-import io
 import pandas as pd
 import time
 import openai
 
 from utils import classificar_pergunta, selecionar_dataframes, CONTEXTO_PADRAO, SEGMENTOS_PADRAO
+from data_load.client_data import get_client_context, get_client_segmentos
+from data_load.dataset_registry import get_dataframe
 
 def register_chat_callbacks(app):
     """
@@ -61,25 +62,25 @@ def register_chat_callbacks(app):
         # 3. Importar dataframes
         if data:
             #segmentacao de clientes
-            df = pd.read_json(io.StringIO(data["df"]), orient='split') if data.get("df") else None
-            df_RC_Mensal = pd.read_json(io.StringIO(data["df_RC_Mensal"]), orient='split') if data.get("df_RC_Mensal") else None
-            df_RC_Trimestral = pd.read_json(io.StringIO(data["df_RC_Trimestral"]), orient='split') if data.get("df_RC_Trimestral") else None
-            df_RC_Anual = pd.read_json(io.StringIO(data["df_RC_Anual"]), orient='split') if data.get("df_RC_Anual") else None
-            df_RT_Anual = pd.read_json(io.StringIO(data["df_RT_Anual"]), orient='split') if data.get("df_RT_Anual") else None
-            df_Previsoes = pd.read_json(io.StringIO(data["df_Previsoes"]), orient='split') if data.get("df_Previsoes") else None
+            df = get_dataframe(data, "df")
+            df_RC_Mensal = get_dataframe(data, "df_RC_Mensal")
+            df_RC_Trimestral = get_dataframe(data, "df_RC_Trimestral")
+            df_RC_Anual = get_dataframe(data, "df_RC_Anual")
+            df_RT_Anual = get_dataframe(data, "df_RT_Anual")
+            df_Previsoes = get_dataframe(data, "df_Previsoes")
 
             #estoque
-            df_Vendas_Atipicas = pd.read_json(io.StringIO(data["df_Vendas_Atipicas"]), orient='split') if data.get("df_Vendas_Atipicas") else None
-            df_relatorio_produtos = pd.read_json(io.StringIO(data["df_relatorio_produtos"]), orient='split') if data.get("df_relatorio_produtos") else None
+            df_Vendas_Atipicas = get_dataframe(data, "df_Vendas_Atipicas")
+            df_relatorio_produtos = get_dataframe(data, "df_relatorio_produtos")
 
             #faturamento
-            df_fat_Anual = pd.read_json(io.StringIO(data["df_fat_Anual"]), orient='split') if data.get("df_fat_Anual") else None
-            df_fat_Anual_Geral = pd.read_json(io.StringIO(data["df_fat_Anual_Geral"]), orient='split') if data.get("df_fat_Anual_Geral") else None
-            df_fat_Mensal = pd.read_json(io.StringIO(data["df_fat_Mensal"]), orient='split') if data.get("df_fat_Mensal") else None
+            df_fat_Anual = get_dataframe(data, "df_fat_Anual")
+            df_fat_Anual_Geral = get_dataframe(data, "df_fat_Anual_Geral")
+            df_fat_Mensal = get_dataframe(data, "df_fat_Mensal")
 
             # Obter contexto específico do cliente
-            company_context = data.get("company_context", CONTEXTO_PADRAO)
-            segmentos_context = data.get("segmentos_context", SEGMENTOS_PADRAO)
+            company_context = get_client_context(selected_client) if selected_client else CONTEXTO_PADRAO
+            segmentos_context = get_client_segmentos(selected_client) if selected_client else SEGMENTOS_PADRAO
 
             # 4. Construir o prompt com os dados disponíveis
             prompt = f"""
@@ -1,6 +1,8 @@
 from callbacks.vendas.faturamento_anual import register_faturamento_anual_callbacks
+from callbacks.vendas.vendas_atipicas import register_vendas_atipicas_callbacks
 
 def register_callbacks(app):
     register_faturamento_anual_callbacks(app)   
+    register_vendas_atipicas_callbacks(app)
 
 __all__ = ['register_callbacks']
\ No newline at end of file
@@ -1,4 +1,3 @@
-import io
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
@@ -6,6 +5,7 @@ from dash.dependencies import Input, Output, State
 from dash import callback_context
 
 from utils import formatar_moeda, color, gradient_colors
+from data_load.dataset_registry import get_dataframe
 
 def register_faturamento_anual_callbacks(app):
     """
@@ -23,7 +23,7 @@ def register_faturamento_anual_callbacks(app):
             return {}
         
         try:
-            df_mensal_lojas = pd.read_json(io.StringIO(data["df_fat_Mensal_lojas"]), orient='split')
+            df_mensal_lojas = get_dataframe(data, "df_fat_Mensal_lojas")
             
             # Converter valores de faturamento para numérico (caso estejam como string)
             df_mensal_lojas['total_venda'] = pd.to_numeric(df_mensal_lojas['total_venda'].astype(str).str.replace(',', '.'), errors='coerce')
@@ -195,7 +195,7 @@ def register_faturamento_anual_callbacks(app):
             return fig
         
         # Ler dados
-        df_diario = pd.read_json(io.StringIO(data["df_fat_Diario"]), orient='split')
+        df_diario = get_dataframe(data, "df_fat_Diario")
         
         # Converter valores com vírgula para ponto
         df_diario['total_venda'] = df_diario['total_venda'].astype(str).str.replace(',', '.').astype(float)
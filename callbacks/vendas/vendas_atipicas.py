@@ -0,0 +1,35 @@
+import pandas as pd
+
+from utils.server_table import register_server_table
+from data_load.dataset_registry import get_dataframe
+
+# Filtro e ordenação das colunas formatadas usam os valores brutos
+COLUNAS_ORIGEM_ATIPICAS = {
+    "Dia_formatada": "data"
+}
+
+def carregar_vendas_atipicas(data, params):
+    """Fonte da tabela 'table-vendas-atipicas': todas as vendas atípicas, com valores brutos"""
+    if data.get("df_Vendas_Atipicas") is None:
+        return None
+    df_atipicas = get_dataframe(data, "df_Vendas_Atipicas")
+    if not pd.api.types.is_datetime64_any_dtype(df_atipicas['data']):
+        df_atipicas['data'] = pd.to_datetime(df_atipicas['data'])
+    return df_atipicas
+
+def formatar_pagina_atipicas(df_page):
+    """Formata a data apenas das linhas da página exibida"""
+    df_page['Dia_formatada'] = df_page['data'].dt.strftime('%d/%m/%Y')
+    return df_page
+
+def register_vendas_atipicas_callbacks(app):
+    """
+    Registra os callbacks da página de vendas atípicas.
+
+    Args:
+        app: A instância do aplicativo Dash
+    """
+    register_server_table(
+        app, 'table-vendas-atipicas', carregar_vendas_atipicas,
+        format_page=formatar_pagina_atipicas, source_columns=COLUNAS_ORIGEM_ATIPICAS
+    )
@@ -2,9 +2,14 @@ import pandas as pd
 import psycopg2
 import dotenv
 import os
+import sys
 from datetime import datetime, timedelta
 import warnings
 
+# Raiz do repositório no path para reutilizar o cálculo de posição de estoque do dashboard
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from utils.posicao_estoque import analisar_movimentos_estoque
+
 warnings.filterwarnings('ignore')
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 dotenv.load_dotenv()
@@ -67,119 +72,29 @@ def analisar_produto_especifico(id_produto):
             
         print(f"Encontrados {len(df_movimentos)} registros de movimento.")
         
-        # Processamento dos dados
-        df_movimentos['data_movimento'] = pd.to_datetime(df_movimentos['data_movimento'])
-        
-        # Determinar período de análise
-        data_inicial = df_movimentos['data_movimento'].min()
-        data_final = df_movimentos['data_movimento'].max()
-        
-        # Limitar a análise apenas ao último ano
-        data_um_ano_atras = data_final - timedelta(days=365)
-        data_inicial_original = data_inicial
-        data_inicial = max(data_inicial, data_um_ano_atras)
-        
-        # Filtrar movimentos apenas do último ano
-        df_movimentos = df_movimentos[df_movimentos['data_movimento'] >= data_inicial]
+        # Série diária e métricas (mesmo cálculo vetorizado usado no dashboard)
+        df_evolucao_diaria, df_movimentos, metricas = analisar_movimentos_estoque(df_movimentos)
         
+        data_inicial = metricas['data_inicial']
+        data_final = metricas['data_final']
         print(f"Período de análise: {data_inicial.strftime('%d/%m/%Y')} até {data_final.strftime('%d/%m/%Y')}")
-        print(f"Nota: Análise limitada ao último ano (dados originais começam em {data_inicial_original.strftime('%d/%m/%Y')})")
-        
-        # Criar DataFrame com todas as datas no intervalo
-        todas_datas = pd.date_range(start=data_inicial, end=data_final, freq='D')
-        df_diario = pd.DataFrame({'data': todas_datas})
-        
-        # Para cada data, encontrar o estoque mais recente (último movimento até essa data)
-        estoque_diario = []
-        
-        # Obter o estoque inicial (último movimento antes do período analisado)
-        movimentos_anteriores = df_movimentos[df_movimentos['data_movimento'] < data_inicial]
-        estoque_inicial = 0
-        if len(movimentos_anteriores) > 0:
-            estoque_inicial = movimentos_anteriores.iloc[-1]['estoque_depois']
-        
-        for data in df_diario['data']:
-            # Filtrar movimentos até esta data
-            movimentos_ate_data = df_movimentos[df_movimentos['data_movimento'] <= data]
-            
-            if len(movimentos_ate_data) > 0:
-                # Último movimento
-                ultimo_movimento = movimentos_ate_data.iloc[-1]
-                estoque = ultimo_movimento['estoque_depois']
-                ultima_movimentacao = ultimo_movimento['data_movimento']
-                tipo_ultimo_movimento = ultimo_movimento['tipo']
-            else:
-                estoque = estoque_inicial
-                ultima_movimentacao = None
-                tipo_ultimo_movimento = None
-            
-            estoque_diario.append({
-                'data': data,
-                'estoque': estoque,
-                'ultima_movimentacao': ultima_movimentacao,
-                'tipo_ultimo_movimento': tipo_ultimo_movimento
-            })
-        
-        # Criar DataFrame com evolução diária
-        df_evolucao_diaria = pd.DataFrame(estoque_diario)
+        print(f"Nota: Análise limitada ao último ano (dados originais começam em {metricas['data_inicial_original'].strftime('%d/%m/%Y')})")
         
         # Calcular estatísticas
-        estoque_medio = df_evolucao_diaria['estoque'].mean()
-        estoque_mediano = df_evolucao_diaria['estoque'].median()
-        estoque_min = df_evolucao_diaria['estoque'].min()
-        estoque_max = df_evolucao_diaria['estoque'].max()
-        estoque_atual = df_evolucao_diaria['estoque'].iloc[-1]
-        desvio_padrao = df_evolucao_diaria['estoque'].std()
-        
-        # Calcular tendência (primeiros 10% vs últimos 10%)
-        n_amostras = len(df_evolucao_diaria)
-        n_amostras_10pct = max(1, int(n_amostras * 0.1))
-        
-        estoque_inicial = df_evolucao_diaria['estoque'].iloc[:n_amostras_10pct].mean()
-        estoque_final = df_evolucao_diaria['estoque'].iloc[-n_amostras_10pct:].mean()
-        
-        if estoque_inicial > 0:
-            variacao_pct = ((estoque_final - estoque_inicial) / estoque_inicial) * 100
-        else:
-            variacao_pct = float('inf') if estoque_final > 0 else 0
-            
-        # Determinar tendência
-        if variacao_pct > 10:
-            tendencia = "CRESCIMENTO"
-        elif variacao_pct < -10:
-            tendencia = "REDUÇÃO"
-        else:
-            tendencia = "ESTÁVEL"
-            
-        # Calcular dias com zero estoque
-        dias_zerados = sum(df_evolucao_diaria['estoque'] <= 0)
-        pct_dias_zerados = (dias_zerados / len(df_evolucao_diaria)) * 100
-        
-        # Adicionar média móvel para suavizar flutuações
-        df_evolucao_diaria['media_movel_7d'] = df_evolucao_diaria['estoque'].rolling(window=7, min_periods=1).mean()
-        
-        # Calcular métricas de giro e cobertura de estoque
-        # 1. Calcular total de saídas no período
-        saidas = df_movimentos[df_movimentos['tipo'] == 'S']
-        total_saidas = saidas['quantidade'].sum() if len(saidas) > 0 else 0
-        
-        # 2. Calcular média diária de saídas (demanda média diária)
-        dias_periodo = (data_final - data_inicial).days + 1
-        demanda_media_diaria = total_saidas / dias_periodo if dias_periodo > 0 else 0
-        
-        # 3. Calcular índice de giro de estoque (anualizado)
-        # Giro = (Total de saídas no período / Estoque médio) * (365 / dias no período)
-        if estoque_medio > 0:
-            giro_estoque = (total_saidas / estoque_medio) * (365 / dias_periodo)
-        else:
-            giro_estoque = float('inf') if total_saidas > 0 else 0
-        
-        # 4. Calcular cobertura de estoque (em dias)
-        # Cobertura = Estoque atual / demanda média diária
-        if demanda_media_diaria > 0:
-            cobertura_estoque = estoque_atual / demanda_media_diaria
-        else:
-            cobertura_estoque = float('inf') if estoque_atual > 0 else 0
+        estoque_medio = metricas['estoque_medio']
+        estoque_mediano = metricas['estoque_mediano']
+        estoque_min = metricas['estoque_min']
+        estoque_max = metricas['estoque_max']
+        estoque_atual = metricas['estoque_atual']
+        desvio_padrao = metricas['desvio_padrao']
+        variacao_pct = metricas['variacao_pct']
+        tendencia = metricas['tendencia']
+        dias_zerados = metricas['dias_zerados']
+        pct_dias_zerados = metricas['pct_dias_zerados']
+        total_saidas = metricas['total_saidas']
+        demanda_media_diaria = metricas['demanda_media_diaria']
+        giro_estoque = metricas['giro_estoque']
+        cobertura_estoque = metricas['cobertura_estoque']
         
         # # Visualização dos dados
         # plt.figure(figsize=(16, 10))
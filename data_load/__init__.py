@@ -7,4 +7,28 @@ from data_load.client_data import (
     validate_client_data,
     process_upload
 )
-from data_load.data_loader import load_data
\ No newline at end of file
+from data_load.memory_cache import dataframe_cache
+from data_load.dataset_registry import (
+    register_dataset,
+    preload_datasets,
+    get_dataset,
+    dataset_handle,
+    essential_errors,
+    get_dataframe,
+    get_dataframe_rows,
+    page_data
+)
+from data_load.segment_index import get_segment_index, segment_rows
+from data_load.memoize import init_memoize, memoize_dataset
+from data_load.prewarm import prewarm_client, prewarm_all_clients
+from data_load.tenant_sessions import (
+    init_tenant_sessions,
+    clear_legacy_sessions,
+    new_session_id,
+    tenant_login,
+    tenant_heartbeat,
+    tenant_logout,
+    active_sessions,
+    active_tenants
+)
+from data_load.db_pool import get_connection, configure_database, close_all_pools
@@ -2,6 +2,7 @@ import os
 import glob
 import zipfile
 import base64
+import hashlib
 from utils import CONTEXTO_PADRAO, SEGMENTOS_PADRAO
 
 def get_available_clients():
@@ -166,6 +167,29 @@ def get_file_paths(client, data_type):
         "analise_giro_path": f"{base_path}/analise_giro_completa.xlsx",
         "analise_curva_cobertura_path": f"{base_path}/analise_curva_cobertura.xlsx",
         "metricas_de_compra_path": glob.glob(f"{base_path}/metricas_de_compra.csv"),
+        "historico_estoque_path": f"{base_path}/historico_estoque.parquet",
+        "historico_estoque_metricas_path": f"{base_path}/historico_estoque_metricas.parquet",
     }
     
-    return file_paths
\ No newline at end of file
+    return file_paths
+
+def get_data_version(client, data_type):
+    """
+    Calcula a versão dos dados de um cliente e tipo específicos
+    
+    A versão é um hash curto do caminho, mtime e tamanho de cada arquivo
+    retornado por get_file_paths, então muda sempre que um arquivo é regravado.
+    """
+    file_paths = get_file_paths(client, data_type)
+    if file_paths is None:
+        return None
+    
+    digest = hashlib.sha1()
+    for file_key in sorted(file_paths):
+        paths = file_paths[file_key]
+        for path in (paths if isinstance(paths, list) else [paths]):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+    
+    return digest.hexdigest()[:12]
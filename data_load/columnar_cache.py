@@ -0,0 +1,134 @@
+import os
+import json
+import threading
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas o lock entre threads do processo
+    fcntl = None
+
+# Pasta (dentro de cada dados/<CLIENTE>/Dados_<CLIENTE>_<TIPO>) com as cópias Parquet
+CACHE_DIR_NAME = ".parquet_cache"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_LOCK_NAME = "manifest.lock"
+
+_manifest_lock = threading.Lock()
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+PARQUET_AVAILABLE = _parquet_available()
+
+def _manifest_path(cache_dir):
+    return os.path.join(cache_dir, MANIFEST_NAME)
+
+def _read_manifest(cache_dir):
+    try:
+        with open(_manifest_path(cache_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _update_manifest(cache_dir, entry_key, entry):
+    """
+    Atualiza uma entrada do manifesto com escrita atômica (arquivo temporário + replace)
+
+    A leitura, alteração e escrita do manifesto é feita com um lock de
+    arquivo (flock em manifest.lock), pois as conversões rodam em vários
+    processos (workers do gunicorn e ProcessPoolExecutor) e um lock de
+    thread não impediria que um sobrescrevesse as entradas do outro.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with _manifest_lock, open(os.path.join(cache_dir, MANIFEST_LOCK_NAME), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            manifest = _read_manifest(cache_dir)
+            manifest[entry_key] = entry
+            tmp_path = f"{_manifest_path(cache_dir)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, _manifest_path(cache_dir))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def read_cached(path, loader, variant=""):
+    """
+    Lê um arquivo de dados usando uma cópia Parquet quando ela estiver atualizada
+
+    Na primeira leitura (ou quando mtime/tamanho do arquivo original mudam) o
+    DataFrame é carregado com `loader` e gravado como Parquet; as leituras
+    seguintes vêm direto do Parquet, preservando os tipos (datas, inteiros).
+
+    Args:
+        path (str): Caminho do arquivo original (.xlsx ou .csv)
+        loader: Função sem argumentos que lê o arquivo original
+        variant (str): Identifica a forma de leitura (ex: aba da planilha)
+
+    Returns:
+        DataFrame carregado
+    """
+    if not PARQUET_AVAILABLE:
+        return loader()
+
+    stat = os.stat(path)
+    base_dir, file_name = os.path.split(path)
+    cache_dir = os.path.join(base_dir, CACHE_DIR_NAME)
+    entry_key = f"{file_name}|{variant}"
+
+    entry = _read_manifest(cache_dir).get(entry_key)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        if entry["sidecar"] is None:
+            # Conversão já falhou para esta versão do arquivo
+            return loader()
+        sidecar_path = os.path.join(cache_dir, entry["sidecar"])
+        if os.path.exists(sidecar_path):
+            try:
+                return pd.read_parquet(sidecar_path)
+            except Exception as e:
+                print(f"[PARQUET] Erro ao ler {sidecar_path}, relendo o original: {str(e)}")
+
+    df = loader()
+
+    sidecar = f"{file_name}.{variant}.parquet" if variant else f"{file_name}.parquet"
+    sidecar_path = os.path.join(cache_dir, sidecar)
+    tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        # O Parquet converteria nomes de coluna não-texto (ex: anos) em string
+        if not all(isinstance(col, str) for col in df.columns):
+            raise ValueError("nomes de coluna não-texto")
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_parquet(tmp_path, index=True)
+        os.replace(tmp_path, sidecar_path)
+        print(f"[PARQUET] Cópia colunar criada: {sidecar_path}")
+    except Exception as e:
+        # Colunas com tipos mistos não são suportadas; ler sempre o original
+        print(f"[PARQUET] Não foi possível converter {path}: {str(e)}")
+        sidecar = None
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    try:
+        _update_manifest(cache_dir, entry_key, {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sidecar": sidecar
+        })
+    except OSError as e:
+        print(f"[PARQUET] Erro ao atualizar manifesto em {cache_dir}: {str(e)}")
+
+    return df
+
+def read_excel_cached(path, sheet_name=0):
+    """Equivalente a pd.read_excel com cache colunar"""
+    return read_cached(path, lambda: pd.read_excel(path, sheet_name=sheet_name), variant=str(sheet_name))
+
+def read_csv_cached(path):
+    """Equivalente a pd.read_csv com cache colunar"""
+    return read_cached(path, lambda: pd.read_csv(path))
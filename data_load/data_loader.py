@@ -1,228 +1,342 @@
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import time
-from .client_data import (
-    get_client_context, 
-    get_client_segmentos, 
-    validate_client_data,
-    get_file_paths
-)
-
-def load_data(client, data_type, app_cache=None, cache_version="v1.0"):
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .client_data import get_file_paths, get_data_version
+from .memory_cache import dataframe_cache
+from .columnar_cache import read_cached, read_csv_cached, read_excel_cached
+from .shared_frames import dataset_dir, read_shared_frame, write_shared_frame
+
+# Arquivos de um dataset: (chave em get_file_paths, chave do DataFrame, tipo de leitura)
+FILE_SPECS = [
+    ("analytics_path", "df_analytics", "csv"),
+    ("rc_mensal_path", "df_RC_Mensal", "excel"),
+    ("rc_trimestral_path", "df_RC_Trimestral", "excel"),
+    ("rc_anual_path", "df_RC_Anual", "excel"),
+    # ("previsoes_path", "df_Previsoes", "excel"),
+    ("rt_anual_path", "df_RT_Anual", "excel"),
+    ("fat_anual_path", "df_fat_Anual", "excel"),
+    ("fat_anual_geral_path", "df_fat_Anual_Geral", "excel"),
+    ("fat_mensal_path", "df_fat_Mensal", "excel"),
+    ("fat_mensal_lojas_path", "df_fat_Mensal_lojas", "excel"),
+    ("fat_diario_path", "df_fat_Diario", "excel"),
+    ("fat_diario_lojas_path", "df_fat_Diario_lojas", "excel"),
+    ("vendas_atipicas_path", "df_Vendas_Atipicas", "excel"),
+    ("relatorio_produtos_path", "df_relatorio_produtos", "excel"),
+    ("analise_giro_path", "df_analise_giro", "excel"),
+    ("analise_curva_cobertura_path", "df_analise_curva_cobertura", "excel"),
+    ("previsao_retorno_path", "df_previsao_retorno", "previsao_retorno"),
+    ("metricas_de_compra_path", "df_metricas_compra", "csv"),
+    ("historico_estoque_path", "df_historico_estoque", "parquet"),
+    ("historico_estoque_metricas_path", "df_historico_estoque_metricas", "parquet"),
+]
+
+# DataFrames Parquet lidos por chave (get_rows), nunca inteiros: df_key -> coluna da chave
+ROW_FRAMES = {
+    "df_historico_estoque": "id_produto",
+    "df_historico_estoque_metricas": "id_produto",
+}
+
+# Lista de arquivos essenciais (sem os quais o carregamento deve falhar)
+ESSENTIAL_FILES = ["analytics_path", "rc_mensal_path", "rc_trimestral_path", "rc_anual_path"]
+
+# Leituras simultâneas padrão e tipo de pool ('thread' ou 'process')
+LOAD_DATA_WORKERS = int(os.getenv("LOAD_DATA_WORKERS", "8"))
+LOAD_DATA_EXECUTOR = os.getenv("LOAD_DATA_EXECUTOR", "thread")
+
+# Segundos até uma leitura que falhou ser tentada de novo (o arquivo pode
+# estar sendo reescrito pelo ETL)
+LAZY_RETRY_SECONDS = int(os.getenv("LAZY_RETRY_SECONDS", "30"))
+
+def _read_previsao_retorno(path):
+    excel_file = pd.ExcelFile(path)
+    sheet_names = excel_file.sheet_names
+    sheet_to_use = "Resumo_por_Cliente" if "Resumo_por_Cliente" in sheet_names else 0
+    return pd.read_excel(path, sheet_name=sheet_to_use)
+
+def _read_file(kind, path):
+    """Lê um arquivo e retorna (DataFrame, segundos gastos)"""
+    start = time.perf_counter()
+    if kind == "csv":
+        df = read_csv_cached(path)
+    elif kind == "parquet":
+        df = pd.read_parquet(path)
+    elif kind == "previsao_retorno":
+        df = read_cached(path, lambda: _read_previsao_retorno(path), variant="resumo")
+    else:
+        df = read_excel_cached(path)
+    return df, time.perf_counter() - start
+
+def process_frame(df_key, df):
+    """Aplica o processamento padrão a um DataFrame recém-carregado"""
+    if df_key == "df_RC_Mensal":
+        df['retention_rate'] = df['retention_rate'].round(2)
+    
+    elif df_key == "df_RC_Trimestral":
+        df['recurrence_rate'] = df['recurrence_rate'].round(2)
+    
+    elif df_key == "df_RC_Anual":
+        df['new_rate'] = df['new_rate'].round(2)
+        df['returning_rate'] = df['returning_rate'].round(2)
+        df['retention_rate'] = df['retention_rate'].round(2)
+    
+    return df
+
+def _parquet_key(field_type, key):
+    """Converte a chave procurada para o tipo da coluna no Parquet (None se não couber nele)"""
+    if pa.types.is_dictionary(field_type):
+        field_type = field_type.value_type
+    if pa.types.is_integer(field_type):
+        try:
+            number = float(key)
+        except (TypeError, ValueError):
+            return None
+        return int(number) if number.is_integer() else None
+    if pa.types.is_string(field_type) or pa.types.is_large_string(field_type):
+        return str(key)
+    return key
+
+def load_files(file_paths, specs, max_workers=None, executor=None, shared_dir=None):
     """
-    Carrega dados para um cliente e tipo específicos
+    Lê os arquivos de `specs` em paralelo, com tratamento individual de erros
     
     Args:
-        client (str): Nome do cliente (ex: 'BENY', 'CLIENTE2')
-        data_type (str): Tipo de dados ('PF' ou 'PJ')
-        app_cache: Instância de cache do Flask (opcional)
-        cache_version (str): Versão do cache para invalidação
+        file_paths (dict): Resultado de get_file_paths
+        specs (list): Tuplas (file_key, df_key, tipo) no formato de FILE_SPECS
+        max_workers (int): Número de leituras simultâneas (1 = sequencial)
+        executor (str): 'thread' ou 'process'
+        shared_dir (str): Diretório dos DataFrames compartilhados (ver dataset_dir)
+    
+    Returns:
+        Tupla (frames, errors, essential_errors, timings)
     """
-    print(f"[CACHE] Verificando cache para {client}_{data_type}")
-    print("Carrega dados para um cliente e tipo específicos")
-
-    # Adicionar chave de versão para invalidar cache quando necessário
-    cache_key = f"{client}_{data_type}_{cache_version}"
-
-    # Verificar se já existe em cache com esta chave específica
-    if app_cache is not None:
-        cached_data = app_cache.get(cache_key)
-        if cached_data is not None:
-            print(f"[CACHE] Encontrado no cache: {cache_key}")
-            # Verificar se os dados em cache estão válidos e não têm erro
-            if cached_data.get("error", False):
-                print(f"[CACHE] Dados com erro encontrados no cache. Recarregando...")
-            else:
-                return cached_data
-    
-    print(f"[CACHE] Cache não encontrado para {cache_key}, carregando dados...")
-    
-    # Verificar se existem os arquivos necessários
-    valid, missing_files = validate_client_data(client, data_type)
-    if not valid:
-        error_result = {
-            "error": True,
-            "message": f"Arquivos necessários ausentes para {client} - {data_type}: {', '.join(missing_files)}",
-            "titulo": f"{client} - {data_type}",
-            "company_context": get_client_context(client),
-            "segmentos_context": get_client_segmentos(client)
-        }
-        return error_result
-    
-    # Obter caminhos dos arquivos
-    file_paths = get_file_paths(client, data_type)
-    if file_paths is None:
-        error_result = {
-            "error": True,
-            "message": f"Não foram encontrados dados para {client} - {data_type}",
-            "titulo": f"{client} - {data_type}",
-            "company_context": get_client_context(client),
-            "segmentos_context": get_client_segmentos(client)
-        }
-        return error_result
-    
-    # Inicializar dicionário de resultados e erros
-    result = {
-        "df_analytics": None,
-        "df_RC_Mensal": None,
-        "df_RC_Trimestral": None,
-        "df_RC_Anual": None,
-        # "df_Previsoes": None,
-        "df_RT_Anual": None,
-        "df_fat_Anual": None,
-        "df_fat_Anual_Geral": None,
-        "df_fat_Mensal": None,
-        "df_fat_Mensal_lojas": None,
-        "df_fat_Diario": None,
-        "df_fat_Diario_lojas": None,
-        "df_Vendas_Atipicas": None,
-        "df_relatorio_produtos": None,
-        "df_previsao_retorno": None,
-        "df_analise_giro": None,
-        "df_analise_curva_cobertura": None,
-        "df_metricas_compra": None,
-        "errors": []
-    }
-    
-    # Lista de arquivos essenciais (sem os quais o carregamento deve falhar)
-    essential_files = ["analytics_path", "rc_mensal_path", "rc_trimestral_path", "rc_anual_path"]
+    max_workers = max_workers or LOAD_DATA_WORKERS
+    executor = executor or LOAD_DATA_EXECUTOR
+    
+    frames = {}
+    errors = []
     essential_errors = []
+    timings = {}
     
-    # Carregar arquivos com tratamento individual de erros
-    try:
-        if file_paths["analytics_path"]:
-            try:
-                result["df_analytics"] = pd.read_csv(file_paths["analytics_path"][0])
-            except Exception as e:
-                error_msg = f"Erro ao carregar analytics_path: {str(e)}"
+    # Resolver os caminhos; arquivos ausentes só geram erro se forem essenciais
+    tasks = []
+    for file_key, df_key, kind in specs:
+        path = file_paths.get(file_key)
+        if isinstance(path, list):
+            path = path[0] if path else None
+        if path and os.path.exists(path):
+            # Outro worker pode já ter materializado este DataFrame
+            shared_df = read_shared_frame(shared_dir, df_key) if shared_dir else None
+            if shared_df is not None:
+                frames[df_key] = shared_df
+                timings[df_key] = 0.0
+            else:
+                tasks.append((file_key, df_key, kind, path))
+        elif file_key in ESSENTIAL_FILES:
+            error_msg = f"{file_key} não encontrado"
+            essential_errors.append(error_msg)
+            errors.append(error_msg)
+    
+    def collect(file_key, df_key, read):
+        try:
+            df, timings[df_key] = read()
+            frames[df_key] = process_frame(df_key, df)
+            if shared_dir and write_shared_frame(shared_dir, df_key, frames[df_key]):
+                # Substituir pela versão mapeada, cujas páginas são compartilhadas
+                shared_df = read_shared_frame(shared_dir, df_key)
+                if shared_df is not None:
+                    frames[df_key] = shared_df
+        except Exception as e:
+            error_msg = f"Erro ao carregar {file_key}: {str(e)}"
+            errors.append(error_msg)
+            if file_key in ESSENTIAL_FILES:
                 essential_errors.append(error_msg)
-                result["errors"].append(error_msg)
+    
+    start = time.perf_counter()
+    if max_workers <= 1 or len(tasks) <= 1:
+        for file_key, df_key, kind, path in tasks:
+            collect(file_key, df_key, lambda: _read_file(kind, path))
+    else:
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=min(max_workers, len(tasks))) as pool:
+            futures = [
+                (file_key, df_key, pool.submit(_read_file, kind, path))
+                for file_key, df_key, kind, path in tasks
+            ]
+            # Coletar na ordem das specs para manter as mensagens de erro estáveis
+            for file_key, df_key, future in futures:
+                collect(file_key, df_key, future.result)
+    
+    total = time.perf_counter() - start
+    detalhes = ", ".join(f"{df_key}={segundos:.2f}s" for df_key, segundos in timings.items())
+    if shared_dir and len(frames) > len(tasks):
+        print(f"[SHARED] {len(frames) - len(tasks)} DataFrames mapeados de {shared_dir}")
+    print(f"[LOAD] {len(tasks)} arquivos em {total:.2f}s ({executor}, {max_workers} workers): {detalhes}")
+    
+    return frames, errors, essential_errors, timings
+
+class LazyDataset:
+    """
+    DataFrames de um cliente/tipo carregados sob demanda
+    
+    Cada df_* é lido (com load_files) na primeira vez em que é pedido, de modo
+    que o custo de abrir uma página é proporcional aos dados que ela usa. Os
+    DataFrames ficam no dataframe_cache do processo, com chave que inclui a
+    versão dos arquivos; se forem descartados, são relidos do cache colunar.
+    Uma leitura que falhou só é tentada de novo após LAZY_RETRY_SECONDS.
+    
+    Args:
+        client (str): Nome do cliente
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+        cache_version (str): Versão do cache para invalidação
+    """
+    def __init__(self, client, data_type, cache_version="v1.0"):
+        self.client = client
+        self.data_type = data_type
+        self.version = get_data_version(client, data_type)
+        self.shared_dir = dataset_dir(client, data_type, cache_version, self.version)
+        self.file_paths = get_file_paths(client, data_type) or {}
+        self.specs = {df_key: (file_key, df_key, kind) for file_key, df_key, kind in FILE_SPECS}
+        self._errors = {}  # df_key -> (mensagens, time.monotonic() da falha)
+        self.timings = {}  # df_key -> segundos da última leitura
+        self._locks = {df_key: threading.Lock() for df_key in self.specs}
+    
+    def cache_key(self, df_key):
+        """Chave do DataFrame no dataframe_cache"""
+        return f"{self.client}_{self.data_type}:{self.version}:{df_key}"
+    
+    def release(self):
+        """
+        Remove do dataframe_cache os itens desta versão dos arquivos
+
+        Inclui os derivados guardados com o mesmo prefixo de chave (ex: o
+        índice de segmentos). Chamado quando o ETL reescreve os arquivos e uma
+        nova versão é registrada, pois as chaves antigas não serão mais lidas.
+
+        Returns:
+            Quantidade de itens removidos
+        """
+        return dataframe_cache.delete_prefix(f"{self.client}_{self.data_type}:{self.version}:")
+    
+    def _source_path(self, df_key):
+        """Caminho do arquivo de origem do DataFrame (None se não configurado)"""
+        path = self.file_paths.get(self.specs[df_key][0])
+        if isinstance(path, list):
+            path = path[0] if path else None
+        return path or None
+
+    def _failed(self, df_key):
+        """Indica se a última leitura do DataFrame falhou há menos de LAZY_RETRY_SECONDS"""
+        failure = self._errors.get(df_key)
+        return failure is not None and time.monotonic() - failure[1] < LAZY_RETRY_SECONDS
+
+    def has(self, df_key):
+        """Indica se o DataFrame já foi carregado ou se o arquivo de origem existe"""
+        if self.cache_key(df_key) in dataframe_cache:
+            return True
+        if df_key not in self.specs or self._failed(df_key):
+            return False
+        path = self._source_path(df_key)
+        return bool(path) and os.path.exists(path)
+
+    def get_rows(self, df_key, key):
+        """
+        Lê do Parquet de um DataFrame de ROW_FRAMES apenas as linhas de uma chave
+
+        O filtro é aplicado pelo pyarrow, que só abre os row groups cujo
+        intervalo de chaves contém a procurada (os arquivos são gravados
+        ordenados pela chave). O resultado fica no dataframe_cache, com chave
+        da versão dos arquivos.
+
+        Args:
+            df_key (str): Nome do DataFrame (ex: 'df_historico_estoque')
+            key: Valor procurado, convertido para o tipo da coluna (ex: '123' para int64)
+
+        Returns:
+            DataFrame indexado pela chave (vazio se ela não existir) ou None se
+            o arquivo não estiver disponível
+        """
+        column = ROW_FRAMES[df_key]
+        cache_key = f"{self.cache_key(df_key)}:{column}={key}"
+        df = dataframe_cache.get(cache_key)
+        if df is not None:
+            return df
+
+        path = self._source_path(df_key)
+        if not path or not os.path.exists(path):
+            return None
+        schema = pq.read_schema(path)
+        value = _parquet_key(schema.field(column).type, key)
+        if value is None:
+            df = schema.empty_table().to_pandas()
         else:
-            essential_errors.append("analytics_path não disponível")
-            result["errors"].append("analytics_path não disponível")
-        # Carregar cada arquivo individualmente com tratamento de erros
-        for file_key, df_key in [
-            ("rc_mensal_path", "df_RC_Mensal"),
-            ("rc_trimestral_path", "df_RC_Trimestral"),
-            ("rc_anual_path", "df_RC_Anual"),
-            # ("previsoes_path", "df_Previsoes"),
-            ("rt_anual_path", "df_RT_Anual"),
-            ("fat_anual_path", "df_fat_Anual"),
-            ("fat_anual_geral_path", "df_fat_Anual_Geral"),
-            ("fat_mensal_path", "df_fat_Mensal"),
-            ("fat_mensal_lojas_path", "df_fat_Mensal_lojas"),
-            ("fat_diario_path", "df_fat_Diario"),
-            ("fat_diario_lojas_path", "df_fat_Diario_lojas"),
-            ("vendas_atipicas_path", "df_Vendas_Atipicas")
-        ]:
-            if os.path.exists(file_paths[file_key]):
-                try:
-                    result[df_key] = pd.read_excel(file_paths[file_key])
-                except Exception as e:
-                    error_msg = f"Erro ao carregar {file_key}: {str(e)}"
-                    result["errors"].append(error_msg)
-                    if file_key in essential_files:
-                        essential_errors.append(error_msg)
-            elif file_key in essential_files:
-                error_msg = f"{file_key} não encontrado"
-                essential_errors.append(error_msg)
-                result["errors"].append(error_msg)
+            df = pd.read_parquet(path, filters=[(column, "==", value)])
+        df = df.set_index(column)
+        dataframe_cache.set(cache_key, df, tenant=self.client)
+        return df
+    
+    def load(self, df_keys, max_workers=None, executor=None):
+        """
+        Carrega, em paralelo, os DataFrames de `df_keys` que ainda não estão em memória
         
-        # Tratamento especial para arquivos com sheet_name
-        for file_key, df_key in [
-            ("relatorio_produtos_path", "df_relatorio_produtos"),
-            ("analise_giro_path", "df_analise_giro")
-        ]:
-            if os.path.exists(file_paths[file_key]):
-                try:
-                    result[df_key] = pd.read_excel(file_paths[file_key], sheet_name=0)
-                except Exception as e:
-                    result["errors"].append(f"Erro ao carregar {file_key}: {str(e)}")
+        Returns:
+            Dict com os DataFrames lidos nesta chamada
+        """
+        def is_pending(k):
+            return not self._failed(k) and self.cache_key(k) not in dataframe_cache
         
-        # Tratamento especial para df_analise_curva_cobertura
-        if os.path.exists(file_paths.get("analise_curva_cobertura_path", "")):
-            try:
-                result["df_analise_curva_cobertura"] = pd.read_excel(file_paths["analise_curva_cobertura_path"], sheet_name=0)
-            except Exception as e:
-                result["errors"].append(f"Erro ao carregar analise_curva_cobertura: {str(e)}")
+        pending = sorted(k for k in set(df_keys) if k in self.specs and is_pending(k))
+        if not pending:
+            return {}
         
-        # Tratamento especial para df_previsao_retorno
-        if os.path.exists(file_paths.get("previsao_retorno_path", "")):
-            try:
-                excel_file = pd.ExcelFile(file_paths["previsao_retorno_path"])
-                sheet_names = excel_file.sheet_names
-                sheet_to_use = "Resumo_por_Cliente" if "Resumo_por_Cliente" in sheet_names else 0
-                result["df_previsao_retorno"] = pd.read_excel(file_paths["previsao_retorno_path"], sheet_name=sheet_to_use)
-            except Exception as e:
-                result["errors"].append(f"Erro ao carregar previsao_retorno: {str(e)}")
-
-        # Tratamento especial para df_metricas_compra
-        if file_paths["metricas_de_compra_path"]:
-            try:
-                result["df_metricas_compra"] = pd.read_csv(file_paths["metricas_de_compra_path"][0])
-            except Exception as e:
-                result["errors"].append(f"Erro ao carregar metricas_de_compra_path: {str(e)}")
-        # else:
-            # result["errors"].append("metricas_de_compra_path não disponível")
-
-
-    except Exception as e:
-        return {
-            "error": True,
-            "message": f"Erro geral ao carregar arquivos: {str(e)}",
-            "titulo": f"{client} - {data_type}",
-            "company_context": get_client_context(client),
-            "segmentos_context": get_client_segmentos(client)
-        }
-
-    # Se houver erros em arquivos essenciais, retorne erro
-    if essential_errors:
-        return {
-            "error": True,
-            "message": f"Erros em arquivos essenciais: {'; '.join(essential_errors)}",
-            "titulo": f"{client} - {data_type}",
-            "company_context": get_client_context(client),
-            "segmentos_context": get_client_segmentos(client)
-        }
-
-    titulo = f"{client} - {data_type}"
-
-    # =============================================================================
-    # Processamento dos dados
-    # =============================================================================
-    if result["df_RC_Mensal"] is not None:
-        result["df_RC_Mensal"]['retention_rate'] = result["df_RC_Mensal"]['retention_rate'].round(2)
-    
-    if result["df_RC_Trimestral"] is not None:
-        result["df_RC_Trimestral"]['recurrence_rate'] = result["df_RC_Trimestral"]['recurrence_rate'].round(2)
-    
-    if result["df_RC_Anual"] is not None:
-        result["df_RC_Anual"]['new_rate'] = result["df_RC_Anual"]['new_rate'].round(2)
-        result["df_RC_Anual"]['returning_rate'] = result["df_RC_Anual"]['returning_rate'].round(2)
-        result["df_RC_Anual"]['retention_rate'] = result["df_RC_Anual"]['retention_rate'].round(2)
-    
-    # Obter contexto específico do cliente
-    company_context = get_client_context(client)
-    segmentos_context = get_client_segmentos(client)
-
-    # Adicionar informações ao resultado
-    result["titulo"] = titulo
-    result["company_context"] = company_context
-    result["segmentos_context"] = segmentos_context
-    result["error"] = len(result["errors"]) > 0
-    
-    # Mostrar warnings para arquivos não-essenciais com erro
-    if result["errors"] and not essential_errors:
-        print(f"[AVISO] Alguns arquivos não-essenciais não puderam ser carregados: {result['errors']}")
-    
-    # Salvar no cache antes de retornar
-    if app_cache is not None and not essential_errors:
+        # Adquirir os locks em ordem fixa evita deadlock entre threads
+        locks = [self._locks[k] for k in pending]
+        for lock in locks:
+            lock.acquire()
         try:
-            # Salvar no cache do Flask com um timeout específico (15 minutos = 900 segundos)
-            app_cache.set(cache_key, result, timeout=900)
-            print(f"[CACHE] Dados salvos em cache com chave: {cache_key}")
-        except Exception as e:
-            print(f"[CACHE] Erro ao salvar no cache: {str(e)}")
+            pending = [k for k in pending if is_pending(k)]
+            if not pending:
+                return {}
+            print(f"[LAZY] Carregando {pending} para {self.client}_{self.data_type}")
+            frames, errors, _, timings = load_files(
+                self.file_paths, [self.specs[k] for k in pending],
+                max_workers=max_workers, executor=executor, shared_dir=self.shared_dir
+            )
+            self.timings.update(timings)
+            for df_key, df in frames.items():
+                dataframe_cache.set(self.cache_key(df_key), df, tenant=self.client)
+                self._errors.pop(df_key, None)
+            failed_at = time.monotonic()
+            for df_key in pending:
+                if df_key not in frames:
+                    messages = [e for e in errors if self.specs[df_key][0] in e]
+                    self._errors[df_key] = (messages, failed_at)
+                    print(f"[LAZY] Falha ao carregar {df_key}: {messages}")
+            return frames
+        finally:
+            for lock in locks:
+                lock.release()
     
-    print(f"[CACHE] Dados carregados para {client}_{data_type}")
-    return result
\ No newline at end of file
+    def essential_errors(self):
+        """
+        Carrega os DataFrames dos arquivos essenciais (ESSENTIAL_FILES)
+
+        Returns:
+            Lista com os erros de leitura deles (vazia se todos foram carregados)
+        """
+        keys = [df_key for df_key, (file_key, _, _) in self.specs.items() if file_key in ESSENTIAL_FILES]
+        self.load(keys)
+        return [message for df_key in keys if self._failed(df_key) for message in self._errors[df_key][0]]
+
+    def get(self, df_key):
+        """Retorna o DataFrame (carregando-o se necessário) ou None"""
+        df = dataframe_cache.get(self.cache_key(df_key))
+        if df is None:
+            # Um DataFrame maior que o limite do cache é devolvido sem ser guardado
+            df = self.load([df_key]).get(df_key)
+            if df is None:
+                df = dataframe_cache.get(self.cache_key(df_key))
+        return df
@@ -0,0 +1,229 @@
+import threading
+
+from data_load.client_data import get_data_version
+from data_load.data_loader import LazyDataset
+
+# DataFrames que compõem o conjunto de dados de um cliente/tipo
+DATAFRAME_NAMES = [
+    "df_analytics",
+    "df_RC_Mensal",
+    "df_RC_Trimestral",
+    "df_RC_Anual",
+    # "df_Previsoes",
+    "df_RT_Anual",
+    "df_fat_Anual",
+    "df_fat_Anual_Geral",
+    "df_fat_Mensal",
+    "df_fat_Mensal_lojas",
+    "df_fat_Diario",
+    "df_fat_Diario_lojas",
+    "df_Vendas_Atipicas",
+    "df_relatorio_produtos",
+    "df_previsao_retorno",
+    "df_analise_giro",
+    "df_analise_curva_cobertura",
+    "df_metricas_compra",
+    "df_historico_estoque",
+    "df_historico_estoque_metricas"
+]
+
+# Registro em memória (por processo): client_info -> {"version", "dataset"}
+_registry = {}
+_registry_lock = threading.Lock()
+
+def register_dataset(client, data_type):
+    """
+    Registra o dataset de um cliente/tipo e retorna o handle para o dcc.Store
+
+    Os DataFrames são lidos sob demanda (LazyDataset). As chaves do cache
+    incluem a versão dos arquivos (get_data_version), então os itens não
+    expiram por tempo; quando uma nova versão é registrada, os itens da
+    versão anterior são removidos do dataframe_cache.
+
+    O handle contém apenas o cliente, o tipo, a versão dos arquivos e, para cada
+    DataFrame disponível, uma referência curta (None quando indisponível), de modo
+    que as verificações `data.get("df_...") is None` continuam válidas.
+
+    Args:
+        client (str): Nome do cliente
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+    """
+    client_info = f"{client}_{data_type}"
+    dataset = LazyDataset(client, data_type)
+    version = dataset.version
+
+    with _registry_lock:
+        previous = _registry.get(client_info)
+        _registry[client_info] = {"version": version, "dataset": dataset}
+
+    print(f"[REGISTRY] Dataset registrado: {client_info} (versão {version})")
+    if previous is not None and previous["version"] != version:
+        removed = previous["dataset"].release()
+        print(f"[REGISTRY] Versão anterior de {client_info} removida da memória ({removed} itens)")
+    return _build_handle(client, data_type, dataset)
+
+def _build_handle(client, data_type, dataset):
+    client_info = f"{client}_{data_type}"
+    handle = {
+        "client_info": client_info,
+        "client": client,
+        "data_type": data_type,
+        "version": dataset.version,
+        "error": False,
+    }
+    for df_name in DATAFRAME_NAMES:
+        handle[df_name] = f"{client_info}:{dataset.version}:{df_name}" if dataset.has(df_name) else None
+    return handle
+
+def dataset_handle(client, data_type):
+    """
+    Handle do dataset atual de um cliente/tipo, sem registrá-lo de novo se já existir
+
+    Usado fora dos callbacks (ex: rotas de exportação), onde não há dcc.Store.
+
+    Args:
+        client (str): Nome do cliente
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+    """
+    return _build_handle(client, data_type, get_dataset(client, data_type))
+
+def page_data(data, df_names):
+    """
+    Recorta o handle para os DataFrames que uma página usa
+
+    É o que os layouts devem guardar nos seus próprios dcc.Store: o handle
+    recortado ocupa poucos bytes e continua aceito por get_dataframe. O
+    'selected-data' da aplicação não deve ser repetido dentro das páginas.
+
+    Args:
+        data (dict): Handle retornado por register_dataset
+        df_names (list): Nomes dos DataFrames da página (ex: ['df_metricas_compra'])
+
+    Returns:
+        Handle apenas com a identificação do dataset e as referências pedidas,
+        ou None se o handle for inválido
+    """
+    if not data or "client_info" not in data:
+        return None
+
+    handle = {key: data.get(key) for key in ("client_info", "client", "data_type", "version", "error")}
+    for df_name in df_names:
+        handle[df_name] = data.get(df_name)
+    return handle
+
+def _resolve_dataset(data):
+    """Retorna o LazyDataset de um handle, registrando-o se este processo não o tiver"""
+    client = data.get("client")
+    data_type = data.get("data_type")
+    if not client or not data_type:
+        return None
+
+    return get_dataset(client, data_type)
+
+def get_dataset(client, data_type):
+    """
+    Retorna o LazyDataset atual de um cliente/tipo neste processo
+
+    Registra o dataset se ele ainda não existir ou se os arquivos mudaram.
+
+    Args:
+        client (str): Nome do cliente
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+    """
+    client_info = f"{client}_{data_type}"
+    entry = _registry.get(client_info)
+    if entry is None:
+        # Outro worker registrou o dataset; aqui só os arquivos pedidos serão lidos
+        print(f"[REGISTRY] {client_info} ausente neste processo, registrando...")
+        register_dataset(client, data_type)
+        entry = _registry.get(client_info)
+    elif entry["version"] != get_data_version(client, data_type):
+        # O ETL reescreveu algum arquivo: passar a ler a nova versão
+        print(f"[REGISTRY] Arquivos de {client_info} alterados, registrando nova versão...")
+        register_dataset(client, data_type)
+        entry = _registry.get(client_info)
+
+    return entry["dataset"]
+
+def preload_datasets(data, df_names):
+    """
+    Carrega em paralelo os DataFrames que uma página vai usar
+
+    Args:
+        data (dict): Handle retornado por register_dataset
+        df_names (list): Nomes dos DataFrames (ex: ['df_fat_Anual', 'df_fat_Mensal'])
+    """
+    if not data or data.get("error") or not df_names:
+        return
+
+    dataset = _resolve_dataset(data)
+    if dataset is not None:
+        dataset.load([df_name for df_name in df_names if data.get(df_name) is not None])
+
+def essential_errors(data):
+    """
+    Carrega os DataFrames essenciais de um dataset e retorna os erros de leitura
+
+    Os demais DataFrames continuam sendo lidos sob demanda; sem os
+    essenciais, o carregamento do cliente deve falhar (ver load_data_callback).
+
+    Args:
+        data (dict): Handle retornado por register_dataset
+
+    Returns:
+        Lista de mensagens de erro (vazia se os essenciais foram carregados)
+    """
+    dataset = _resolve_dataset(data)
+    if dataset is None:
+        return [f"Dataset {data.get('client_info')} não registrado"]
+    return dataset.essential_errors()
+
+def get_dataframe(data, df_name):
+    """
+    Resolve um DataFrame a partir do handle armazenado no dcc.Store
+
+    Args:
+        data (dict): Handle retornado por register_dataset
+        df_name (str): Nome do DataFrame (ex: 'df_analytics')
+
+    Returns:
+        Uma cópia rasa do DataFrame compartilhado, ou None. Não copia os dados
+        (os buffers do Arrow mapeados em memória continuam compartilhados):
+        com o Copy-on-Write do pandas, alterar colunas ou valores da cópia só
+        copia o que foi alterado e não afeta o DataFrame em cache.
+    """
+    if not data or data.get(df_name) is None:
+        return None
+
+    dataset = _resolve_dataset(data)
+    if dataset is None:
+        return None
+
+    df = dataset.get(df_name)
+    return df.copy(deep=False) if df is not None else None
+
+def get_dataframe_rows(data, df_name, key):
+    """
+    Retorna as linhas de um DataFrame lido por chave (ex: por id_produto)
+
+    Ao contrário de get_dataframe, o DataFrame não é carregado inteiro: só as
+    linhas da chave são lidas do Parquet (ver LazyDataset.get_rows).
+
+    Args:
+        data (dict): Handle retornado por register_dataset
+        df_name (str): Nome do DataFrame, de ROW_FRAMES (ex: 'df_historico_estoque')
+        key: Valor da chave procurada
+
+    Returns:
+        DataFrame com as linhas, indexado pela chave (vazio se ela não
+        existir), ou None se o DataFrame não estiver disponível
+    """
+    if not data or data.get(df_name) is None:
+        return None
+
+    dataset = _resolve_dataset(data)
+    if dataset is None:
+        return None
+
+    df = dataset.get_rows(df_name, key)
+    return df.copy(deep=False) if df is not None else None
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import dotenv
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+dotenv.load_dotenv()
+
+# Tamanho dos pools por banco (o Procfile usa --threads 20 por worker)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+
+# Tempo máximo de cada consulta no servidor (ms) e de conexão (s)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+# Conexões ociosas há mais tempo que isso são testadas (SELECT 1) antes do uso
+DB_HEALTHCHECK_IDLE_SECONDS = int(os.getenv("DB_HEALTHCHECK_IDLE_SECONDS", "30"))
+
+_pools = {}
+_pool_config = {}
+_last_used = {}
+_pools_lock = threading.Lock()
+
+def _connection_params(database):
+    """Parâmetros de conexão de um banco (variáveis de ambiente + configure_database)"""
+    params = {
+        "host": os.getenv("DB_HOST"),
+        "port": os.getenv("DB_PORT", 5432),
+        "user": os.getenv("DB_USER", "adduser"),
+        "password": os.getenv("DB_PASS"),
+        "dbname": database,
+        "connect_timeout": DB_CONNECT_TIMEOUT,
+        "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+    }
+    params.update(_pool_config.get(database, {}))
+    return params
+
+def configure_database(database, **params):
+    """
+    Sobrescreve os parâmetros de conexão de um banco
+
+    Útil para apontar um banco para outro servidor (ex: um PostgreSQL local em
+    testes). Deve ser chamado antes do primeiro uso; um pool já criado para o
+    banco é fechado.
+
+    Args:
+        database (str): Nome do banco (ex: 'security', 'add')
+        **params: Argumentos aceitos por psycopg2.connect (host, port, user, ...)
+    """
+    with _pools_lock:
+        _pool_config[database] = params
+        existing = _pools.pop(database, None)
+    if existing is not None:
+        existing.closeall()
+
+def _get_pool(database):
+    pool = _pools.get(database)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = pg_pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **_connection_params(database))
+            _pools[database] = pool
+            print(f"[DB] Pool criado para '{database}' ({DB_POOL_MIN}-{DB_POOL_MAX} conexões)")
+        return pool
+
+def _is_healthy(conn):
+    """Verifica se a conexão continua utilizável"""
+    if conn.closed:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_HEALTHCHECK_IDLE_SECONDS:
+        # Conexão recém-criada ou usada há pouco
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def _release(pool, conn, discard=False):
+    if discard:
+        _last_used.pop(id(conn), None)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+    try:
+        pool.putconn(conn, close=discard)
+    except pg_pool.PoolError as e:
+        print(f"[DB] Erro ao devolver conexão ao pool: {str(e)}")
+
+@contextmanager
+def get_connection(database):
+    """
+    Empresta uma conexão do pool do banco e a devolve ao final do bloco
+
+    A transação é desfeita ao sair (as consultas de request são de leitura);
+    use conn.commit() dentro do bloco para gravar. Conexões quebradas são
+    descartadas e substituídas.
+
+    Exemplo:
+        with get_connection("security") as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+
+    Args:
+        database (str): Nome do banco (ex: 'security', 'add')
+    """
+    pool = _get_pool(database)
+
+    # Descartar conexões que o servidor fechou enquanto estavam ociosas
+    conn = pool.getconn()
+    for _ in range(DB_POOL_MAX):
+        if _is_healthy(conn):
+            break
+        print(f"[DB] Conexão inválida descartada ('{database}')")
+        _release(pool, conn, discard=True)
+        conn = pool.getconn()
+
+    discard = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        discard = True
+        raise
+    finally:
+        if not discard and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        _release(pool, conn, discard=discard or bool(conn.closed))
+
+def close_all_pools():
+    """Fecha todas as conexões de todos os pools (ex: ao encerrar o worker)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
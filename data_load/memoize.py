@@ -0,0 +1,73 @@
+import functools
+import hashlib
+import pickle
+
+from data_load.client_data import get_data_version
+
+# Instância do diskcache (setup_diskcache) usada pelos resultados memorizados
+_memo_cache = None
+
+# Tempo de vida das entradas; versões antigas dos dados deixam de ser lidas e expiram
+MEMO_EXPIRE = 24 * 60 * 60
+
+_MISSING = object()
+
+def init_memoize(cache):
+    """
+    Configura o cache usado por memoize_dataset
+
+    Args:
+        cache: Instância do diskcache retornada por setup_diskcache
+    """
+    global _memo_cache
+    _memo_cache = cache
+
+def memoize_dataset(func):
+    """
+    Memoriza cálculos derivados de um dataset de cliente
+
+    A função decorada recebe como primeiro argumento o handle do dcc.Store
+    ('selected-data'); a chave combina cliente/tipo, versão dos arquivos,
+    nome da função e os demais argumentos. Quando o ETL reescreve os arquivos
+    a versão muda e o cálculo é refeito. As entradas recebem a tag do
+    cliente/tipo (cache.evict(tag) remove as de um cliente) e expiram após
+    MEMO_EXPIRE segundos.
+
+    Exemplo:
+        @memoize_dataset
+        def resumo_categorias(data):
+            df = get_dataframe(data, "df_analise_curva_cobertura")
+            return df.groupby('Categoria')['valor_vendas_ultimos_90_dias'].sum()
+    """
+    func_name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(data, *args, **kwargs):
+        if _memo_cache is None or not data or not data.get("client"):
+            return func(data, *args, **kwargs)
+
+        client_info = data.get("client_info") or f"{data['client']}_{data.get('data_type')}"
+        version = get_data_version(data["client"], data.get("data_type"))
+        try:
+            args_hash = hashlib.sha1(pickle.dumps((args, sorted(kwargs.items())))).hexdigest()[:16]
+        except Exception:
+            # Argumentos que não podem ser serializados: calcular sem memorizar
+            return func(data, *args, **kwargs)
+        key = f"memo:{client_info}:{version}:{func_name}:{args_hash}"
+
+        try:
+            result = _memo_cache.get(key, default=_MISSING)
+        except Exception as e:
+            print(f"[MEMO] Erro ao ler {key}: {str(e)}")
+            result = _MISSING
+        if result is not _MISSING:
+            return result
+
+        result = func(data, *args, **kwargs)
+        try:
+            _memo_cache.set(key, result, expire=MEMO_EXPIRE, tag=client_info)
+        except Exception as e:
+            print(f"[MEMO] Erro ao salvar {key}: {str(e)}")
+        return result
+
+    return wrapper
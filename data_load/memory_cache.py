@@ -0,0 +1,172 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Limite de memória (por processo) para DataFrames já carregados
+DATAFRAME_CACHE_MB = int(os.getenv("DATAFRAME_CACHE_MB", "512"))
+
+def estimate_size(value):
+    """
+    Estima, em bytes, a memória ocupada por um DataFrame ou por um dict de DataFrames
+
+    Args:
+        value: DataFrame, Series, array ou dict de DataFrames
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    return 0
+
+class DataFrameLRU:
+    """
+    Cache LRU em memória, seguro entre threads e limitado pelo tamanho dos DataFrames
+
+    Todas as threads de um worker do gunicorn compartilham a mesma cópia já
+    carregada, sem desserializar o cache em disco a cada acesso. Cada item
+    pode pertencer a uma empresa (tenant); um índice por empresa permite
+    removê-los sem percorrer o cache. Quando o limite é excedido, são
+    descartados primeiro os itens usados há mais tempo de empresas sem
+    sessão ativa (ver set_pinned_tenants).
+
+    Args:
+        max_bytes (int): Memória máxima ocupada pelos itens
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()  # key -> (valor, bytes, tenant)
+        self._tenant_keys = {}       # tenant -> set de keys
+        self._lock = threading.Lock()
+        self._pinned_tenants = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def set_pinned_tenants(self, pinned_tenants):
+        """
+        Define a função que lista as empresas cujos itens devem ser preservados
+
+        A função é chamada uma vez antes de cada remoção, fora do lock do
+        cache (ela pode ler o diskcache).
+
+        Args:
+            pinned_tenants: Função () -> set de tenants, ex: active_tenants
+        """
+        self._pinned_tenants = pinned_tenants
+
+    def _pinned_snapshot(self):
+        """Empresas a preservar na próxima remoção (conjunto vazio se indisponível)"""
+        if self._pinned_tenants is None:
+            return frozenset()
+        try:
+            return frozenset(self._pinned_tenants())
+        except Exception:
+            return frozenset()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, tenant=None):
+        """Guarda um valor; retorna False se ele sozinho exceder o limite"""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            print(f"[LRU] {key} ({size / 1e6:.1f} MB) excede o limite de {self.max_bytes / 1e6:.0f} MB")
+            return False
+
+        # Consultar as sessões ativas antes de adquirir o lock, e só se a
+        # inserção puder exigir remoções (leitura sem lock, apenas uma estimativa)
+        pinned = None
+        if self.current_bytes + size > self.max_bytes:
+            pinned = self._pinned_snapshot()
+
+        with self._lock:
+            self._pop(key)
+            self._items[key] = (value, size, tenant)
+            self.current_bytes += size
+            if tenant is not None:
+                self._tenant_keys.setdefault(tenant, set()).add(key)
+
+            if self.current_bytes > self.max_bytes:
+                self._evict(pinned or frozenset())
+        return True
+
+    def _pop(self, key):
+        """Remove um item (com o lock já adquirido)"""
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+        self.current_bytes -= item[1]
+        tenant = item[2]
+        if tenant is not None:
+            keys = self._tenant_keys.get(tenant)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tenant_keys[tenant]
+        return item
+
+    def _evict(self, pinned):
+        """
+        Libera espaço (com o lock já adquirido), preservando enquanto possível as empresas com sessão ativa
+
+        Args:
+            pinned: Conjunto de empresas a preservar (ver _pinned_snapshot)
+        """
+        while self.current_bytes > self.max_bytes and self._items:
+            evicted_key = next((key for key, item in self._items.items() if item[2] not in pinned), None)
+            if evicted_key is None:
+                # Todas as empresas em memória têm sessão ativa: voltar ao LRU puro
+                evicted_key = next(iter(self._items))
+            evicted_size = self._pop(evicted_key)[1]
+            print(f"[LRU] Removido {evicted_key} ({evicted_size / 1e6:.1f} MB)")
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def delete_prefix(self, prefix):
+        """Remove os itens cuja chave começa com `prefix`; retorna quantos foram removidos"""
+        with self._lock:
+            keys = [key for key in self._items if isinstance(key, str) and key.startswith(prefix)]
+            for key in keys:
+                self._pop(key)
+        return len(keys)
+
+    def delete_tenant(self, tenant):
+        """Remove todos os itens de uma empresa; retorna quantos foram removidos"""
+        with self._lock:
+            keys = list(self._tenant_keys.get(tenant, ()))
+            for key in keys:
+                self._pop(key)
+        return len(keys)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "tenants": len(self._tenant_keys),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+# Instância compartilhada pelo processo
+dataframe_cache = DataFrameLRU(DATAFRAME_CACHE_MB * 1024 * 1024)
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_load.client_data import (
+    get_available_clients,
+    get_available_data_types,
+    validate_client_data
+)
+from data_load.data_loader import ROW_FRAMES
+from data_load.dataset_registry import DATAFRAME_NAMES, get_dataset
+
+# Carregamentos simultâneos em segundo plano (cada um já lê seus arquivos em paralelo)
+PREWARM_WORKERS = int(os.getenv("PREWARM_WORKERS", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix="prewarm")
+_pending = set()
+_pending_lock = threading.Lock()
+
+def prewarm_dataset(client, data_type):
+    """
+    Carrega os DataFrames de um cliente/tipo no registro deste processo
+
+    Além da memória do processo, a leitura deixa prontos os caches colunares
+    (Parquet) e, se ativados, os arquivos compartilhados entre workers.
+
+    Args:
+        client (str): Nome do cliente
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+    """
+    client_info = f"{client}_{data_type}"
+    try:
+        valid, missing_files = validate_client_data(client, data_type)
+        if not valid:
+            print(f"[PREWARM] {client_info} ignorado, arquivos ausentes: {missing_files}")
+            return
+
+        start = time.perf_counter()
+        dataset = get_dataset(client, data_type)
+        # Os DataFrames lidos por chave (ROW_FRAMES) não são carregados inteiros
+        dataset.load([df_name for df_name in DATAFRAME_NAMES if df_name not in ROW_FRAMES and dataset.has(df_name)])
+        print(f"[PREWARM] {client_info} pronto em {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"[PREWARM] Erro ao pré-carregar {client_info}: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending.discard(client_info)
+
+def prewarm_client(client):
+    """
+    Agenda em segundo plano o pré-carregamento dos tipos de dados (PF/PJ) de um cliente
+
+    Retorna imediatamente; pedidos repetidos enquanto um carregamento está na
+    fila são ignorados.
+
+    Args:
+        client (str): Nome do cliente (ex: session['cliente'])
+    """
+    if not client:
+        return
+
+    for data_type in get_available_data_types(client):
+        client_info = f"{client}_{data_type}"
+        with _pending_lock:
+            if client_info in _pending:
+                continue
+            _pending.add(client_info)
+        print(f"[PREWARM] Agendado: {client_info}")
+        _executor.submit(prewarm_dataset, client, data_type)
+
+def prewarm_all_clients():
+    """Agenda o pré-carregamento de todos os clientes em dados/"""
+    for client in get_available_clients():
+        prewarm_client(client)
@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.formatters import formatar_moeda_serie
+from data_load.memory_cache import dataframe_cache
+from data_load.dataset_registry import get_dataset
+
+# Colunas exibidas na lista de clientes do segmento
+SEGMENT_COLUMNS = ["id_cliente", "nome", "Recency", "Frequency", "Monetary", "Age", "cpf", "cnpj", "email", "telefone"]
+
+_build_lock = threading.Lock()
+
+def build_segment_index(df_analytics):
+    """
+    Monta o índice de segmentos de um df_analytics
+
+    O índice guarda as colunas de exibição (com o valor monetário já formatado
+    em 'Monetary_fmt'), as posições das linhas de cada segmento e os totais de
+    cada segmento, de modo que a lista de clientes de um segmento seja uma
+    fatia por posição, sem filtrar nem formatar o DataFrame inteiro.
+
+    Args:
+        df_analytics (DataFrame): Clientes com a coluna 'Segmento'
+
+    Returns:
+        Dicionário com 'display' (DataFrame), 'positions' (segmento -> array de
+        posições) e 'summary' (segmento -> clientes, valor monetário médio e
+        frequência média), incluindo o segmento 'Todos'
+    """
+    columns = [col for col in SEGMENT_COLUMNS if col in df_analytics.columns]
+    display = df_analytics[columns].reset_index(drop=True)
+    if 'Monetary' in display.columns:
+        display['Monetary_fmt'] = formatar_moeda_serie(display['Monetary'])
+
+    # Posições (não rótulos) das linhas de cada segmento
+    grouped = display.groupby(df_analytics['Segmento'].to_numpy(), sort=False)
+    positions = {segmento: np.asarray(posicoes, dtype=np.int64) for segmento, posicoes in grouped.indices.items()}
+    positions["Todos"] = np.arange(len(display), dtype=np.int64)
+
+    # Totais por segmento para o resumo acima da tabela
+    monetary = grouped['Monetary'].mean() if 'Monetary' in display.columns else pd.Series(dtype=float)
+    frequency = grouped['Frequency'].mean() if 'Frequency' in display.columns else pd.Series(dtype=float)
+    summary = {
+        segmento: {
+            "clientes": len(posicoes),
+            "monetary_medio": float(monetary.get(segmento, np.nan)),
+            "frequencia_media": float(frequency.get(segmento, np.nan))
+        }
+        for segmento, posicoes in positions.items() if segmento != "Todos"
+    }
+    summary["Todos"] = {
+        "clientes": len(display),
+        "monetary_medio": float(display['Monetary'].mean()) if 'Monetary' in display.columns else np.nan,
+        "frequencia_media": float(display['Frequency'].mean()) if 'Frequency' in display.columns else np.nan
+    }
+
+    return {"display": display, "positions": positions, "summary": summary}
+
+def get_segment_index(data):
+    """
+    Retorna o índice de segmentos do dataset de um handle, montando-o uma vez por versão
+
+    O índice fica no dataframe_cache do processo, com a versão dos arquivos na
+    chave; a página de segmentação o monta ao ser aberta.
+
+    Args:
+        data (dict): Handle do dcc.Store 'selected-data'
+
+    Returns:
+        Índice de build_segment_index ou None se df_analytics não estiver disponível
+    """
+    if not data or data.get("df_analytics") is None or not data.get("client"):
+        return None
+
+    dataset = get_dataset(data["client"], data.get("data_type"))
+    key = f"{data['client']}_{data.get('data_type')}:{dataset.version}:segment_index"
+
+    index = dataframe_cache.get(key)
+    if index is not None:
+        return index
+
+    with _build_lock:
+        index = dataframe_cache.get(key)
+        if index is None:
+            df_analytics = dataset.get("df_analytics")
+            if df_analytics is None or 'Segmento' not in df_analytics.columns:
+                return None
+            index = build_segment_index(df_analytics)
+            dataframe_cache.set(key, index, tenant=data["client"])
+            print(f"[SEGMENTOS] Índice montado para {key} ({len(index['positions']) - 1} segmentos)")
+    return index
+
+def segment_rows(index, segmento):
+    """
+    Linhas de exibição de um segmento ('Todos' retorna todos os clientes)
+
+    Args:
+        index (dict): Resultado de get_segment_index
+        segmento (str): Nome do segmento
+
+    Returns:
+        DataFrame (vazio se o segmento não existir)
+    """
+    positions = index["positions"].get(segmento)
+    if positions is None:
+        return index["display"].iloc[0:0]
+    if segmento == "Todos":
+        return index["display"]
+    return index["display"].iloc[positions]
@@ -0,0 +1,111 @@
+import os
+import shutil
+import threading
+import pandas as pd
+
+from .cache_config import CACHE_DIR
+
+# Ativa a materialização dos DataFrames em arquivos Arrow mapeados em memória,
+# compartilhados por todos os workers do gunicorn
+SHARED_FRAMES_ENABLED = os.getenv("SHARED_FRAMES", "0") == "1"
+SHARED_FRAMES_DIR = os.path.join(CACHE_DIR, "arrow")
+
+_dir_lock = threading.Lock()
+
+def _arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+ARROW_AVAILABLE = _arrow_available()
+
+def dataset_dir(client, data_type, cache_version, data_version):
+    """
+    Retorna o diretório com os arquivos Arrow de um dataset (ou None se desativado)
+
+    Ao criar o diretório de uma nova versão, as versões anteriores do mesmo
+    cliente/tipo são removidas (workers que ainda as mapeiam não são afetados).
+
+    Args:
+        client (str): Nome do cliente
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+        cache_version (str): Versão do cache usada pelo LazyDataset
+        data_version (str): Versão dos arquivos (get_data_version)
+    """
+    if not SHARED_FRAMES_ENABLED or not ARROW_AVAILABLE or not data_version:
+        return None
+
+    base_dir = os.path.join(SHARED_FRAMES_DIR, cache_version, f"{client}_{data_type}")
+    path = os.path.join(base_dir, data_version)
+    if os.path.isdir(path):
+        return path
+
+    with _dir_lock:
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(base_dir):
+            if name != data_version:
+                shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+                print(f"[SHARED] Versão antiga removida: {client}_{data_type}/{name}")
+    return path
+
+def read_shared_frame(shared_dir, df_key):
+    """
+    Mapeia em memória o DataFrame materializado em `shared_dir`
+
+    As colunas numéricas sem nulos apontam diretamente para as páginas do
+    arquivo, que o sistema operacional compartilha entre os processos.
+
+    Returns:
+        DataFrame ou None se o arquivo não existir
+    """
+    import pyarrow as pa
+
+    path = os.path.join(shared_dir, f"{df_key}.arrow")
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(split_blocks=True)
+    except Exception as e:
+        print(f"[SHARED] Erro ao mapear {path}: {str(e)}")
+        return None
+
+def write_shared_frame(shared_dir, df_key, df):
+    """
+    Grava o DataFrame como Arrow IPC sem compressão (escrita atômica)
+
+    Returns:
+        True se o arquivo foi gravado
+    """
+    import pyarrow as pa
+
+    path = os.path.join(shared_dir, f"{df_key}.arrow")
+    skip_path = os.path.join(shared_dir, f"{df_key}.skip")
+    if os.path.exists(skip_path):
+        # Conversão já falhou para esta versão dos arquivos
+        return False
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        # O Arrow converteria nomes de coluna não-texto (ex: anos) em string
+        if not all(isinstance(col, str) for col in df.columns):
+            raise ValueError("nomes de coluna não-texto")
+        table = pa.Table.from_pandas(df)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"[SHARED] Não foi possível materializar {df_key}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            open(skip_path, 'w').close()
+        except OSError:
+            pass
+        return False
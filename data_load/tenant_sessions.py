@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import uuid
+
+from data_load.memory_cache import dataframe_cache
+
+# Sessões ativas por empresa, no diskcache (compartilhado entre os workers do
+# gunicorn): {empresa: {id da sessão: instante em que expira}}. Cada sessão
+# expira se ficar TENANT_SESSION_TTL segundos sem requisições, de modo que
+# sessões encerradas sem logout (ou perdidas num restart) deixam de contar.
+TENANT_SESSION_TTL = int(os.getenv("TENANT_SESSION_TTL", "1800"))
+
+# Intervalo mínimo entre renovações da mesma sessão (evita uma escrita no
+# diskcache a cada requisição do Dash)
+TENANT_HEARTBEAT_INTERVAL = TENANT_SESSION_TTL / 4
+
+SESSIONS_KEY = "tenant_sessions"
+_LEGACY_PREFIX = "tenant_sessions:"
+
+_sessions_cache = None
+_last_heartbeat = {}  # (empresa, sessão) -> time.monotonic() da última renovação neste processo
+_last_prune = 0.0
+_heartbeat_lock = threading.Lock()
+
+def init_tenant_sessions(cache):
+    """
+    Configura o registro de sessões e o conecta à política de remoção do dataframe_cache
+
+    Chamado por todos os workers ao importar a aplicação: o registro é
+    compartilhado e não é apagado aqui (um worker reiniciado descartaria as
+    sessões ativas dos demais). Sessões de antes do início do processo deixam
+    de contar sozinhas quando expiram.
+
+    Args:
+        cache: Instância do diskcache retornada por setup_diskcache
+    """
+    global _sessions_cache
+    _sessions_cache = cache
+    dataframe_cache.set_pinned_tenants(active_tenants)
+
+def clear_legacy_sessions(cache):
+    """
+    Remove os contadores de sessão da versão anterior, que nunca expiravam
+
+    Percorre todas as chaves do diskcache; deve rodar uma única vez, antes
+    dos workers (hook on_starting do gunicorn.conf.py).
+
+    Args:
+        cache: Instância do diskcache retornada por setup_diskcache
+
+    Returns:
+        Quantidade de chaves removidas
+    """
+    removed = 0
+    try:
+        for key in list(cache.iterkeys()):
+            if isinstance(key, str) and key.startswith(_LEGACY_PREFIX):
+                cache.delete(key)
+                removed += 1
+    except Exception as e:
+        print(f"[SESSOES] Erro ao limpar contadores de sessão antigos: {str(e)}")
+    return removed
+
+def new_session_id():
+    """Identificador de uma sessão de usuário (guardado em session['sessao_id'])"""
+    return uuid.uuid4().hex
+
+def _update(client, session_id, expires_at):
+    """Grava (ou remove, com expires_at=None) a sessão e descarta as expiradas"""
+    now = time.time()
+    with _sessions_cache.transact():
+        sessions = _sessions_cache.get(SESSIONS_KEY, default={})
+        tenant = {sid: exp for sid, exp in sessions.get(client, {}).items() if exp > now}
+        if expires_at is None:
+            tenant.pop(session_id, None)
+        else:
+            tenant[session_id] = expires_at
+        if tenant:
+            sessions[client] = tenant
+        else:
+            sessions.pop(client, None)
+        _sessions_cache.set(SESSIONS_KEY, sessions)
+    return len(tenant)
+
+def tenant_login(client, session_id):
+    """Registra uma sessão ativa da empresa; retorna o total de sessões"""
+    if _sessions_cache is None or not client or not session_id:
+        return 0
+    with _heartbeat_lock:
+        _last_heartbeat[(client, session_id)] = time.monotonic()
+    return _update(client, session_id, time.time() + TENANT_SESSION_TTL)
+
+def tenant_heartbeat(client, session_id):
+    """
+    Renova a expiração de uma sessão (chamado a cada requisição autenticada)
+
+    No máximo uma escrita no diskcache a cada TENANT_HEARTBEAT_INTERVAL
+    segundos por sessão e processo.
+    """
+    if _sessions_cache is None or not client or not session_id:
+        return
+    now = time.monotonic()
+    with _heartbeat_lock:
+        _prune_heartbeats(now)
+        last = _last_heartbeat.get((client, session_id))
+        if last is not None and now - last < TENANT_HEARTBEAT_INTERVAL:
+            return
+        _last_heartbeat[(client, session_id)] = now
+    try:
+        _update(client, session_id, time.time() + TENANT_SESSION_TTL)
+    except Exception as e:
+        print(f"[SESSOES] Erro ao renovar sessão de {client}: {str(e)}")
+
+def _prune_heartbeats(now):
+    """
+    Descarta as renovações de sessões que este processo não vê há mais de
+    TENANT_SESSION_TTL segundos (já expiradas, ou renovadas por outro worker)
+
+    Roda no máximo uma vez a cada TENANT_HEARTBEAT_INTERVAL; chamar com _heartbeat_lock.
+    """
+    global _last_prune
+    if now - _last_prune < TENANT_HEARTBEAT_INTERVAL:
+        return
+    _last_prune = now
+    for key in [key for key, last in _last_heartbeat.items() if now - last >= TENANT_SESSION_TTL]:
+        del _last_heartbeat[key]
+
+def tenant_logout(client, session_id):
+    """
+    Encerra uma sessão da empresa, sem apagar nenhum dado em cache
+
+    Os DataFrames da empresa continuam em memória (outros usuários dela podem
+    estar logados) e só passam a ser candidatos à remoção quando ela não tem
+    mais sessões ativas e o dataframe_cache precisa de espaço.
+    """
+    if _sessions_cache is None or not client or not session_id:
+        return 0
+    with _heartbeat_lock:
+        _last_heartbeat.pop((client, session_id), None)
+    return _update(client, session_id, None)
+
+def active_tenants():
+    """Empresas com alguma sessão não expirada (uma leitura do diskcache)"""
+    if _sessions_cache is None:
+        return set()
+    now = time.time()
+    sessions = _sessions_cache.get(SESSIONS_KEY, default={})
+    return {client for client, tenant in sessions.items() if any(exp > now for exp in tenant.values())}
+
+def active_sessions(client):
+    """Número de sessões não expiradas da empresa"""
+    if _sessions_cache is None or not client:
+        return 0
+    now = time.time()
+    tenant = _sessions_cache.get(SESSIONS_KEY, default={}).get(client, {})
+    return sum(1 for exp in tenant.values() if exp > now)
+
+def is_tenant_active(client):
+    """Indica se há alguma sessão ativa da empresa"""
+    return active_sessions(client) > 0
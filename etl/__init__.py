@@ -0,0 +1,3 @@
+# Pipeline de geração dos arquivos de dados dos clientes (ver etl/__main__.py para a linha de comando)
+from etl.config import TENANTS, get_tenant_config
+from etl.pipeline import ETAPAS, executar_pipeline
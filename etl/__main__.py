@@ -0,0 +1,57 @@
+"""
+Linha de comando do pipeline
+
+Exemplos:
+    python -m etl ADD
+    python -m etl BIBI BDXP --etapas faturamento metricas_recorrencia
+    python -m etl --todos
+    python -m etl BDXP --etapas analise_curva_cobertura --data-corte 2024-04-01
+    python -m etl ADD --etapas faturamento --snapshot
+    python -m etl --todos --completa
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from etl.config import TENANTS
+from etl.pipeline import ETAPAS, executar_pipeline
+
+def _data(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Data inválida '{valor}'. Use o formato AAAA-MM-DD.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl", description="Gera os arquivos de dados dos clientes")
+    parser.add_argument("tenants", nargs="*", metavar="CLIENTE", help=f"Clientes a processar ({', '.join(TENANTS)})")
+    parser.add_argument("--todos", action="store_true", help="Processa todos os clientes configurados")
+    parser.add_argument("--etapas", nargs="+", choices=list(ETAPAS), metavar="ETAPA",
+                        help=f"Etapas a executar: {', '.join(ETAPAS)} (padrão: as do cliente)")
+    parser.add_argument("--data-corte", type=_data, default=None, help="Data de corte (AAAA-MM-DD)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Usa as tabelas do snapshot local da última extração, sem consultar o banco")
+    parser.add_argument("--completa", action="store_true",
+                        help="Extrai as tabelas por inteiro, ignorando a extração incremental")
+    args = parser.parse_args(argv)
+
+    tenants = list(TENANTS) if args.todos else [tenant.upper() for tenant in args.tenants]
+    if not tenants:
+        parser.error("informe ao menos um cliente ou --todos")
+    desconhecidos = [tenant for tenant in tenants if tenant not in TENANTS]
+    if desconhecidos:
+        parser.error(f"cliente(s) não configurado(s): {', '.join(desconhecidos)}")
+
+    falhas = []
+    for tenant in tenants:
+        resultados = executar_pipeline(tenant, args.etapas, args.data_corte, usar_snapshot=args.snapshot,
+                                       extracao_completa=args.completa)
+        falhas.extend(f"{tenant}/{etapa}" for etapa, arquivos in resultados.items() if arquivos is None)
+
+    if falhas:
+        print(f"[ETL] Etapas com erro: {', '.join(falhas)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
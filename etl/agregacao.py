@@ -0,0 +1,75 @@
+import pandas as pd
+
+# Como os resultados parciais de cada função de agregação são combinados entre blocos
+COMBINACOES = {
+    "sum": "sum",
+    "count": "sum",
+    "size": "sum",
+    "min": "min",
+    "max": "max",
+}
+
+def agregar_em_blocos(blocos, chaves, agregacoes):
+    """
+    Agrupa e agrega uma tabela lida em blocos, sem concatená-los
+
+    Cada bloco é agregado por 'chaves' e o resultado parcial é combinado ao
+    acumulado (somas e contagens somadas, mínimos e máximos comparados), de
+    modo que a memória usada dependa do tamanho do bloco e da quantidade de
+    grupos, não do tamanho da tabela. O resultado é o mesmo de
+    pd.concat(blocos).groupby(chaves).agg(**agregacoes).
+
+    Args:
+        blocos: Iterável de DataFrames (ex: ContextoETL.blocos)
+        chaves (list): Colunas de agrupamento (grupos com chave nula são ignorados, como no groupby)
+        agregacoes (dict): {coluna_resultado: (coluna, função)}, com função em COMBINACOES
+
+    Returns:
+        DataFrame indexado por 'chaves' com uma coluna por agregação
+    """
+    desconhecidas = [funcao for _, funcao in agregacoes.values() if funcao not in COMBINACOES]
+    if desconhecidas:
+        raise ValueError(f"Agregações não suportadas em blocos: {', '.join(desconhecidas)}")
+    combinacoes = {saida: COMBINACOES[funcao] for saida, (_, funcao) in agregacoes.items()}
+
+    acumulado = None
+    for bloco in blocos:
+        parcial = bloco.groupby(chaves).agg(**agregacoes)
+        if acumulado is None:
+            acumulado = parcial
+        elif not parcial.empty:
+            acumulado = pd.concat([acumulado, parcial]).groupby(level=list(range(len(chaves)))).agg(combinacoes)
+
+    if acumulado is None:
+        raise ValueError("Nenhum bloco para agregar")
+    return acumulado
+
+def ultimos_registros_em_blocos(blocos, chaves, ordem):
+    """
+    Registro mais recente de cada grupo de uma tabela lida em blocos
+
+    Equivale a ordenar a tabela inteira por 'ordem' (decrescente, nulos por
+    último, ordenação estável) e manter o primeiro registro de cada grupo,
+    mas só guarda na memória um registro por grupo além do bloco atual. Em
+    caso de empate, vale o registro que aparece primeiro na tabela.
+
+    Args:
+        blocos: Iterável de DataFrames (ex: ContextoETL.blocos)
+        chaves (list): Colunas que identificam o grupo (ex: ['id_produto'])
+        ordem (list): Colunas de ordenação, da mais para a menos importante (ex: ['data_movimento'])
+
+    Returns:
+        DataFrame com as colunas dos blocos e um registro por grupo
+    """
+    acumulado = None
+    for bloco in blocos:
+        if acumulado is not None:
+            bloco = pd.concat([acumulado, bloco], ignore_index=True)
+        acumulado = (
+            bloco.sort_values(ordem, ascending=False, kind='stable')
+            .drop_duplicates(subset=chaves, keep='first')
+        )
+
+    if acumulado is None:
+        raise ValueError("Nenhum bloco para agregar")
+    return acumulado
@@ -0,0 +1,100 @@
+import os
+
+# Raiz do repositório (as pastas de saída dos clientes ficam em dados/)
+RAIZ_REPOSITORIO = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Regras de segmentação RFMA (limites em dias, número de pedidos e decil monetário)
+REGRAS_SEGMENTACAO_ADD = {
+    "recencia_ativo": 180,          # Campeões, fiéis e recentes compraram até aqui
+    "recencia_campeoes": 180,
+    "frequencia_campeoes": 34,
+    "frequencia_fieis": 4,
+    "decil_fieis_baixo_valor": 8,   # Fiéis Baixo Valor: M_decil <= este valor
+    "decil_recentes_baixo_valor": 6,
+    "recentes_baixo_inclui_limite": True,  # Recentes Baixo Valor: M_decil <= (True) ou < (False) o limite
+    "sumidos_inclui_limite": False,  # Sumidos: Recency > (False) ou >= (True) recencia_ativo
+    "recencia_inativo": 730,
+}
+
+REGRAS_SEGMENTACAO_BIBI = {
+    "recencia_ativo": 365,
+    "recencia_campeoes": 180,
+    "frequencia_campeoes": 3,
+    "frequencia_fieis": 3,
+    "decil_fieis_baixo_valor": 7,
+    "decil_recentes_baixo_valor": 6,
+    "recentes_baixo_inclui_limite": False,
+    "sumidos_inclui_limite": True,
+    "recencia_inativo": 730,
+}
+
+# Configuração de cada cliente do pipeline
+#   database: banco do cliente no PostgreSQL
+#   diretorio: pasta de saída (relativa à raiz do repositório)
+#   formato: formato padrão dos arquivos de saída ('xlsx' ou 'csv')
+#   arquivos: nomes de arquivo (sem extensão) diferentes do padrão da etapa
+#   etapas: etapas executadas por padrão
+#   somente_pf: segmentação apenas dos clientes pessoa física
+#   faturamento_por_tipo: faturamento anual separado em serviços e produtos (venda_item.tipo)
+#   faturamento_lojas: gera faturamento_mensal_lojas e faturamento_diario_lojas
+#   exportar_consistencia: exporta analise_consistencia_estoque
+#   publicar_segmentacao: grava a segmentação em maloka_core.segmentacao
+TENANTS = {
+    "ADD": {
+        "database": "add",
+        "diretorio": os.path.join("dados", "ADD", "Dados_ADD_PF"),
+        "formato": "xlsx",
+        "arquivos": {"analytics_cliente": "analytics_cliente_ADD"},
+        "etapas": ["analytics_cliente", "metricas_recorrencia", "faturamento", "analise_curva_cobertura",
+                   "metricas_de_compra", "previsao_retorno", "vendas_atipicas", "historico_estoque"],
+        "somente_pf": False,
+        "regras_segmentacao": REGRAS_SEGMENTACAO_ADD,
+        "faturamento_por_tipo": False,
+        "faturamento_lojas": False,
+        "exportar_consistencia": True,
+        "publicar_segmentacao": False,
+    },
+    "BIBI": {
+        "database": "bibicell",
+        "diretorio": os.path.join("dados", "BIBI", "Dados_BIBI_PF"),
+        "formato": "xlsx",
+        "arquivos": {"analytics_cliente": "analytics_cliente_BIBI_PF"},
+        "etapas": ["analytics_cliente", "metricas_recorrencia", "faturamento", "analise_curva_cobertura",
+                   "metricas_de_compra", "previsao_retorno", "vendas_atipicas", "historico_estoque"],
+        "somente_pf": True,
+        "regras_segmentacao": REGRAS_SEGMENTACAO_BIBI,
+        "faturamento_por_tipo": True,
+        "faturamento_lojas": True,
+        "exportar_consistencia": False,
+        "publicar_segmentacao": False,
+    },
+    "BDXP": {
+        "database": "demonstracao",
+        "diretorio": os.path.join("dados", "BDXP"),
+        "formato": "csv",
+        "arquivos": {"previsao_retorno": "resumo_por_cliente"},
+        "etapas": ["analytics_cliente", "metricas_recorrencia", "faturamento", "analise_curva_cobertura",
+                   "previsao_retorno", "historico_estoque"],
+        "somente_pf": True,
+        "regras_segmentacao": REGRAS_SEGMENTACAO_BIBI,
+        "faturamento_por_tipo": True,
+        "faturamento_lojas": True,
+        "exportar_consistencia": True,
+        "publicar_segmentacao": True,
+    },
+}
+
+def get_tenant_config(tenant):
+    """
+    Retorna a configuração de um cliente do pipeline
+
+    Args:
+        tenant (str): Nome do cliente (ex: 'ADD')
+
+    Returns:
+        Dicionário de configuração (ver TENANTS)
+    """
+    config = TENANTS.get(tenant.upper())
+    if config is None:
+        raise ValueError(f"Cliente '{tenant}' não configurado. Disponíveis: {', '.join(sorted(TENANTS))}")
+    return config
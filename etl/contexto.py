@@ -0,0 +1,339 @@
+import os
+import time
+import uuid
+import warnings
+from datetime import datetime
+
+import dotenv
+import pandas as pd
+import psycopg2
+
+from etl import extracao, publicacao
+from etl.config import RAIZ_REPOSITORIO, get_tenant_config
+
+warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy connectable')
+
+dotenv.load_dotenv()
+
+# Registros por row group nos arquivos Parquet de saída (menor = leitura de um produto mais barata)
+ETL_PARQUET_GRUPO = int(os.getenv("ETL_PARQUET_GRUPO", "20000"))
+
+class ContextoETL:
+    """
+    Estado de uma execução do pipeline para um cliente
+
+    Guarda a configuração do cliente, a data de referência da execução, uma
+    conexão com o banco (aberta no primeiro uso) e as tabelas já extraídas,
+    de modo que cada tabela de maloka_core seja lida uma única vez por
+    execução, mesmo quando várias etapas a utilizam. Cada tabela é extraída
+    em blocos para um snapshot Parquet local, que pode ser reutilizado em
+    execuções seguintes sem consultar o banco (usar_snapshot), e as etapas
+    leem o snapshot inteiro (tabela()), só as colunas e registros de que
+    precisam (tabela() com colunas/filtros) ou em blocos (blocos()). As
+    tabelas de extracao.INCREMENTAL com snapshot consultam apenas os
+    registros a partir da marca d'água da última extração.
+
+    As etapas não devem alterar os DataFrames retornados por tabela(): eles são
+    compartilhados entre as etapas da mesma execução, até serem liberados
+    (ver liberar()).
+    """
+
+    def __init__(self, tenant, data_corte=None, usar_snapshot=False, extracao_completa=False):
+        """
+        Args:
+            tenant (str): Nome do cliente (chave de TENANTS)
+            data_corte (datetime): Data de corte opcional; as análises de estoque
+                ignoram registros posteriores a ela e usam-na como data de referência
+            usar_snapshot (bool): Lê as tabelas do snapshot local da última extração em vez do banco
+            extracao_completa (bool): Extrai as tabelas por inteiro, ignorando as marcas d'água
+        """
+        self.tenant = tenant.upper()
+        self.config = get_tenant_config(self.tenant)
+        self.database = self.config["database"]
+        self.diretorio = os.path.join(RAIZ_REPOSITORIO, self.config["diretorio"])
+        self.data_corte = data_corte
+        self.data_referencia = data_corte or datetime.now()
+        self.usar_snapshot = usar_snapshot
+        self.extracao_completa = extracao_completa
+        self._conn = None
+        self._extraidas = set()
+        self._tabelas = {}
+
+    def conexao(self):
+        """Conexão com o banco do cliente (aberta no primeiro uso)"""
+        if self._conn is None or self._conn.closed:
+            print(f"[ETL] Conectando ao banco '{self.database}'...")
+            self._conn = psycopg2.connect(
+                host=os.getenv("DB_HOST"),
+                database=self.database,
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASS"),
+                port=os.getenv("DB_PORT")
+            )
+        return self._conn
+
+    def consultar(self, query, params=None):
+        """
+        Executa uma consulta e retorna o resultado como DataFrame
+
+        Args:
+            query (str): SQL da consulta
+            params: Parâmetros da consulta (opcional)
+        """
+        return pd.read_sql_query(query, self.conexao(), params=params)
+
+    def consultar_em_blocos(self, query, params=None, tamanho_bloco=None, tabela=None):
+        """
+        Executa uma consulta com um cursor no servidor e retorna o resultado em blocos
+
+        Ao contrário de consultar(), o resultado não é trazido inteiro para a
+        memória: o cursor nomeado do psycopg2 busca 'tamanho_bloco' registros
+        por vez no servidor. Cada bloco é convertido pelos tipos das colunas
+        no banco (ver extracao.tipar_colunas), de modo que todos os blocos
+        tenham os mesmos tipos. Há sempre ao menos um bloco, vazio quando a
+        consulta não retorna registros.
+
+        Args:
+            query (str): SQL da consulta
+            params: Parâmetros da consulta (opcional)
+            tamanho_bloco (int): Registros por bloco (padrão: ETL_TAMANHO_BLOCO)
+            tabela (str): Tabela de extracao.TABELAS cujos tipos também são aplicados (opcional)
+
+        Yields:
+            DataFrames com até 'tamanho_bloco' registros
+        """
+        tamanho_bloco = tamanho_bloco or extracao.ETL_TAMANHO_BLOCO
+        conn = self.conexao()
+        try:
+            with conn.cursor(name=f"etl_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = tamanho_bloco
+                cursor.execute(query, params)
+                while True:
+                    linhas = cursor.fetchmany(tamanho_bloco)
+                    colunas = [descricao[0] for descricao in cursor.description]
+                    tipos = {descricao[0]: descricao[1] for descricao in cursor.description}
+                    bloco = pd.DataFrame(linhas, columns=colunas, dtype=object)
+                    yield extracao.tipar_colunas(bloco, tabela, tipos)
+                    if len(linhas) < tamanho_bloco:
+                        break
+        finally:
+            # Encerra a transação aberta pelo cursor nomeado
+            conn.rollback()
+
+    def _marca_com_fuso(self, nome):
+        """Indica se a coluna da marca d'água de uma tabela incremental é timestamptz"""
+        tabela, coluna = extracao.coluna_marca(nome)
+        with self.conexao().cursor() as cursor:
+            cursor.execute(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_schema = 'maloka_core' AND table_name = %s AND column_name = %s",
+                (tabela, coluna)
+            )
+            linha = cursor.fetchone()
+        return linha is not None and linha[0] == "timestamp with time zone"
+
+    def _extrair_do_banco(self, nome):
+        """
+        Extrai uma tabela do banco para o snapshot e atualiza o manifesto
+
+        A tabela é consultada em blocos (ver consultar_em_blocos) e gravada no
+        snapshot bloco a bloco, sem ser carregada inteira na memória. Com
+        marca d'água registrada, consulta apenas os registros a partir da
+        marca menos a janela incremental e os mescla ao snapshot, também em
+        blocos (ver extracao.blocos_mesclados).
+
+        Returns:
+            Tupla (registros no snapshot, descrição da origem)
+        """
+        marca = None if self.extracao_completa else extracao.marca_dagua(self.tenant, nome)
+        if marca is None:
+            blocos = self.consultar_em_blocos(*extracao.consulta_tabela(nome), tabela=nome)
+            origem = "banco"
+        else:
+            desde = extracao.inicio_incremento(marca)
+            consulta = extracao.consulta_tabela(nome, desde, marca_com_fuso=self._marca_com_fuso(nome))
+            incremento = pd.concat(self.consultar_em_blocos(*consulta, tabela=nome), ignore_index=True)
+            blocos = extracao.blocos_mesclados(self.tenant, nome, incremento, desde)
+            origem = f"banco, incremental desde {desde:%d/%m/%Y %H:%M}: {len(incremento)} registros consultados"
+
+        registros, nova_marca = extracao.salvar_snapshot(blocos, self.tenant, nome)
+        extracao.registrar_extracao(self.tenant, nome, nova_marca)
+        return registros, origem
+
+    def extrair(self, nomes):
+        """
+        Extrai as tabelas indicadas para o snapshot local, uma única vez por execução
+
+        Cada tabela é consultada com as colunas e tipos de extracao.TABELAS e
+        gravada no snapshot local do cliente (ver _extrair_do_banco); com
+        usar_snapshot, apenas confere que o snapshot existe. As tabelas são
+        carregadas na memória só quando uma etapa as pede (tabela()) e podem
+        ser lidas em blocos (blocos()). Tabelas já extraídas nesta execução
+        são ignoradas.
+
+        Args:
+            nomes (list): Nomes das tabelas de maloka_core
+
+        Raises:
+            FileNotFoundError: Com usar_snapshot, se uma tabela não tem snapshot
+        """
+        for nome in nomes:
+            if nome in self._extraidas:
+                continue
+            inicio = time.time()
+            if self.usar_snapshot:
+                registros, origem = extracao.registros_snapshot(self.tenant, nome), "snapshot"
+            else:
+                registros, origem = self._extrair_do_banco(nome)
+            self._extraidas.add(nome)
+            print(f"[ETL] {self.tenant}: tabela '{nome}' extraída ({origem}; "
+                  f"{registros} registros, {time.time() - inicio:.1f}s)")
+
+    def _colunas(self, nome, colunas=None):
+        """Colunas a ler do snapshot (padrão: todas, exceto COLUNA_MARCA)"""
+        if colunas is not None:
+            return list(colunas)
+        return [col for col in extracao.colunas_snapshot(self.tenant, nome) if col != extracao.COLUNA_MARCA]
+
+    def tabela(self, nome, colunas=None, filtros=None):
+        """
+        Retorna uma tabela de maloka_core (ver extrair())
+
+        Sem colunas nem filtros, a tabela inteira é lida do snapshot apenas na
+        primeira chamada e compartilhada entre as etapas. Com eles, apenas as
+        colunas e os registros pedidos são lidos (os filtros são aplicados
+        pelo pyarrow na leitura do Parquet), e o resultado não é guardado.
+
+        Args:
+            nome (str): Nome da tabela (ex: 'venda', 'venda_item')
+            colunas (list): Colunas a ler (padrão: todas as extraídas)
+            filtros (list): Filtros do pyarrow, ex: [('data_venda', '>=', inicio)] (opcional);
+                nas tabelas de extracao.INCREMENTAL, extracao.COLUNA_MARCA pode ser filtrada
+                mesmo quando não é lida
+
+        Returns:
+            DataFrame com as colunas pedidas da tabela
+        """
+        if colunas is not None or filtros:
+            self.extrair([nome])
+            return extracao.ler_snapshot(self.tenant, nome, self._colunas(nome, colunas), filtros)
+        if nome not in self._tabelas:
+            self.extrair([nome])
+            self._tabelas[nome] = extracao.ler_snapshot(self.tenant, nome, self._colunas(nome))
+        return self._tabelas[nome].copy(deep=False)
+
+    def blocos(self, nome, colunas=None, tamanho_bloco=None, filtros=None):
+        """
+        Lê uma tabela de maloka_core em blocos, sem carregá-la inteira na memória
+
+        Para agregações que podem ser feitas bloco a bloco (ver etl.agregacao).
+
+        Args:
+            nome (str): Nome da tabela (ex: 'venda_item')
+            colunas (list): Colunas a ler (padrão: todas as extraídas)
+            tamanho_bloco (int): Registros por bloco (padrão: ETL_TAMANHO_BLOCO)
+            filtros (list): Filtros do pyarrow, no formato de tabela() (opcional)
+
+        Yields:
+            DataFrames com até 'tamanho_bloco' registros
+        """
+        self.extrair([nome])
+        yield from extracao.ler_snapshot_em_blocos(
+            self.tenant, nome, self._colunas(nome, colunas), tamanho_bloco, filtros
+        )
+
+    def liberar(self, manter=()):
+        """
+        Descarta as tabelas carregadas por tabela(), exceto as de 'manter'
+
+        Chamado pelo pipeline ao fim de cada etapa, com as tabelas que as
+        etapas seguintes ainda usam.
+
+        Args:
+            manter: Nomes das tabelas que continuam em memória
+        """
+        for nome in [nome for nome in self._tabelas if nome not in manter]:
+            del self._tabelas[nome]
+
+    def arquivo(self, nome, formato=None):
+        """
+        Caminho de um arquivo de saída
+
+        O nome pode ser sobrescrito por cliente em config['arquivos'].
+
+        Args:
+            nome (str): Nome padrão do arquivo, sem extensão
+            formato (str): 'xlsx', 'csv' ou 'parquet' (padrão: formato do cliente)
+        """
+        nome = self.config.get("arquivos", {}).get(nome, nome)
+        return os.path.join(self.diretorio, f"{nome}.{formato or self.config['formato']}")
+
+    def salvar(self, df, nome, formato=None, index=False, sheet_name="Sheet1", ajustar_planilha=None):
+        """
+        Grava um arquivo de saída de forma atômica
+
+        O arquivo é gravado em um temporário e renomeado ao final, pois o
+        dashboard pode estar lendo a versão anterior.
+
+        Args:
+            df (DataFrame): Dados a gravar
+            nome (str): Nome padrão do arquivo, sem extensão (ver arquivo())
+            formato (str): 'xlsx', 'csv' ou 'parquet' (padrão: formato do cliente); o Parquet
+                é gravado em row groups de ETL_PARQUET_GRUPO registros
+            index (bool): Gravar o índice do DataFrame
+            sheet_name (str): Nome da aba (Excel)
+            ajustar_planilha: Função opcional chamada com a aba do openpyxl antes de salvar (Excel)
+
+        Returns:
+            Caminho do arquivo gravado
+        """
+        formato = formato or self.config["formato"]
+        caminho = self.arquivo(nome, formato)
+        # O temporário mantém a extensão, usada pelo pandas para escolher o formato
+        raiz, extensao = os.path.splitext(caminho)
+        caminho_temporario = f"{raiz}.{os.getpid()}.tmp{extensao}"
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        try:
+            if formato == "xlsx":
+                with pd.ExcelWriter(caminho_temporario, engine="openpyxl") as writer:
+                    df.to_excel(writer, sheet_name=sheet_name, index=index)
+                    if ajustar_planilha is not None:
+                        ajustar_planilha(writer.sheets[sheet_name])
+            elif formato == "parquet":
+                df.to_parquet(caminho_temporario, index=index, row_group_size=ETL_PARQUET_GRUPO)
+            else:
+                df.to_csv(caminho_temporario, index=index)
+            os.replace(caminho_temporario, caminho)
+        finally:
+            if os.path.exists(caminho_temporario):
+                os.remove(caminho_temporario)
+
+        print(f"[ETL] {self.tenant}: {os.path.basename(caminho)} salvo ({len(df)} linhas)")
+        return caminho
+
+    def publicar(self, df, tabela, schema="maloka_core"):
+        """
+        Substitui o conteúdo de uma tabela de resultado no banco do cliente (ver publicacao.publicar_tabela)
+
+        Args:
+            df (DataFrame): Dados a publicar
+            tabela (str): Nome da tabela (ex: 'segmentacao')
+            schema (str): Schema da tabela
+
+        Returns:
+            Nome completo da tabela publicada
+        """
+        inicio = time.time()
+        registros = publicacao.publicar_tabela(self.conexao(), df, tabela, schema=schema)
+        print(f"[ETL] {self.tenant}: {registros} registros gravados em {schema}.{tabela} "
+              f"({time.time() - inicio:.1f}s)")
+        return f"{schema}.{tabela}"
+
+    def fechar(self):
+        """Fecha a conexão e libera as tabelas carregadas"""
+        if self._conn is not None and not self._conn.closed:
+            self._conn.close()
+        self._conn = None
+        self._extraidas.clear()
+        self._tabelas.clear()
@@ -0,0 +1,2 @@
+# Etapas do pipeline: cada módulo expõe TABELAS (tabelas de maloka_core que usa) e executar(ctx),
+# que grava um grupo de arquivos de saída
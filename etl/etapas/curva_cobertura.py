@@ -0,0 +1,411 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from etl.agregacao import agregar_em_blocos, ultimos_registros_em_blocos
+from etl.extracao import COLUNA_MARCA
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda", "venda_item", "estoque_movimento", "historico_estoque", "produto", "categoria",
+           "compra", "compra_item"]
+
+# Períodos da análise de vendas (dias antes da data de referência)
+PERIODOS = {
+    'ultimos_30_dias': 30,
+    'ultimos_60_dias': 60,
+    'ultimos_90_dias': 90,
+    'ultimo_ano': 365
+}
+
+# Diferença máxima entre histórico e movimentação para o estoque ser consistente
+TOLERANCIA_CONSISTENCIA = 0.01
+
+def _filtrar_data_corte(df, coluna, data_corte):
+    """Registros até a data de corte (todos, sem data de corte)"""
+    if data_corte is None:
+        return df
+    return df[pd.to_datetime(df[coluna]) <= pd.Timestamp(data_corte)]
+
+def _filtros_data_corte(coluna, data_corte):
+    """Filtro do pyarrow equivalente a _filtrar_data_corte (None, sem data de corte)"""
+    if data_corte is None:
+        return None
+    return [(coluna, '<=', pd.Timestamp(data_corte))]
+
+def carregar_tabelas(ctx):
+    """
+    Tabelas usadas pela análise, limitadas à data de corte da execução
+
+    As vendas e a movimentação de estoque não são carregadas inteiras: as
+    vendas são resumidas por produto (ver resumir_vendas) e, da
+    movimentação, fica apenas o registro mais recente de cada produto/loja.
+
+    Returns:
+        Dicionário com 'vendas_por_produto', 'estoque_movimento', 'historico_estoque',
+        'produto', 'categoria', 'compra' e 'compra_item'
+    """
+    data_corte = ctx.data_corte
+
+    df_estoque = _filtrar_data_corte(ctx.tabela("historico_estoque"), 'data_estoque', data_corte).copy()
+    df_estoque['estoque'] = pd.to_numeric(df_estoque['estoque'], errors='coerce')
+    df_estoque_movi = ultimos_registros_em_blocos(
+        ctx.blocos(
+            "estoque_movimento",
+            colunas=['id_produto', 'id_loja', 'data_movimento', 'ordem_movimento', 'estoque_depois'],
+            filtros=_filtros_data_corte('data_movimento', data_corte)
+        ),
+        ['id_produto', 'id_loja'], ['data_movimento', 'ordem_movimento']
+    )
+    df_estoque_movi['estoque_depois'] = pd.to_numeric(df_estoque_movi['estoque_depois'], errors='coerce')
+
+    return {
+        'vendas_por_produto': resumir_vendas(ctx),
+        'estoque_movimento': df_estoque_movi,
+        'historico_estoque': df_estoque,
+        'produto': _filtrar_data_corte(ctx.tabela("produto"), 'data_criacao', data_corte),
+        'categoria': ctx.tabela("categoria"),
+        'compra': _filtrar_data_corte(ctx.tabela("compra"), 'data_compra', data_corte),
+        'compra_item': ctx.tabela("compra_item"),
+    }
+
+def _historico_mais_recente(df_estoque):
+    """Registro mais recente do histórico de estoque de cada produto/loja"""
+    historico = df_estoque.sort_values(['id_produto', 'id_loja', 'data_estoque'], ascending=[True, True, False])
+    return historico.drop_duplicates(subset=['id_produto', 'id_loja'], keep='first')
+
+def consolidar_estoque(df_estoque, df_produtos, df_categoria):
+    """
+    Estoque atual de cada produto somado entre as lojas, com dados do produto
+
+    Produtos com 'TAXA' na descrição são removidos.
+
+    Returns:
+        DataFrame com 'SKU', 'ID Categoria', 'EAN', 'Descrição do Produto', 'Categoria',
+        'Data Criação', 'Estoque Total', 'Data Atualização' e 'Qtd Lojas'
+    """
+    estoque_consolidado = _historico_mais_recente(df_estoque).groupby('id_produto').agg({
+        'estoque': 'sum',
+        'data_estoque': 'max',
+        'id_loja': 'count'
+    }).reset_index()
+
+    estoque_final = estoque_consolidado.merge(
+        df_produtos[['id_produto', 'nome', 'id_categoria', 'data_criacao', 'codigo_barras']],
+        on='id_produto', how='left'
+    )
+    estoque_final = estoque_final.merge(df_categoria[['id_categoria', 'nome_categoria']], on='id_categoria', how='left')
+
+    estoque_final = estoque_final.rename(columns={
+        'id_produto': 'SKU',
+        'id_categoria': 'ID Categoria',
+        'nome': 'Descrição do Produto',
+        'nome_categoria': 'Categoria',
+        'data_criacao': 'Data Criação',
+        'codigo_barras': 'EAN',
+        'estoque': 'Estoque Total',
+        'data_estoque': 'Data Atualização',
+        'id_loja': 'Qtd Lojas',
+    })
+    estoque_final = estoque_final[['SKU', 'ID Categoria', 'EAN', 'Descrição do Produto', 'Categoria',
+                                   'Data Criação', 'Estoque Total', 'Data Atualização', 'Qtd Lojas']]
+
+    total_antes = len(estoque_final)
+    estoque_final = estoque_final[~estoque_final['Descrição do Produto'].str.contains('TAXA', case=False, na=False)]
+    print(f"Foram excluídos {total_antes - len(estoque_final)} produtos contendo 'TAXA' na descrição.")
+
+    return estoque_final.sort_values('Estoque Total')
+
+def _itens_com_periodos(blocos_itens, df_vendas, data_referencia):
+    """Itens de cada bloco com a data da venda e a quantidade/valor de cada período de PERIODOS"""
+    for bloco in blocos_itens:
+        itens = bloco.merge(df_vendas, on='id_venda', how='inner')
+        colunas = {
+            'id_produto': itens['id_produto'],
+            'data_venda': itens['data_venda'],
+        }
+        quantidade = pd.to_numeric(itens['quantidade'], errors='coerce')
+        total_item = pd.to_numeric(itens['total_item'], errors='coerce')
+        for periodo, dias in PERIODOS.items():
+            no_periodo = itens['data_venda'] >= data_referencia - timedelta(days=dias)
+            colunas[f'qt_vendas_{periodo}'] = quantidade.where(no_periodo)
+            colunas[f'valor_vendas_{periodo}'] = total_item.where(no_periodo)
+        yield pd.DataFrame(colunas)
+
+def resumir_vendas(ctx):
+    """
+    Vendas de cada produto, agregadas em blocos de venda_item (até a data de corte)
+
+    Returns:
+        DataFrame indexado por id_produto com a quantidade (qt_vendas_*) e o valor
+        (valor_vendas_*) vendidos em cada período de PERIODOS e as datas da
+        primeira e da última venda
+    """
+    data_corte = ctx.data_corte
+    df_vendas = ctx.tabela(
+        "venda", colunas=['id_venda', 'data_venda'], filtros=_filtros_data_corte('data_venda', data_corte)
+    )
+    df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda'])
+    # A marca de venda_item é a data da venda
+    blocos_itens = ctx.blocos(
+        "venda_item", colunas=['id_venda', 'id_produto', 'quantidade', 'total_item'],
+        filtros=_filtros_data_corte(COLUNA_MARCA, data_corte)
+    )
+
+    agregacoes = {'primeira_venda': ('data_venda', 'min'), 'ultima_venda': ('data_venda', 'max')}
+    for periodo in PERIODOS:
+        agregacoes[f'qt_vendas_{periodo}'] = (f'qt_vendas_{periodo}', 'sum')
+        agregacoes[f'valor_vendas_{periodo}'] = (f'valor_vendas_{periodo}', 'sum')
+    return agregar_em_blocos(_itens_com_periodos(blocos_itens, df_vendas, ctx.data_referencia), ['id_produto'], agregacoes)
+
+def adicionar_vendas_por_periodo(estoque, vendas_por_produto):
+    """Quantidade (qt_vendas_*) e valor (valor_vendas_*) vendidos de cada produto em cada período de PERIODOS"""
+    estoque = estoque.copy()
+    for periodo in PERIODOS:
+        estoque[f'qt_vendas_{periodo}'] = estoque['SKU'].map(vendas_por_produto[f'qt_vendas_{periodo}']).fillna(0).astype(int)
+        estoque[f'valor_vendas_{periodo}'] = estoque['SKU'].map(vendas_por_produto[f'valor_vendas_{periodo}']).fillna(0).astype(float)
+    return estoque
+
+def adicionar_situacao(estoque, vendas_por_produto, data_referencia):
+    """
+    Histórico de vendas e situação de cada produto
+
+    Adiciona 'Tem Vendas > 1 ano', 'Data Última Venda', 'Recência (dias)' e
+    'Situação do Produto' (Ativo, Inativo ou Não Comercializado, separados
+    por estoque positivo ou não).
+    """
+    estoque = estoque.copy()
+    ultimas_vendas = vendas_por_produto['ultima_venda']
+    vendas_antigas = vendas_por_produto.index[
+        vendas_por_produto['primeira_venda'] < data_referencia - timedelta(days=365)
+    ]
+
+    estoque['Tem Vendas > 1 ano'] = np.where(estoque['SKU'].isin(vendas_antigas), "Sim", "Não")
+    estoque['Data Última Venda'] = estoque['SKU'].map(ultimas_vendas)
+    estoque['Recência (dias)'] = (pd.Timestamp(data_referencia) - estoque['Data Última Venda']).dt.days
+
+    com_estoque = estoque['Estoque Total'] > 0
+    sem_venda_ano = estoque['qt_vendas_ultimo_ano'] == 0
+    tem_vendas_historicas = estoque['Tem Vendas > 1 ano'] == "Sim"
+    situacao = np.select(
+        [sem_venda_ano & tem_vendas_historicas, sem_venda_ano],
+        ["Inativo", "Não Comercializado"],
+        default="Ativo"
+    )
+    estoque['Situação do Produto'] = pd.Series(situacao, index=estoque.index) + np.where(
+        com_estoque, " (ESTOQUE > 0)", " (ESTOQUE <= 0)"
+    )
+
+    for situacao, count in estoque['Situação do Produto'].value_counts().items():
+        print(f"- {situacao}: {count:,} produtos ({count / max(len(estoque), 1) * 100:.1f}%)")
+    return estoque
+
+def adicionar_curva_abc(estoque):
+    """
+    Curva ABC pelo valor vendido nos últimos 90 dias e cobertura de estoque
+
+    A (até 80% do valor acumulado), B (até 95%) e C (restante); produtos sem
+    venda no período ficam como 'Sem Venda'. A cobertura (dias) usa as vendas
+    diárias dos últimos 90 dias e é 0 sem venda ou com estoque não positivo.
+    """
+    estoque = estoque.copy()
+    com_vendas = estoque[estoque['qt_vendas_ultimos_90_dias'] > 0]
+
+    estoque['Curva ABC'] = 'Sem Venda'
+    if not com_vendas.empty:
+        valores = com_vendas['valor_vendas_ultimos_90_dias'].sort_values(ascending=False)
+        participacao_acumulada = (valores / valores.sum() * 100).cumsum()
+        curva = pd.Series(
+            np.select([participacao_acumulada <= 80, participacao_acumulada <= 95], ['A', 'B'], default='C'),
+            index=participacao_acumulada.index
+        )
+        estoque.loc[curva.index, 'Curva ABC'] = curva
+    else:
+        print("Não foram encontrados produtos com vendas nos últimos 90 dias.")
+
+    na_curva = estoque['Curva ABC'].isin(['A', 'B', 'C'])
+    vendas_diarias = estoque['qt_vendas_ultimos_90_dias'] / 90
+    estoque['Vendas Diárias'] = vendas_diarias.where(na_curva, 0)
+
+    com_cobertura = na_curva & (vendas_diarias > 0) & (estoque['Estoque Total'] > 0)
+    estoque['Cobertura Estoque (dias)'] = (estoque['Estoque Total'] / vendas_diarias).where(com_cobertura, 0)
+
+    for grupo in ['A', 'B', 'C']:
+        print(f"- Curva {grupo}: {(estoque['Curva ABC'] == grupo).sum()} produtos")
+    return estoque
+
+def ultimo_preco_compra(df_compras, df_compra_itens):
+    """Preço bruto da compra mais recente de cada produto (Series indexada por id_produto)"""
+    compras = df_compra_itens[['id_compra', 'id_produto', 'preco_bruto']].merge(
+        df_compras[['id_compra', 'data_compra']], on='id_compra', how='inner'
+    )
+    # Mesma ordem do ORDER BY data_compra DESC do PostgreSQL (nulos primeiro)
+    compras = compras.sort_values('data_compra', ascending=False, na_position='first', kind='stable')
+    ultimas = compras.drop_duplicates('id_produto', keep='first').set_index('id_produto')['preco_bruto']
+    return pd.to_numeric(ultimas, errors='coerce')
+
+def analisar_consistencia(df_estoque, df_estoque_movi):
+    """
+    Compara o estoque mais recente do histórico com o saldo da última movimentação de cada produto/loja
+
+    Returns:
+        DataFrame com 'id_produto', 'id_loja', 'estoque', 'data_estoque', 'estoque_depois',
+        'data_movimento', 'diferenca' e 'status_consistencia'
+    """
+    movimento_mais_recente = df_estoque_movi.sort_values(
+        ['id_produto', 'id_loja', 'data_movimento', 'ordem_movimento'],
+        ascending=[True, True, False, False]
+    ).drop_duplicates(subset=['id_produto', 'id_loja'], keep='first')
+
+    analise = _historico_mais_recente(df_estoque)[['id_produto', 'id_loja', 'estoque', 'data_estoque']].merge(
+        movimento_mais_recente[['id_produto', 'id_loja', 'estoque_depois', 'data_movimento']],
+        on=['id_produto', 'id_loja'], how='left'
+    )
+    analise['estoque_depois'] = analise['estoque_depois'].fillna(0)
+    analise['diferenca'] = (analise['estoque'] - analise['estoque_depois']).abs()
+    analise['status_consistencia'] = np.where(
+        analise['diferenca'] <= TOLERANCIA_CONSISTENCIA, 'Consistente', 'Inconsistente'
+    )
+    return analise
+
+def calcular_metricas(estoque, analise_consistencia, data_referencia):
+    """
+    Métricas resumidas da análise (uma linha de metricas_analise_estoque)
+
+    Returns:
+        Dicionário com as métricas
+    """
+    total_skus = len(estoque)
+    situacao = estoque['Situação do Produto']
+    custo = estoque['valor_estoque_custo']
+
+    def _percentual(total, base):
+        return (total / base) * 100 if base > 0 else 0
+
+    metricas = {'data_hora_analise': data_referencia.strftime("%Y-%m-%d %H:%M:%S"), 'total_de_skus': total_skus}
+
+    contagens = [
+        ('sku_com_mais_de_um_ano_de_vendas', estoque['Tem Vendas > 1 ano'] == "Sim", False),
+        ('sku_com_ate_um_ano_de_vendas', (estoque['qt_vendas_ultimo_ano'] > 0) & (estoque['Tem Vendas > 1 ano'] == "Não"), False),
+        ('sku_com_estoque_zero', estoque['Estoque Total'] == 0, False),
+        ('sku_com_estoque_positivo', estoque['Estoque Total'] > 0, 'custo_total_estoque_positivo'),
+        ('sku_com_estoque_negativo', estoque['Estoque Total'] < 0, 'custo_total_estoque_negativo'),
+        ('sku_inativo_com_estoque_maior_que_zero', situacao == 'Inativo (ESTOQUE > 0)',
+         'custo_total_inativo_com_estoque_maior_que_zero'),
+        ('sku_inativo_com_estoque_menor_ou_igual_zero', situacao == 'Inativo (ESTOQUE <= 0)', False),
+        ('sku_ativo_com_estoque_maior_que_zero', situacao == 'Ativo (ESTOQUE > 0)',
+         'custo_total_ativo_com_estoque_maior_que_zero'),
+        ('sku_ativo_com_estoque_menor_ou_igual_zero', situacao == 'Ativo (ESTOQUE <= 0)', False),
+        ('sku_nao_comercializado_com_estoque_maior_que_zero', situacao == 'Não Comercializado (ESTOQUE > 0)',
+         'custo_total_nao_comercializado_com_estoque_maior_que_zero'),
+        ('sku_nao_comercializado_com_estoque_menor_ou_igual_zero', situacao == 'Não Comercializado (ESTOQUE <= 0)', False),
+    ]
+    for nome, filtro, nome_custo in contagens:
+        total = int(filtro.sum())
+        metricas[f'total_{nome}'] = total
+        metricas[f'percentual_{nome}'] = _percentual(total, total_skus)
+        if nome_custo:
+            metricas[nome_custo] = abs(custo[filtro].sum()) if nome_custo.endswith('negativo') else custo[filtro].sum()
+
+    # Consistência entre histórico de estoque e movimentações
+    total_verificados = analise_consistencia['id_produto'].nunique()
+    consistentes = analise_consistencia.loc[
+        analise_consistencia['status_consistencia'] == 'Consistente', 'id_produto'
+    ].nunique()
+    pct_consistentes = _percentual(consistentes, total_verificados)
+    metricas['total_sku_verificados'] = total_verificados
+    metricas['total_sku_consistentes'] = consistentes
+    metricas['percentual_sku_consistentes'] = pct_consistentes
+    metricas['total_sku_inconsistentes'] = total_verificados - consistentes
+    metricas['percentual_sku_inconsistentes'] = 100 - pct_consistentes
+    print(f"SKU consistentes: {consistentes} de {total_verificados} ({pct_consistentes:.1f}%)")
+
+    # Curva ABC (percentuais sobre os produtos com venda nos últimos 90 dias)
+    total_com_vendas_90dias = int((estoque['qt_vendas_ultimos_90_dias'] > 0).sum())
+    grupos = {grupo: estoque[estoque['Curva ABC'] == grupo] for grupo in ['A', 'B', 'C']}
+    for grupo, df_grupo in grupos.items():
+        metricas[f'total_sku_grupo_{grupo.lower()}'] = len(df_grupo)
+    for grupo, df_grupo in grupos.items():
+        metricas[f'percentual_sku_grupo_{grupo.lower()}'] = _percentual(len(df_grupo), total_com_vendas_90dias)
+
+    vendas_grupo = {grupo: df_grupo['valor_vendas_ultimos_90_dias'].sum() for grupo, df_grupo in grupos.items()}
+    venda_total = sum(vendas_grupo.values())
+    for grupo, venda in vendas_grupo.items():
+        metricas[f'total_venda_grupo_{grupo.lower()}'] = venda
+    for grupo, venda in vendas_grupo.items():
+        metricas[f'percentual_venda_grupo_{grupo.lower()}'] = _percentual(venda, venda_total)
+
+    for grupo, df_grupo in grupos.items():
+        vendas_diarias = df_grupo['qt_vendas_ultimos_90_dias'].sum() / 90
+        metricas[f'cobertura_em_dias_grupo_{grupo.lower()}'] = (
+            df_grupo['Estoque Total'].sum() / vendas_diarias if vendas_diarias > 0 else 0
+        )
+    return metricas
+
+def adicionar_colunas_lojas(estoque, df_estoque, analise_consistencia):
+    """Colunas 'Estoque Loja {id}' e 'Consistência Loja {id}' de cada loja do histórico de estoque"""
+    estoque = estoque.copy()
+    historico = _historico_mais_recente(df_estoque)
+    todas_lojas = sorted(df_estoque['id_loja'].unique())
+
+    estoque_por_loja = historico.pivot(index='id_produto', columns='id_loja', values='estoque')
+    consistencia_por_loja = analise_consistencia.pivot(index='id_produto', columns='id_loja', values='status_consistencia')
+
+    colunas = {}
+    for loja in todas_lojas:
+        colunas[f'Estoque Loja {loja}'] = estoque['SKU'].map(estoque_por_loja[loja]).fillna(0)
+    for loja in todas_lojas:
+        colunas[f'Consistência Loja {loja}'] = estoque['SKU'].map(consistencia_por_loja[loja]).fillna('Sem Informação')
+    print(f"Adicionadas {len(todas_lojas)} colunas de estoque por loja e {len(todas_lojas)} colunas de consistência.")
+    return pd.concat([estoque, pd.DataFrame(colunas, index=estoque.index)], axis=1)
+
+def _salvar_metricas(ctx, metricas):
+    """
+    Grava as métricas da execução
+
+    Com data de corte, grava metricas_analise_estoque_{AAAAMMDD}.csv; sem ela,
+    acrescenta a linha ao histórico em metricas_analise_estoque.csv.
+    """
+    df_metricas = pd.DataFrame([metricas])
+    if ctx.data_corte is not None:
+        return ctx.salvar(df_metricas, f"metricas_analise_estoque_{ctx.data_corte.strftime('%Y%m%d')}", formato="csv")
+
+    caminho = ctx.arquivo("metricas_analise_estoque", "csv")
+    if os.path.exists(caminho):
+        df_metricas = pd.concat([pd.read_csv(caminho), df_metricas], ignore_index=True)
+    return ctx.salvar(df_metricas, "metricas_analise_estoque", formato="csv")
+
+def executar(ctx):
+    """
+    Gera analise_curva_cobertura, as métricas de estoque e (conforme o cliente) analise_consistencia_estoque
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    data_referencia = ctx.data_referencia
+    tabelas = carregar_tabelas(ctx)
+
+    estoque = consolidar_estoque(tabelas['historico_estoque'], tabelas['produto'], tabelas['categoria'])
+    print(f"Tabela de Estoque Consolidado por Produto - {len(estoque)} produtos")
+    estoque = adicionar_vendas_por_periodo(estoque, tabelas['vendas_por_produto'])
+    estoque = adicionar_situacao(estoque, tabelas['vendas_por_produto'], data_referencia)
+    estoque = adicionar_curva_abc(estoque)
+
+    precos = ultimo_preco_compra(tabelas['compra'], tabelas['compra_item'])
+    estoque['ultimo_preco_compra'] = estoque['SKU'].map(precos).fillna(0)
+    estoque['valor_estoque_custo'] = estoque['Estoque Total'] * estoque['ultimo_preco_compra']
+
+    analise_consistencia = analisar_consistencia(tabelas['historico_estoque'], tabelas['estoque_movimento'])
+    metricas = calcular_metricas(estoque, analise_consistencia, data_referencia)
+    estoque = adicionar_colunas_lojas(estoque, tabelas['historico_estoque'], analise_consistencia)
+
+    arquivos = []
+    if ctx.config["exportar_consistencia"]:
+        arquivos.append(ctx.salvar(analise_consistencia, "analise_consistencia_estoque"))
+    arquivos.append(ctx.salvar(estoque, "analise_curva_cobertura"))
+    arquivos.append(_salvar_metricas(ctx, metricas))
+    return arquivos
@@ -0,0 +1,220 @@
+import pandas as pd
+
+from etl.agregacao import agregar_em_blocos
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda", "venda_item", "cliente", "loja"]
+
+def _faturamento_anual(df_vendas):
+    """Faturamento anual total, com evolução, quantidade de vendas e ticket médio"""
+    df_anual = df_vendas.groupby(['Ano'])['total_venda'].sum().reset_index()
+    df_anual.rename(columns={'total_venda': 'Total'}, inplace=True)
+
+    # Calcular a evolução percentual anual
+    df_anual['Evolução Total (%)'] = df_anual['Total'].pct_change() * 100
+
+    # Adicionar contagem de vendas
+    df_contagem = df_vendas.groupby(['Ano']).size().reset_index(name='Qtd Produtos')
+    df_anual = df_anual.merge(df_contagem, on='Ano', how='left')
+
+    df_vendas_por_ano = df_vendas.groupby('Ano').size().reset_index(name='Qtd Vendas')
+    df_anual = df_anual.merge(df_vendas_por_ano, on='Ano', how='left')
+
+    # Ticket médio e sua evolução
+    df_anual['Ticket Médio Anual'] = df_anual['Total'] / df_anual['Qtd Vendas']
+    df_anual['Evolução Ticket Médio (%)'] = df_anual['Ticket Médio Anual'].pct_change() * 100
+    return df_anual
+
+def _faturamento_anual_por_tipo(df_vendas, blocos_itens):
+    """
+    Faturamento anual separado em serviços (tipo 'S') e produtos (tipo 'P') dos itens
+
+    Os itens são lidos em blocos (ver ContextoETL.blocos) e somados por ano e
+    tipo bloco a bloco, sem carregar venda_item inteira na memória.
+    """
+    ano_da_venda = df_vendas.drop_duplicates('id_venda').set_index('id_venda')['Ano']
+
+    def _itens_com_ano():
+        for bloco in blocos_itens:
+            bloco['tipo'] = bloco['tipo'].fillna('N/A')
+            bloco['Ano'] = bloco['id_venda'].map(ano_da_venda)
+            bloco['total_item'] = pd.to_numeric(bloco['total_item'], errors='coerce')
+            yield bloco
+
+    # Faturamento e quantidade de itens por ano e tipo
+    df_por_tipo = agregar_em_blocos(_itens_com_ano(), ['Ano', 'tipo'], {
+        'total_item': ('total_item', 'sum'),
+        'quantidade': ('total_item', 'size'),
+    })
+    df_anual_por_tipo = df_por_tipo['total_item'].unstack(fill_value=0)
+    for tipo in ['S', 'P']:
+        if tipo not in df_anual_por_tipo.columns:
+            df_anual_por_tipo[tipo] = 0
+    df_anual_por_tipo.rename(columns={'S': 'Faturamento em Serviços', 'P': 'Faturamento em Produtos'}, inplace=True)
+
+    df_anual_por_tipo['Total'] = df_anual_por_tipo.sum(axis=1)
+
+    for col in ['Faturamento em Serviços', 'Faturamento em Produtos']:
+        df_anual_por_tipo[f'{col} (%)'] = (df_anual_por_tipo[col] / df_anual_por_tipo['Total']) * 100
+    for col in ['Faturamento em Serviços', 'Faturamento em Produtos']:
+        df_anual_por_tipo[f'Evolução {col} (%)'] = df_anual_por_tipo[col].pct_change() * 100
+
+    # Quantidade de itens por tipo
+    df_contagem_por_tipo = df_por_tipo['quantidade'].unstack(fill_value=0)
+    for tipo in ['S', 'P']:
+        if tipo not in df_contagem_por_tipo.columns:
+            df_contagem_por_tipo[tipo] = 0
+    df_contagem_por_tipo.rename(columns={'S': 'Qtd Serviços', 'P': 'Qtd Produtos'}, inplace=True)
+
+    df_anual_por_tipo.reset_index(inplace=True)
+    df_anual_por_tipo = df_anual_por_tipo.merge(df_contagem_por_tipo, on='Ano', how='left')
+    df_anual_por_tipo['Total Itens'] = df_anual_por_tipo[['Qtd Serviços', 'Qtd Produtos']].sum(axis=1)
+
+    # Vendas distintas e ticket médio por ano
+    df_vendas_por_ano = df_vendas.groupby('Ano').size().reset_index(name='Qtd Vendas')
+    df_anual_por_tipo = df_anual_por_tipo.merge(df_vendas_por_ano, on='Ano', how='left')
+    df_anual_por_tipo['Ticket Médio Anual'] = df_anual_por_tipo['Total'] / df_anual_por_tipo['Qtd Vendas']
+    df_anual_por_tipo['Evolução Ticket Médio (%)'] = df_anual_por_tipo['Ticket Médio Anual'].pct_change() * 100
+    return df_anual_por_tipo
+
+def _faturamento_anual_geral(df_vendas, df_clientes):
+    """Faturamento anual de clientes cadastrados (tipo F ou J) e sem cadastro"""
+    df_vendas_com_tipo = df_vendas.merge(df_clientes[['id_cliente', 'tipo']], on='id_cliente', how='left')
+    df_vendas_com_tipo['grupo_cliente'] = df_vendas_com_tipo['tipo'].isin(['F', 'J']).map(
+        {True: 'Cadastrado', False: 'Sem Cadastro'}
+    )
+    df_ano_group = df_vendas_com_tipo.groupby(['Ano', 'grupo_cliente'])['total_venda'].sum().unstack(fill_value=0)
+    df_ano_group.reset_index(inplace=True)
+    return df_ano_group
+
+def _faturamento_mensal(df_vendas):
+    """Faturamento por mês (linhas) e ano (colunas)"""
+    df_pivot = df_vendas.groupby(['Ano', 'Mês'])['total_venda'].sum().reset_index()
+    df_pivot = df_pivot.pivot(index='Mês', columns='Ano', values='total_venda')
+    df_pivot.reset_index(inplace=True)
+    return df_pivot
+
+def _faturamento_mensal_lojas(df_vendas, df_lojas):
+    """Faturamento por ano, mês e loja, com o nome da loja"""
+    df_consolidado = df_vendas.groupby(['Ano', 'Mês', 'id_loja'])['total_venda'].sum().reset_index()
+    df_consolidado = df_consolidado[['Mês', 'id_loja', 'total_venda', 'Ano']]
+    return df_consolidado.merge(df_lojas[['id_loja', 'nome']], on='id_loja', how='left')
+
+def _meses_anteriores(data_referencia, quantidade):
+    """(mês, ano) do mês da data de referência e dos anteriores, do mais recente ao mais antigo"""
+    meses = []
+    for i in range(quantidade):
+        mes_ref = data_referencia.month - i
+        ano_ref = data_referencia.year
+        if mes_ref <= 0:
+            mes_ref += 12
+            ano_ref -= 1
+        meses.append((mes_ref, ano_ref))
+    return meses
+
+def _vendas_do_mes(df_vendas, mes, ano):
+    """Vendas de um mês, com a coluna 'Dia'"""
+    mask = (df_vendas['data_venda'].dt.month == mes) & (df_vendas['data_venda'].dt.year == ano)
+    df_mes = df_vendas[mask].copy()
+    df_mes['Dia'] = df_mes['data_venda'].dt.day
+    return df_mes
+
+def _faturamento_diario(df_vendas, data_referencia):
+    """Faturamento diário do mês de referência e dos 3 meses anteriores"""
+    dfs_mensais = []
+    for mes_ref, ano_ref in _meses_anteriores(data_referencia, 4):
+        df_mes = _vendas_do_mes(df_vendas, mes_ref, ano_ref)
+        if df_mes.empty:
+            print(f"Não há dados para {mes_ref}/{ano_ref}")
+            continue
+
+        df_diario = df_mes.groupby('Dia')['total_venda'].sum().reset_index()
+        df_diario['Mês'] = mes_ref
+        df_diario['Ano'] = ano_ref
+        df_diario['Período'] = f"{mes_ref:02d}/{ano_ref}"
+        dfs_mensais.append(df_diario)
+
+    if not dfs_mensais:
+        return None
+    return pd.concat(dfs_mensais, ignore_index=True)
+
+def _faturamento_diario_lojas(df_vendas, df_lojas, data_referencia):
+    """
+    Faturamento diário por loja (linhas) e dia (colunas 1 a 31) do mês de referência
+
+    Sem vendas no mês de referência, usa o mês anterior. Inclui a coluna
+    'total_loja' e a linha 'total' com o total de todas as lojas.
+    """
+    df_mes = None
+    for mes_ref, ano_ref in _meses_anteriores(data_referencia, 2):
+        df_mes = _vendas_do_mes(df_vendas, mes_ref, ano_ref)
+        if not df_mes.empty:
+            break
+        print(f"Não há dados de vendas para {mes_ref}/{ano_ref}")
+    if df_mes is None or df_mes.empty:
+        return None
+
+    df_diario_loja = df_mes.groupby(['id_loja', 'Dia'])['total_venda'].sum().reset_index()
+    df_diario_loja = df_diario_loja.merge(df_lojas[['id_loja', 'nome']], on='id_loja', how='left')
+
+    # Lojas nas linhas e os dias de 1 a 31 nas colunas
+    df_pivot_lojas = df_diario_loja.pivot(index='nome', columns='Dia', values='total_venda')
+    for dia in range(1, 32):
+        if dia not in df_pivot_lojas.columns:
+            df_pivot_lojas[dia] = 0
+    df_pivot_lojas = df_pivot_lojas[sorted(df_pivot_lojas.columns)].fillna(0)
+
+    df_pivot_lojas['total_loja'] = df_pivot_lojas.sum(axis=1)
+    df_pivot_lojas = df_pivot_lojas.sort_values('total_loja', ascending=False)
+
+    # Linha com o total diário de todas as lojas
+    totais_diarios = df_diario_loja.groupby('Dia')['total_venda'].sum()
+    df_pivot_lojas.loc['total'] = pd.Series({dia: totais_diarios.get(dia, 0) for dia in df_pivot_lojas.columns})
+    df_pivot_lojas.loc['total', 'total_loja'] = df_diario_loja['total_venda'].sum()
+
+    return df_pivot_lojas.round(2)
+
+def executar(ctx):
+    """
+    Gera os arquivos faturamento_* do cliente
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    df_vendas = ctx.tabela("venda")
+    df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda'])
+    df_vendas['total_venda'] = pd.to_numeric(df_vendas['total_venda'], errors='coerce')
+    df_vendas['Ano'] = df_vendas['data_venda'].dt.year
+    df_vendas['Mês'] = df_vendas['data_venda'].dt.month
+
+    arquivos = []
+    if ctx.config["faturamento_por_tipo"]:
+        blocos_itens = ctx.blocos("venda_item", colunas=['id_venda', 'tipo', 'total_item'])
+        df_anual = _faturamento_anual_por_tipo(df_vendas, blocos_itens)
+    else:
+        df_anual = _faturamento_anual(df_vendas)
+    arquivos.append(ctx.salvar(df_anual, "faturamento_anual"))
+
+    arquivos.append(ctx.salvar(_faturamento_anual_geral(df_vendas, ctx.tabela("cliente")), "faturamento_anual_geral"))
+    arquivos.append(ctx.salvar(_faturamento_mensal(df_vendas), "faturamento_mensal"))
+
+    if ctx.config["faturamento_lojas"]:
+        df_lojas = ctx.tabela("loja")
+        df_mensal_lojas = _faturamento_mensal_lojas(df_vendas, df_lojas)
+        if not df_mensal_lojas.empty:
+            arquivos.append(ctx.salvar(df_mensal_lojas, "faturamento_mensal_lojas"))
+
+        df_diario_lojas = _faturamento_diario_lojas(df_vendas, df_lojas, ctx.data_referencia)
+        if df_diario_lojas is not None:
+            arquivos.append(ctx.salvar(df_diario_lojas, "faturamento_diario_lojas", index=True))
+
+    df_diario = _faturamento_diario(df_vendas, ctx.data_referencia)
+    if df_diario is not None:
+        arquivos.append(ctx.salvar(df_diario, "faturamento_diario"))
+    else:
+        print("Não há dados para gerar análise de faturamento diário.")
+
+    return arquivos
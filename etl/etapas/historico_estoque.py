@@ -0,0 +1,40 @@
+import pandas as pd
+
+from utils.posicao_estoque import precalcular_historicos_estoque
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["estoque_movimento"]
+
+# Dias de histórico analisados por produto (até o último movimento dele)
+DIAS_ANALISE = 365
+
+def executar(ctx):
+    """
+    Gera historico_estoque.parquet e historico_estoque_metricas.parquet
+
+    Série diária de estoque e métricas de cada produto (mesmo cálculo do
+    detalhe do produto no dashboard, ver precalcular_historicos_estoque). Os
+    arquivos são ordenados por 'id_produto', de modo que o dashboard leia um
+    produto com um filtro do pyarrow, sem carregar o arquivo inteiro.
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    filtros = None
+    if ctx.data_corte is not None:
+        filtros = [('data_movimento', '<=', pd.Timestamp(ctx.data_corte))]
+    df_movimentos = ctx.tabela(
+        "estoque_movimento", colunas=['id_produto', 'data_movimento', 'estoque_depois', 'tipo', 'quantidade'],
+        filtros=filtros
+    )
+    print(f"{len(df_movimentos)} movimentos de {df_movimentos['id_produto'].nunique()} produtos")
+
+    df_series, df_metricas = precalcular_historicos_estoque(df_movimentos, DIAS_ANALISE)
+    print(f"Históricos gerados: {len(df_metricas)} produtos, {len(df_series)} dias")
+    return [
+        ctx.salvar(df_series, "historico_estoque", formato="parquet"),
+        ctx.salvar(df_metricas, "historico_estoque_metricas", formato="parquet"),
+    ]
@@ -0,0 +1,205 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from etl.agregacao import ultimos_registros_em_blocos
+from etl.extracao import COLUNA_MARCA
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda", "venda_item", "produto", "categoria", "estoque_movimento", "compra", "compra_item",
+           "fornecedor"]
+
+# Ordem de exibição dos níveis de criticidade (mais crítico primeiro)
+ORDEM_CRITICIDADE = {
+    "CRÍTICO": 1,
+    "MUITO BAIXO": 2,
+    "BAIXO": 3,
+    "ADEQUADO": 4,
+    "EXCESSO": 5
+}
+
+# Prefixo das colunas de cada uma das últimas compras do produto (da mais recente para a mais antiga)
+PREFIXOS_COMPRAS = [
+    ('ultimo', 'ultima'),
+    ('penultimo', 'penultima'),
+    ('antepenultimo', 'antepenultima'),
+]
+
+COLUNAS_FINAIS = [
+    'id_produto', 'nome_produto', 'id_categoria', 'nome_categoria', 'estoque_atual', 'media_12m_qtd', 'media_3m',
+    'cobertura_meses', 'cobertura_dias', 'cobertura_percentual_30d', 'criticidade',
+    'sugestao_1m', 'valor_estimado_compra_1m', 'sugestao_3m', 'valor_estimado_compra_3m',
+    'ultimo_preco_compra', 'ultima_qtd_comprada', 'ultimo_fornecedor', 'data_ultima_compra',
+    'penultimo_preco_compra', 'penultima_qtd_comprada', 'penultimo_fornecedor', 'data_penultima_compra',
+    'antepenultimo_preco_compra', 'antepenultima_qtd_comprada', 'antepenultimo_fornecedor', 'data_antepenultima_compra',
+    'data_ultima_movimentacao', 'transacoes_12m', 'quantidade_total_12m', 'valor_total_12m',
+    'prazo_reposicao_dias', 'critico'
+]
+
+COLUNAS_ARREDONDADAS = ['media_12m_qtd', 'media_3m', 'cobertura_meses', 'cobertura_dias', 'cobertura_percentual_30d',
+                        'valor_estimado_compra_3m', 'valor_estimado_compra_1m']
+
+def classificar_criticidade(cobertura_meses):
+    """Nível de criticidade pela cobertura do estoque (em meses de consumo médio)"""
+    return pd.Series(np.select(
+        [cobertura_meses < 0.3, cobertura_meses < 0.5, cobertura_meses < 0.8, cobertura_meses <= 1.0],
+        ["CRÍTICO", "MUITO BAIXO", "BAIXO", "ADEQUADO"],
+        default="EXCESSO"
+    ), index=cobertura_meses.index)
+
+def _sugestao_compra(media_mensal, estoque_atual, meses):
+    """Quantidade a comprar para cobrir 'meses' de consumo médio (0 sem consumo)"""
+    sugestao = np.ceil(np.maximum(0, meses * media_mensal - estoque_atual))
+    return sugestao.where(media_mensal > 0, 0)
+
+def ultimas_compras(df_compras, df_compra_itens, df_fornecedores):
+    """
+    Preço, quantidade, fornecedor e data das três compras mais recentes de cada produto
+
+    Returns:
+        DataFrame indexado por id_produto com as colunas ultimo_*, penultimo_* e antepenultimo_*
+    """
+    historico = df_compra_itens[['id_compra', 'id_produto', 'preco_bruto', 'quantidade']].merge(
+        df_compras[['id_compra', 'id_fornecedor', 'data_compra']], on='id_compra', how='left'
+    )
+    historico['id_fornecedor'] = historico['id_fornecedor'].fillna(0).astype(int)
+    fornecedores = df_fornecedores.drop_duplicates('id_fornecedor').set_index('id_fornecedor')['nome']
+    historico['nome_fornecedor'] = historico['id_fornecedor'].map(fornecedores)
+
+    historico = historico.sort_values(['id_produto', 'data_compra'], ascending=[True, False], kind='stable')
+    historico['posicao'] = historico.groupby('id_produto').cumcount()
+
+    partes = []
+    for posicao, (masculino, feminino) in enumerate(PREFIXOS_COMPRAS):
+        compras = historico[historico['posicao'] == posicao].set_index('id_produto')
+        partes.append(pd.DataFrame({
+            f'{masculino}_preco_compra': compras['preco_bruto'],
+            f'data_{feminino}_compra': compras['data_compra'],
+            f'{masculino}_fornecedor': compras['nome_fornecedor'],
+            f'{feminino}_qtd_comprada': compras['quantidade'],
+        }))
+    return pd.concat(partes, axis=1)
+
+def calcular_metricas_compra(df_vendas, df_venda_itens, df_produtos, df_categorias, df_estoque_movimento,
+                             df_compras, df_compra_itens, df_fornecedores, data_referencia):
+    """
+    Consumo, cobertura de estoque, criticidade e sugestão de compra dos produtos vendidos nos últimos 12 meses
+
+    Returns:
+        DataFrame no layout de metricas_de_compra, ordenado por criticidade
+    """
+    df_produtos = df_produtos.rename(columns={'nome': 'nome_produto'})
+    df_produtos['preco_custo'] = pd.to_numeric(df_produtos['preco_custo'], errors='coerce')
+
+    df_vendas = df_vendas[['id_venda', 'data_venda']].copy()
+    df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda'])
+    df_itens = df_venda_itens[['id_venda', 'id_produto', 'quantidade', 'total_item']].merge(df_vendas, on='id_venda', how='left')
+    for col in ['quantidade', 'total_item']:
+        df_itens[col] = pd.to_numeric(df_itens[col], errors='coerce')
+
+    df_vendas_1ano = df_itens[df_itens['data_venda'] >= data_referencia - timedelta(days=364)].copy()
+    print(f"Vendas no último ano: {len(df_vendas_1ano)} registros")
+
+    df_recomendacao = df_vendas_1ano.groupby('id_produto').agg(
+        quantidade_total_12m=('quantidade', 'sum'),
+        valor_total_12m=('total_item', 'sum'),
+        transacoes_12m=('id_venda', 'nunique')
+    ).reset_index()
+    df_recomendacao['media_12m_qtd'] = df_recomendacao['quantidade_total_12m'] / 12
+    df_recomendacao['media_mensal_valor'] = df_recomendacao['valor_total_12m'] / 12
+
+    # Consumo mensal (colunas qtd_vendas_AAAA-MM)
+    df_vendas_1ano['mes_ano'] = df_vendas_1ano['data_venda'].dt.strftime('%Y-%m')
+    meses_ordenados = sorted(df_vendas_1ano['mes_ano'].unique())
+    consumo_mensal = df_vendas_1ano.pivot_table(
+        index='id_produto', columns='mes_ano', values='quantidade', aggfunc='sum', fill_value=0
+    )
+    consumo_mensal.columns = [f'qtd_vendas_{mes}' for mes in consumo_mensal.columns]
+
+    # Estoque atual: saldo da última movimentação do produto
+    df_estoque_atual = (
+        df_estoque_movimento.sort_values('data_movimento', ascending=False, kind='stable')
+        .drop_duplicates(subset=['id_produto'])
+        .set_index('id_produto')
+    )
+    df_recomendacao['estoque_atual'] = df_recomendacao['id_produto'].map(
+        pd.to_numeric(df_estoque_atual['estoque_depois'], errors='coerce')
+    ).fillna(0)
+    df_recomendacao['data_ultima_movimentacao'] = df_recomendacao['id_produto'].map(df_estoque_atual['data_movimento'])
+
+    df_recomendacao = df_recomendacao.merge(
+        df_produtos[['id_produto', 'nome_produto', 'preco_custo', 'prazo_reposicao_dias', 'id_categoria']],
+        on='id_produto', how='left'
+    )
+    df_recomendacao = df_recomendacao.merge(df_categorias[['id_categoria', 'nome_categoria']], on='id_categoria', how='left')
+
+    # Cobertura em meses de consumo médio (infinita com estoque e sem consumo)
+    estoque, media = df_recomendacao['estoque_atual'], df_recomendacao['media_12m_qtd']
+    cobertura = (estoque / media.where(media > 0)).fillna(np.inf)
+    df_recomendacao['cobertura_meses'] = cobertura.where(estoque > 0, 0)
+    df_recomendacao['cobertura_dias'] = df_recomendacao['cobertura_meses'] * 30
+    df_recomendacao['cobertura_percentual_30d'] = df_recomendacao['cobertura_meses'] * 100
+
+    df_recomendacao['sugestao_3m'] = _sugestao_compra(media, estoque, 3)
+    df_recomendacao['sugestao_1m'] = _sugestao_compra(media, estoque, 1)
+    df_recomendacao['valor_estimado_compra_3m'] = df_recomendacao['sugestao_3m'] * df_recomendacao['preco_custo']
+    df_recomendacao['valor_estimado_compra_1m'] = df_recomendacao['sugestao_1m'] * df_recomendacao['preco_custo']
+    df_recomendacao['criticidade'] = classificar_criticidade(df_recomendacao['cobertura_meses'])
+
+    compras = ultimas_compras(df_compras, df_compra_itens, df_fornecedores)
+    df_recomendacao = df_recomendacao.merge(compras, left_on='id_produto', right_index=True, how='left')
+
+    df_recomendacao = df_recomendacao.merge(consumo_mensal, left_on='id_produto', right_index=True, how='left')
+    colunas_consumo = [col for col in df_recomendacao.columns if col.startswith('qtd_vendas_')]
+    df_recomendacao[colunas_consumo] = df_recomendacao[colunas_consumo].fillna(0)
+
+    # Média dos últimos 3 meses com venda registrada
+    if len(meses_ordenados) >= 3:
+        colunas_3m = [f'qtd_vendas_{mes}' for mes in meses_ordenados[-3:]]
+        df_recomendacao['media_3m'] = (df_recomendacao[colunas_3m].sum(axis=1) / 3).round(2)
+    else:
+        df_recomendacao['media_3m'] = df_recomendacao['media_12m_qtd']
+
+    df_recomendacao['ordem_criticidade'] = df_recomendacao['criticidade'].map(ORDEM_CRITICIDADE)
+    df_recomendacao = df_recomendacao.sort_values('ordem_criticidade', kind='stable')
+    df_recomendacao['critico'] = df_recomendacao['prazo_reposicao_dias'] >= 30
+
+    colunas = [col for col in COLUNAS_FINAIS + sorted(colunas_consumo) if col in df_recomendacao.columns]
+    df_final = df_recomendacao[colunas].copy()
+    for col in COLUNAS_ARREDONDADAS:
+        df_final[col] = df_final[col].round(2)
+    return df_final
+
+def executar(ctx):
+    """
+    Gera o arquivo metricas_de_compra
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    # Só as vendas dos últimos 12 meses são lidas (a marca de venda_item é a data da venda)
+    inicio = ctx.data_referencia - timedelta(days=364)
+    df_vendas = ctx.tabela("venda", colunas=['id_venda', 'data_venda'], filtros=[('data_venda', '>=', inicio)])
+    df_venda_itens = ctx.tabela(
+        "venda_item", colunas=['id_venda', 'id_produto', 'quantidade', 'total_item'], filtros=[(COLUNA_MARCA, '>=', inicio)]
+    )
+    # Da movimentação, apenas a última de cada produto
+    df_estoque_movimento = ultimos_registros_em_blocos(
+        ctx.blocos("estoque_movimento", colunas=['id_produto', 'data_movimento', 'estoque_depois']),
+        ['id_produto'], ['data_movimento']
+    )
+
+    df_final = calcular_metricas_compra(
+        df_vendas, df_venda_itens, ctx.tabela("produto"), ctx.tabela("categoria"),
+        df_estoque_movimento, ctx.tabela("compra"), ctx.tabela("compra_item"), ctx.tabela("fornecedor"),
+        ctx.data_referencia
+    )
+
+    resumo = df_final['criticidade'].value_counts()
+    for nivel in sorted(resumo.index, key=lambda nivel: ORDEM_CRITICIDADE.get(nivel, 999)):
+        print(f"- {nivel}: {resumo[nivel]} produtos")
+    return [ctx.salvar(df_final, "metricas_de_compra", formato="csv")]
@@ -0,0 +1,241 @@
+import re
+
+import pandas as pd
+from openpyxl.formatting.rule import Rule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.styles.differential import DifferentialStyle
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda", "cliente"]
+
+# Mínimo de pedidos para analisar o padrão de compra de um cliente
+MINIMO_PEDIDOS = 6
+
+def classificar_padrao_compra(df_cliente):
+    """
+    Analisa o padrão de compras e classifica em categorias pré-definidas.
+    Requer no mínimo 6 pedidos para fazer a análise.
+    """
+    total_pedidos = len(df_cliente)
+    if total_pedidos < MINIMO_PEDIDOS:
+        return "Histórico insuficiente (menos de 6 pedidos)"
+
+    df_cliente = df_cliente.sort_values('data_venda')
+    dias_ate_proxima = (df_cliente['data_venda'].shift(-1) - df_cliente['data_venda']).dt.days
+
+    media_dias = dias_ate_proxima.mean()
+
+    # Compras por dia da semana
+    compras_por_dia = df_cliente['data_venda'].dt.dayofweek.value_counts()
+    dias_uteis_com_compra = compras_por_dia[compras_por_dia.index < 5].count()
+
+    periodo_total_dias = (df_cliente['data_venda'].max() - df_cliente['data_venda'].min()).days
+    if periodo_total_dias < 30:
+        return "Histórico insuficiente (período menor que 30 dias)"
+
+    compras_por_semana = (total_pedidos * 7) / periodo_total_dias
+
+    # Regularidade (desvio padrão dos intervalos)
+    regularidade = dias_ate_proxima.std()
+
+    if compras_por_semana >= 4 and dias_uteis_com_compra >= 4:
+        padrao = "diário - todos os dias úteis"
+    elif compras_por_semana >= 3:
+        padrao = "3x por semana"
+    elif compras_por_semana >= 2:
+        padrao = "2x por semana"
+    elif compras_por_semana >= 0.8:
+        padrao = "1x por semana"
+    elif media_dias <= 20:
+        padrao = "2x por quinzena"
+    elif media_dias <= 35:
+        padrao = "1x por quinzena" if regularidade <= 7 else "1x por mês"
+    elif media_dias <= 75:
+        padrao = "1x a cada 2 meses"
+    elif media_dias <= 105:
+        padrao = "1x a cada 3 meses"
+    elif media_dias <= 135:
+        padrao = "1x a cada 4 meses"
+    elif media_dias <= 165:
+        padrao = "1x a cada 5 meses"
+    elif media_dias <= 195:
+        padrao = "1x a cada 6 meses"
+    else:
+        padrao = f"1x a cada {round(media_dias/30)} meses"
+
+    if regularidade < media_dias * 0.2:
+        consistencia = "muito regular"
+    elif regularidade < media_dias * 0.4:
+        consistencia = "regular"
+    else:
+        consistencia = "irregular"
+
+    # Preferência por quinzena
+    compras_q1 = int((df_cliente['data_venda'].dt.day <= 15).sum())
+    compras_q2 = total_pedidos - compras_q1
+    if abs(compras_q1 - compras_q2) > total_pedidos * 0.3:
+        quinzena_preferida = " (preferencialmente na " + ("1ª" if compras_q1 > compras_q2 else "2ª") + " quinzena)"
+    else:
+        quinzena_preferida = ""
+
+    return f"{padrao} - {consistencia}{quinzena_preferida}"
+
+def analisar_cliente(df_cliente):
+    """
+    Probabilidade de compra em cada quinzena do mês nos últimos 6 meses de histórico do cliente
+
+    Returns:
+        Dicionário com 'q1_prob', 'q2_prob', 'total_compras' e 'regularidade',
+        ou None com menos de 3 meses de histórico
+    """
+    datas = df_cliente['data_venda']
+    quinzena_id = datas.dt.to_period('M').astype(str) + '_Q' + (datas.dt.day > 15).map({False: '1', True: '2'})
+    quinzenas_com_compra = set(quinzena_id)
+
+    # Todas as quinzenas entre a primeira e a última compra
+    todas_quinzenas = []
+    for data in pd.date_range(start=datas.min(), end=datas.max(), freq='MS'):
+        ano_mes = data.strftime('%Y-%m')
+        todas_quinzenas.extend([f'{ano_mes}_Q1', f'{ano_mes}_Q2'])
+
+    if len(todas_quinzenas) < 6:  # Mínimo de 3 meses de histórico
+        return None
+
+    # Últimas 12 quinzenas (6 meses)
+    ultimos_6m = pd.DataFrame({'quinzena_id': todas_quinzenas[-12:]})
+    ultimos_6m['comprou'] = ultimos_6m['quinzena_id'].isin(quinzenas_com_compra).astype(float)
+    q1_recente = ultimos_6m.loc[ultimos_6m['quinzena_id'].str.endswith('_Q1'), 'comprou'].mean()
+    q2_recente = ultimos_6m.loc[ultimos_6m['quinzena_id'].str.endswith('_Q2'), 'comprou'].mean()
+
+    return {
+        'q1_prob': q1_recente,
+        'q2_prob': q2_recente,
+        'total_compras': len(df_cliente),
+        'regularidade': max(q1_recente, q2_recente)
+    }
+
+def estimar_proxima_compra(padrao, ultima_data, data_referencia):
+    """Data estimada da próxima compra pelo padrão, ou 'INATIVO'"""
+    # Inativo: mais de 6 meses sem comprar
+    meses_sem_compra = (data_referencia - ultima_data).days / 30
+    if meses_sem_compra > 6:
+        return "INATIVO"
+
+    padrao = padrao.lower()
+    intervalos = [
+        ('diário', pd.Timedelta(days=1)),
+        ('3x por semana', pd.Timedelta(days=2)),
+        ('2x por semana', pd.Timedelta(days=3)),
+        ('1x por semana', pd.Timedelta(days=7)),
+        ('2x por quinzena', pd.Timedelta(days=15)),
+        ('1x por quinzena', pd.Timedelta(days=15)),
+        ('1x por mês', pd.DateOffset(months=1)),
+    ] + [(f'cada {meses} meses', pd.DateOffset(months=meses)) for meses in range(2, 7)]
+    for trecho, intervalo in intervalos:
+        if trecho in padrao:
+            return ultima_data + intervalo
+
+    # Intervalos maiores que 6 meses contam como inativo
+    match = re.search(r'cada (\d+) meses', padrao)
+    if match and int(match.group(1)) <= 6:
+        return ultima_data + pd.DateOffset(months=int(match.group(1)))
+    return "INATIVO"
+
+def determinar_situacao(ultima_compra, proxima_compra, data_referencia):
+    """Situação do cliente ('ATIVO' ou 'INATIVO - N meses sem comprar')"""
+    if isinstance(proxima_compra, str) and proxima_compra == "INATIVO":
+        meses_sem_compra = (data_referencia - ultima_compra).days / 30
+        return f"INATIVO - {meses_sem_compra:.1f} meses sem comprar"
+    return "ATIVO"
+
+def calcular_resumo_clientes(df_vendas, df_clientes, data_referencia):
+    """
+    Resumo por cliente com padrão de compra, probabilidades e próxima compra estimada
+
+    Analisa apenas clientes com pelo menos MINIMO_PEDIDOS compras.
+
+    Returns:
+        DataFrame no layout da aba Resumo_por_Cliente de previsao_retorno
+    """
+    contagem_compras = df_vendas.groupby('id_cliente').size()
+    clientes_validos = contagem_compras[contagem_compras >= MINIMO_PEDIDOS].index
+    print(f"Total de clientes na base: {df_vendas['id_cliente'].nunique()}")
+    print(f"Clientes com {MINIMO_PEDIDOS} ou mais pedidos: {len(clientes_validos)}")
+
+    linhas = []
+    vendas_validas = df_vendas[df_vendas['id_cliente'].isin(clientes_validos)]
+    for cliente_id, df_cliente in vendas_validas.groupby('id_cliente'):
+        padrao = classificar_padrao_compra(df_cliente)
+        analise = analisar_cliente(df_cliente)
+        if analise is None:
+            continue
+
+        probabilidades = pd.Series([analise['q1_prob'], analise['q2_prob']]).fillna(0)
+        linhas.append({
+            'cliente_id': cliente_id,
+            'prob_media': probabilidades.mean(),
+            'prob_minima': probabilidades.min(),
+            'prob_maxima': probabilidades.max(),
+            'total_compras_historico': analise['total_compras'],
+            'regularidade': analise['regularidade'],
+            'padrao_compra': padrao
+        })
+
+    colunas = ['cliente_id', 'prob_media', 'prob_minima', 'prob_maxima',
+               'total_compras_historico', 'regularidade', 'padrao_compra']
+    resumo_cliente = pd.DataFrame(linhas, columns=colunas)
+
+    ultimas_compras = df_vendas.groupby('id_cliente')['data_venda'].max().reset_index()
+    ultimas_compras.columns = ['cliente_id', 'ultima_compra']
+    resumo_cliente = pd.merge(resumo_cliente, ultimas_compras, on='cliente_id', how='left')
+
+    resumo_cliente['proxima_compra'] = [
+        estimar_proxima_compra(padrao, ultima, data_referencia)
+        for padrao, ultima in zip(resumo_cliente['padrao_compra'], resumo_cliente['ultima_compra'])
+    ]
+    resumo_cliente['situacao'] = [
+        determinar_situacao(ultima, proxima, data_referencia)
+        for ultima, proxima in zip(resumo_cliente['ultima_compra'], resumo_cliente['proxima_compra'])
+    ]
+
+    resumo_cliente.rename(columns={'cliente_id': 'id_cliente'}, inplace=True)
+    resumo_cliente = pd.merge(resumo_cliente, df_clientes[['id_cliente', 'nome']], on='id_cliente', how='left')
+    for col in ['prob_media', 'prob_minima', 'prob_maxima', 'regularidade']:
+        resumo_cliente[col] = resumo_cliente[col].round(2)
+    return resumo_cliente
+
+def _formatar_resumo(worksheet):
+    """Formatos de percentual e data, larguras e cores da situação na aba Resumo_por_Cliente"""
+    larguras = {'B': 12, 'C': 12, 'D': 12, 'F': 12, 'G': 50, 'H': 12, 'I': 12, 'J': 30}
+    for coluna, largura in larguras.items():
+        worksheet.column_dimensions[coluna].width = largura
+
+    formatos = {'B': '0.0%', 'C': '0.0%', 'D': '0.0%', 'F': '0.0%', 'H': 'dd/mm/yyyy', 'I': 'dd/mm/yyyy'}
+    for linha in worksheet.iter_rows(min_row=2):
+        for celula in linha:
+            formato = formatos.get(celula.column_letter)
+            if formato:
+                celula.number_format = formato
+
+    inativo = DifferentialStyle(fill=PatternFill(bgColor='FFC7CE'), font=Font(color='9C0006'))
+    ativo = DifferentialStyle(fill=PatternFill(bgColor='C6EFCE'), font=Font(color='006100'))
+    for texto, estilo in [('INATIVO', inativo), ('ATIVO', ativo)]:
+        regra = Rule(type='containsText', operator='containsText', text=texto, dxf=estilo)
+        regra.formula = [f'NOT(ISERROR(SEARCH("{texto}",J2)))']
+        worksheet.conditional_formatting.add('J2:J1048576', regra)
+
+def executar(ctx):
+    """
+    Gera o arquivo previsao_retorno (aba Resumo_por_Cliente)
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    df_vendas = ctx.tabela("venda")
+    df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda'])
+
+    resumo_cliente = calcular_resumo_clientes(df_vendas, ctx.tabela("cliente"), pd.Timestamp(ctx.data_referencia))
+    return [ctx.salvar(resumo_cliente, "previsao_retorno", sheet_name='Resumo_por_Cliente', ajustar_planilha=_formatar_resumo)]
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from utils.recorrencia import calcular_metricas_recorrencia, calcular_retencao_coorte
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda"]
+
+def executar(ctx):
+    """
+    Gera metricas_recorrencia_{mensal,trimestral,anual} e metricas_retencao_anual
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    df_vendas = ctx.tabela("venda")
+    df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda'])
+
+    arquivos = []
+    metricas = calcular_metricas_recorrencia(df_vendas)
+    for granularidade, df in metricas.items():
+        arquivos.append(ctx.salvar(df, f"metricas_recorrencia_{granularidade}"))
+
+    mensal = metricas['mensal']
+    if not mensal.empty:
+        print(f"Taxa média de retenção mensal: {mensal['retention_rate'].mean():.1f}%")
+
+    # Retenção por coorte anual (ano da primeira compra)
+    cohort_data = calcular_retencao_coorte(df_vendas, 'anual')
+    arquivos.append(ctx.salvar(cohort_data, "metricas_retencao_anual"))
+    return arquivos
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from etl.agregacao import agregar_em_blocos
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda", "cliente", "cliente_pessoa_fisica", "cliente_pessoa_juridica"]
+
+# Segmentos na ordem de prioridade das regras (o primeiro que se aplica vale)
+SEGMENTOS = [
+    'Novos',
+    'Campeões',
+    'Fiéis Baixo Valor',
+    'Fiéis Alto Valor',
+    'Recentes Alto Valor',
+    'Recentes Baixo Valor',
+    'Sumidos',
+    'Inativos'
+]
+
+def calcular_rfma(blocos_vendas):
+    """
+    Calcula Recency, Frequency, Monetary e Age de cada cliente
+
+    Recency e Age são os dias desde a última e a primeira compra, em relação
+    à venda mais recente da base. As vendas são agregadas bloco a bloco (ver
+    etl.agregacao); Frequency conta as vendas de cada cliente, que são
+    distintas por ser id_venda a chave de venda.
+
+    Args:
+        blocos_vendas: Iterável de DataFrames (ou um DataFrame) de vendas com
+            'id_cliente', 'id_venda', 'data_venda' e 'total_venda'
+
+    Returns:
+        DataFrame com 'id_cliente', 'Recency', 'Frequency', 'Monetary' e 'Age' (float)
+    """
+    if isinstance(blocos_vendas, pd.DataFrame):
+        blocos_vendas = [blocos_vendas]
+    por_cliente = agregar_em_blocos(blocos_vendas, ['id_cliente'], {
+        'ultima_compra': ('data_venda', 'max'),
+        'primeira_compra': ('data_venda', 'min'),
+        'Frequency': ('id_venda', 'count'),
+        'Monetary': ('total_venda', 'sum'),
+    })
+    data_referencia = por_cliente['ultima_compra'].max()
+
+    rfma = pd.DataFrame({
+        'Recency': (data_referencia - por_cliente['ultima_compra']).dt.days,
+        'Frequency': por_cliente['Frequency'],
+        'Monetary': por_cliente['Monetary'],
+        'Age': (data_referencia - por_cliente['primeira_compra']).dt.days
+    }).reset_index()
+
+    for col in ['Recency', 'Frequency', 'Monetary', 'Age']:
+        rfma[col] = rfma[col].astype(float)
+    return rfma
+
+def _decis(valores, invertido=False):
+    """Decil (1 a 10, ou menos quando há quantis repetidos) e faixa de valores de cada cliente"""
+    _, bins = pd.qcut(valores, q=10, duplicates='drop', retbins=True)
+    labels = list(range(len(bins) - 1, 0, -1)) if invertido else list(range(1, len(bins)))
+    decil = pd.qcut(valores, q=10, labels=labels, duplicates='drop')
+    faixa = pd.cut(
+        valores,
+        bins=bins,
+        labels=[f"{bins[i]:.1f}-{bins[i+1]:.1f}" for i in range(len(bins) - 1)],
+        include_lowest=True
+    )
+    return decil, faixa
+
+def adicionar_decis(rfma):
+    """Adiciona R/F/M/A_decil e R/F/M/A_range (Recency com decis em ordem inversa)"""
+    rfma = rfma.copy()
+    for metrica, prefixo in [('Recency', 'R'), ('Frequency', 'F'), ('Monetary', 'M'), ('Age', 'A')]:
+        decil, faixa = _decis(rfma[metrica], invertido=(metrica == 'Recency'))
+        rfma[f'{prefixo}_decil'] = decil
+        rfma[f'{prefixo}_range'] = faixa
+
+    # Mesma ordem de colunas dos arquivos gerados pelos scripts por cliente
+    colunas = ['id_cliente', 'Recency', 'Frequency', 'Monetary', 'Age',
+               'R_decil', 'F_decil', 'M_decil', 'A_decil', 'R_range', 'F_range', 'M_range', 'A_range']
+    return rfma[colunas]
+
+def segmentar_clientes(df, regras):
+    """
+    Segmenta os clientes pelas regras RFMA do cliente
+
+    Args:
+        df (DataFrame): Resultado de adicionar_decis
+        regras (dict): Limites da segmentação (ver REGRAS_SEGMENTACAO_* em etl.config)
+
+    Returns:
+        Cópia do DataFrame com a coluna 'Segmento'
+    """
+    df_seg = df.copy()
+    recency, frequency, age = df_seg['Recency'], df_seg['Frequency'], df_seg['Age']
+    m_decil = df_seg['M_decil'].astype(float)
+
+    ativo = recency <= regras["recencia_ativo"]
+    fiel = ativo & (age >= 730) & (frequency >= regras["frequencia_fieis"])
+    if regras["recentes_baixo_inclui_limite"]:
+        recente_baixo_valor = m_decil <= regras["decil_recentes_baixo_valor"]
+    else:
+        recente_baixo_valor = m_decil < regras["decil_recentes_baixo_valor"]
+    if regras["sumidos_inclui_limite"]:
+        sumido = (recency >= regras["recencia_ativo"]) & (recency < regras["recencia_inativo"])
+        inativo = recency >= regras["recencia_inativo"]
+    else:
+        sumido = (recency > regras["recencia_ativo"]) & (recency <= regras["recencia_inativo"])
+        inativo = recency > regras["recencia_inativo"]
+
+    conditions = [
+        (recency <= 30) & (age <= 30),
+        (recency <= regras["recencia_campeoes"]) & (frequency >= regras["frequencia_campeoes"]) & (m_decil == 10),
+        fiel & (m_decil <= regras["decil_fieis_baixo_valor"]),
+        fiel & (m_decil > regras["decil_fieis_baixo_valor"]),
+        ativo & (frequency >= 1) & ~recente_baixo_valor,
+        ativo & (frequency >= 1) & recente_baixo_valor,
+        sumido,
+        inativo
+    ]
+    df_seg['Segmento'] = np.select(conditions, SEGMENTOS, default='Não Classificado')
+    return df_seg
+
+def executar(ctx):
+    """
+    Gera o arquivo analytics_cliente (segmentação RFMA usada no dashboard)
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    df_clientes = ctx.tabela("cliente")
+    blocos_vendas = ctx.blocos("venda", colunas=['id_venda', 'id_cliente', 'data_venda', 'total_venda'])
+
+    if ctx.config["somente_pf"]:
+        clientes_pf = df_clientes.loc[df_clientes['tipo'] == 'F', 'id_cliente']
+        blocos_vendas = (bloco[bloco['id_cliente'].isin(clientes_pf)] for bloco in blocos_vendas)
+
+    rfma = calcular_rfma(blocos_vendas)
+    if ctx.config["somente_pf"]:
+        print(f"Número de Clientes PF: {len(rfma)}")
+
+    rfma = adicionar_decis(rfma)
+    rfma_segmentado = segmentar_clientes(rfma, ctx.config["regras_segmentacao"])
+    print(rfma_segmentado['Segmento'].value_counts().to_string())
+
+    # Documentos e contato de cada cliente
+    rfma_segmentado = rfma_segmentado.merge(ctx.tabela("cliente_pessoa_fisica")[['id_cliente', 'cpf']], on='id_cliente', how='left')
+    rfma_segmentado = rfma_segmentado.merge(ctx.tabela("cliente_pessoa_juridica")[['id_cliente', 'cnpj']], on='id_cliente', how='left')
+    rfma_segmentado = rfma_segmentado.merge(df_clientes[['id_cliente', 'nome', 'email', 'telefone']], on='id_cliente', how='left')
+
+    arquivos = [ctx.salvar(rfma_segmentado, "analytics_cliente", formato="csv")]
+
+    if ctx.config["publicar_segmentacao"]:
+        ctx.publicar(rfma_segmentado, "segmentacao")
+    return arquivos
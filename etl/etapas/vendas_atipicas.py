@@ -0,0 +1,129 @@
+import pandas as pd
+
+from etl.agregacao import ultimos_registros_em_blocos
+from etl.extracao import COLUNA_MARCA
+
+# Tabelas de maloka_core usadas pela etapa (extraídas antes da execução)
+TABELAS = ["venda", "venda_item", "produto", "cliente", "estoque_movimento"]
+
+# Z-score acima do qual uma venda é atípica
+LIMIAR_Z_SCORE = 3
+
+# Vendas atípicas reportadas: as dos últimos N dias
+DIAS_RECENTES = 15
+
+COLUNAS_RELATORIO = ["data", "quantidade_atipica", "cliente", "id_venda", "id_produto", "produto",
+                     "estoque_atualizado", "media_vendas", "desvio_padrao"]
+
+def identificar_vendas_atipicas(df_vendas, df_venda_itens, data_referencia):
+    """
+    Vendas recentes com quantidade atípica para o produto
+
+    As vendas do último ano são somadas por produto, dia e cliente; cada
+    soma é comparada à média e ao desvio padrão do próprio produto e é
+    atípica quando o z-score passa de LIMIAR_Z_SCORE. Produtos sem variação
+    são ignorados. Média e desvio são calculados por grupo de uma vez, em vez
+    de filtrar as vendas produto a produto.
+
+    Returns:
+        DataFrame com 'id_produto', 'data_venda', 'id_cliente', 'quantidade',
+        'id_venda', 'media' e 'desvio' das vendas atípicas dos últimos DIAS_RECENTES dias
+    """
+    df_vendas = df_vendas[['id_venda', 'data_venda', 'id_cliente']].copy()
+    df_vendas['id_venda'] = df_vendas['id_venda'].astype(str)
+    df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda'])
+    df_venda_itens = df_venda_itens[['id_venda', 'id_produto', 'quantidade']].copy()
+    df_venda_itens['id_venda'] = df_venda_itens['id_venda'].astype(str)
+    df_venda_itens['quantidade'] = pd.to_numeric(df_venda_itens['quantidade'], errors='coerce')
+
+    df = df_venda_itens.merge(df_vendas, on='id_venda', how='left')
+
+    # Vendas do último ano
+    hoje = pd.Timestamp(data_referencia)
+    df = df[(df['data_venda'] >= hoje - pd.DateOffset(years=1)) & (df['data_venda'] < hoje)]
+    df = df.sort_values('data_venda', kind='stable')
+
+    vendas = df.groupby(['id_produto', 'data_venda', 'id_cliente'], as_index=False).agg(
+        quantidade=('quantidade', 'sum'),
+        id_venda=('id_venda', 'first')
+    )
+
+    por_produto = vendas.groupby('id_produto')['quantidade']
+    vendas['media'] = por_produto.transform('mean')
+    vendas['desvio'] = por_produto.transform('std')
+
+    com_variacao = vendas['desvio'].notna() & (vendas['desvio'] != 0)
+    vendas = vendas[com_variacao]
+    z_score = (vendas['quantidade'] - vendas['media']) / vendas['desvio']
+
+    recentes = vendas['data_venda'] >= hoje - pd.DateOffset(days=DIAS_RECENTES)
+    return vendas[(z_score > LIMIAR_Z_SCORE) & recentes]
+
+def gerar_relatorio(atipicas, df_produtos, df_clientes, df_estoque_movimento):
+    """
+    Relatório de vendas atípicas com nome do produto, cliente e estoque atual
+
+    Produtos fora do cadastro ficam de fora; o estoque é o da última
+    movimentação do produto (0 sem movimentação).
+    """
+    if atipicas.empty:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+
+    produtos = df_produtos.drop_duplicates('id_produto').set_index('id_produto')['nome']
+    clientes = df_clientes.drop_duplicates('id_cliente').set_index('id_cliente')['nome']
+    estoque = (
+        df_estoque_movimento.sort_values('data_movimento', ascending=False, kind='stable')
+        .drop_duplicates('id_produto')
+        .set_index('id_produto')['estoque_depois']
+    )
+
+    atipicas = atipicas[atipicas['id_produto'].isin(produtos.index)]
+    df_r = pd.DataFrame({
+        'data': atipicas['data_venda'],
+        'quantidade_atipica': atipicas['quantidade'],
+        'cliente': atipicas['id_cliente'].map(clientes).fillna("Cliente não identificado").astype(str),
+        'id_venda': atipicas['id_venda'],
+        'id_produto': atipicas['id_produto'],
+        'produto': atipicas['id_produto'].map(produtos),
+        'estoque_atualizado': atipicas['id_produto'].map(estoque).fillna(0),
+        'media_vendas': atipicas['media'].round(2),
+        'desvio_padrao': atipicas['desvio'].round(2)
+    })
+    df_r = df_r.sort_values('data', kind='stable')
+    df_r['data'] = df_r['data'].dt.strftime('%Y-%m-%d')
+    return df_r.reset_index(drop=True)
+
+def executar(ctx):
+    """
+    Gera o arquivo vendas_atipicas
+
+    Args:
+        ctx (ContextoETL): Contexto da execução
+
+    Returns:
+        Lista dos arquivos gravados (vazia quando não há vendas atípicas)
+    """
+    # Só as vendas do último ano são lidas (a marca de venda_item é a data da venda)
+    hoje = pd.Timestamp(ctx.data_referencia)
+    periodo = [('>=', hoje - pd.DateOffset(years=1)), ('<', hoje)]
+    df_vendas = ctx.tabela(
+        "venda", colunas=['id_venda', 'data_venda', 'id_cliente'],
+        filtros=[('data_venda', operador, data) for operador, data in periodo]
+    )
+    df_venda_itens = ctx.tabela(
+        "venda_item", colunas=['id_venda', 'id_produto', 'quantidade'],
+        filtros=[(COLUNA_MARCA, operador, data) for operador, data in periodo]
+    )
+    atipicas = identificar_vendas_atipicas(df_vendas, df_venda_itens, ctx.data_referencia)
+    print(f"Total de produtos com anomalias: {atipicas['id_produto'].nunique()}")
+
+    # Da movimentação, apenas a última de cada produto
+    df_estoque_movimento = ultimos_registros_em_blocos(
+        ctx.blocos("estoque_movimento", colunas=['id_produto', 'data_movimento', 'estoque_depois']),
+        ['id_produto'], ['data_movimento']
+    )
+    df_resultados = gerar_relatorio(atipicas, ctx.tabela("produto"), ctx.tabela("cliente"), df_estoque_movimento)
+    if df_resultados.empty:
+        print("Nenhuma venda atípica foi encontrada para exportar.")
+        return []
+    return [ctx.salvar(df_resultados, "vendas_atipicas")]
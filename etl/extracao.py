@@ -0,0 +1,414 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from etl.config import RAIZ_REPOSITORIO
+
+# Pasta dos snapshots locais das tabelas extraídas (um subdiretório por cliente)
+ETL_SNAPSHOT_DIR = os.getenv("ETL_SNAPSHOT_DIR", os.path.join(RAIZ_REPOSITORIO, "dados", ".etl_snapshot"))
+
+# Dias antes da marca d'água que a extração incremental volta a consultar,
+# para pegar registros alterados ou lançados com atraso
+ETL_JANELA_INCREMENTAL_DIAS = int(os.getenv("ETL_JANELA_INCREMENTAL_DIAS", "3"))
+
+# Registros por bloco nas leituras do banco e do snapshot; limita a memória
+# usada na extração e nas etapas que processam as tabelas em blocos
+ETL_TAMANHO_BLOCO = int(os.getenv("ETL_TAMANHO_BLOCO", "100000"))
+
+MANIFEST_NAME = "manifest.json"
+
+# Coluna auxiliar do snapshot com a data usada como marca d'água de cada registro
+COLUNA_MARCA = "_marca"
+
+# Colunas extraídas de cada tabela de maloka_core e o tipo de cada uma:
+#   id: identificador, mantido como vem do banco
+#   texto: texto livre
+#   numero: numeric/decimal, convertido para float8 na consulta (o psycopg2 devolveria Decimal)
+#   data: data/timestamp, convertida para datetime64
+# Apenas as colunas usadas pelas etapas são consultadas.
+TABELAS = {
+    "venda": {
+        "id_venda": "id", "id_cliente": "id", "id_loja": "id", "data_venda": "data", "total_venda": "numero",
+    },
+    "venda_item": {
+        "id_venda_item": "id", "id_venda": "id", "id_produto": "id", "quantidade": "numero", "total_item": "numero",
+        "tipo": "texto",
+    },
+    "cliente": {
+        "id_cliente": "id", "nome": "texto", "email": "texto", "telefone": "texto", "tipo": "texto",
+    },
+    "cliente_pessoa_fisica": {"id_cliente": "id", "cpf": "texto"},
+    "cliente_pessoa_juridica": {"id_cliente": "id", "cnpj": "texto"},
+    "loja": {"id_loja": "id", "nome": "texto"},
+    "produto": {
+        "id_produto": "id", "nome": "texto", "id_categoria": "id", "data_criacao": "data", "codigo_barras": "texto",
+        "preco_custo": "numero", "prazo_reposicao_dias": "numero",
+    },
+    "categoria": {"id_categoria": "id", "nome_categoria": "texto"},
+    "historico_estoque": {"id_produto": "id", "id_loja": "id", "data_estoque": "data", "estoque": "numero"},
+    "estoque_movimento": {
+        "id_estoque_movimento": "id", "id_produto": "id", "id_loja": "id", "data_movimento": "data",
+        "ordem_movimento": "numero", "estoque_depois": "numero", "tipo": "texto", "quantidade": "numero",
+    },
+    "compra": {"id_compra": "id", "id_fornecedor": "id", "data_compra": "data"},
+    "compra_item": {"id_compra": "id", "id_produto": "id", "preco_bruto": "numero", "quantidade": "numero"},
+    "fornecedor": {"id_fornecedor": "id", "nome": "texto"},
+}
+
+# Tabelas extraídas de forma incremental:
+#   chave: colunas que identificam o registro
+#   data: coluna de data da tabela que serve de marca d'água, ou
+#         (tabela_pai, coluna_ligacao, coluna_data) quando a data está no registro pai
+# As demais tabelas (cadastros, em geral pequenas) são sempre extraídas por inteiro.
+INCREMENTAL = {
+    "venda": {"chave": ["id_venda"], "data": "data_venda"},
+    "venda_item": {"chave": ["id_venda_item"], "data": ("venda", "id_venda", "data_venda")},
+    "estoque_movimento": {"chave": ["id_estoque_movimento"], "data": "data_movimento"},
+    "historico_estoque": {"chave": ["id_produto", "id_loja", "data_estoque"], "data": "data_estoque"},
+}
+
+# OIDs dos tipos do PostgreSQL (cursor.description) convertidos por tipar_colunas
+OIDS_INTEIRO = {20, 21, 23}  # int8, int2, int4
+OIDS_TEXTO = {18, 19, 25, 1042, 1043}  # char, name, text, bpchar, varchar
+OID_TIMESTAMPTZ = 1184
+OIDS_DATA = {1082, 1114, OID_TIMESTAMPTZ}  # date, timestamp, timestamptz
+OIDS_NUMERO = {700, 701, 1700}  # float4, float8, numeric
+
+def coluna_marca(nome):
+    """
+    Tabela e coluna do banco que servem de marca d'água de uma tabela de INCREMENTAL
+
+    Returns:
+        Tupla (tabela, coluna), ex: ('venda', 'data_venda') para 'venda_item'
+    """
+    data = INCREMENTAL[nome]["data"]
+    if isinstance(data, tuple):
+        return data[0], data[2]
+    return nome, data
+
+def consulta_tabela(nome, desde=None, marca_com_fuso=False):
+    """
+    SQL de extração de uma tabela de maloka_core
+
+    Consulta apenas as colunas de TABELAS[nome], com os valores numéricos já
+    convertidos para float8. Tabelas fora de TABELAS são lidas por inteiro.
+    Nas tabelas de INCREMENTAL, a consulta inclui a coluna COLUNA_MARCA e,
+    com 'desde', retorna apenas os registros com marca a partir dessa data.
+
+    As marcas d'água são gravadas sem fuso: em UTC quando a coluna é
+    timestamptz (ver tipar_colunas) e no horário da própria coluna quando é
+    timestamp. Com marca_com_fuso, 'desde' é enviado com o fuso UTC, para
+    que a comparação não dependa do TimeZone da sessão.
+
+    Args:
+        nome (str): Nome da tabela (ex: 'venda')
+        desde (datetime): Início da extração incremental (opcional)
+        marca_com_fuso (bool): A coluna da marca d'água é timestamptz (ver coluna_marca)
+
+    Returns:
+        Tupla (sql, parâmetros)
+    """
+    colunas = TABELAS.get(nome)
+    if colunas is None:
+        return f"SELECT * FROM maloka_core.{nome}", None
+
+    selecao = []
+    for coluna, tipo in colunas.items():
+        if tipo == "numero":
+            selecao.append(f't."{coluna}"::float8 AS "{coluna}"')
+        else:
+            selecao.append(f't."{coluna}"')
+    consulta = f"FROM maloka_core.{nome} t"
+
+    incremental = INCREMENTAL.get(nome)
+    if incremental is None:
+        return f"SELECT {', '.join(selecao)} {consulta}", None
+
+    data = incremental["data"]
+    if isinstance(data, tuple):
+        tabela_pai, ligacao, coluna_data = data
+        consulta += f' LEFT JOIN maloka_core.{tabela_pai} p ON p."{ligacao}" = t."{ligacao}"'
+        marca = f'p."{coluna_data}"'
+    else:
+        marca = f't."{data}"'
+    selecao.append(f'{marca} AS "{COLUNA_MARCA}"')
+
+    if desde is None:
+        return f"SELECT {', '.join(selecao)} {consulta}", None
+    if marca_com_fuso:
+        desde = pd.Timestamp(desde)
+        desde = (desde.tz_localize("UTC") if desde.tzinfo is None else desde.tz_convert("UTC")).to_pydatetime()
+    return f"SELECT {', '.join(selecao)} {consulta} WHERE {marca} >= %s", (desde,)
+
+def tipar_colunas(df, nome=None, tipos_banco=None):
+    """
+    Aplica a um DataFrame extraído os tipos do banco e de TABELAS[nome]
+
+    Com 'tipos_banco', cada coluna é convertida pelo tipo do PostgreSQL
+    (inteiros para Int64, texto para str, datas para datetime64[ns] e
+    números para float64), inclusive quando todos os valores são nulos, de
+    modo que todos os blocos de uma mesma consulta tenham os mesmos tipos.
+    Timestamps com fuso são convertidos para UTC, sem fuso. Em seguida, as
+    colunas de TABELAS[nome] recebem o tipo declarado ('data' e 'numero').
+
+    Args:
+        df (DataFrame): Dados extraídos
+        nome (str): Nome da tabela (opcional)
+        tipos_banco (dict): {coluna: OID do tipo no PostgreSQL} (opcional, ver cursor.description)
+
+    Returns:
+        O próprio DataFrame, com as colunas convertidas
+    """
+    for coluna, oid in (tipos_banco or {}).items():
+        if coluna not in df.columns:
+            continue
+        if oid in OIDS_INTEIRO:
+            df[coluna] = df[coluna].astype('Int64')
+        elif oid in OIDS_TEXTO:
+            df[coluna] = df[coluna].astype('str')
+        elif oid in OIDS_DATA:
+            df[coluna] = _para_datetime(df[coluna], utc=(oid == OID_TIMESTAMPTZ))
+        elif oid in OIDS_NUMERO:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+        elif df[coluna].dtype == object:
+            df[coluna] = df[coluna].infer_objects()
+
+    tipos = dict(TABELAS.get(nome, {}))
+    tipos[COLUNA_MARCA] = "data"
+    for coluna, tipo in tipos.items():
+        if coluna not in df.columns:
+            continue
+        if tipo == "data" and df[coluna].dtype != 'datetime64[ns]':
+            df[coluna] = _para_datetime(df[coluna])
+        elif tipo == "numero":
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    return df
+
+def _para_datetime(serie, utc=False):
+    """Converte para datetime64[ns] sem fuso (valores inválidos viram NaT)"""
+    serie = pd.to_datetime(serie, errors='coerce', utc=utc)
+    if getattr(serie.dt, 'tz', None) is not None:
+        serie = serie.dt.tz_convert(None)
+    return serie.astype('datetime64[ns]')
+
+def inicio_incremento(marca, janela_dias=None):
+    """Data a partir da qual os registros são consultados novamente (marca d'água menos a janela)"""
+    if janela_dias is None:
+        janela_dias = ETL_JANELA_INCREMENTAL_DIAS
+    return marca - timedelta(days=janela_dias)
+
+def blocos_mesclados(tenant, nome, incremento, desde, tamanho_bloco=None):
+    """
+    Blocos do novo snapshot de uma tabela, com os registros extraídos a partir de 'desde'
+
+    O snapshot atual é lido em blocos. Seus registros com marca a partir de
+    'desde' são descartados e substituídos pelos do incremento (assim,
+    registros removidos do banco dentro da janela também saem do snapshot);
+    registros mais antigos com a mesma chave de um registro do incremento
+    também são substituídos. O incremento é o último bloco.
+
+    Args:
+        tenant (str): Nome do cliente
+        nome (str): Nome da tabela (chave de INCREMENTAL)
+        incremento (DataFrame): Registros extraídos com consulta_tabela(nome, desde)
+        desde (datetime): Início da extração incremental
+        tamanho_bloco (int): Registros por bloco lido do snapshot (padrão: ETL_TAMANHO_BLOCO)
+
+    Yields:
+        DataFrames com as colunas do snapshot (incluindo COLUNA_MARCA)
+    """
+    chave = INCREMENTAL[nome]["chave"]
+    incremento = incremento.drop_duplicates(subset=chave, keep='last')
+    # Índice das chaves do incremento (a tabela de hash é montada uma vez e reutilizada em cada bloco)
+    chaves_incremento = pd.MultiIndex.from_frame(incremento[chave])
+    colunas = None
+    for bloco in ler_snapshot_em_blocos(tenant, nome, tamanho_bloco=tamanho_bloco):
+        colunas = list(bloco.columns)
+        substituidos = (
+            (bloco[COLUNA_MARCA] >= pd.Timestamp(desde)).to_numpy(dtype=bool, na_value=False)
+            | (chaves_incremento.get_indexer(pd.MultiIndex.from_frame(bloco[chave])) >= 0)
+        )
+        yield bloco[~substituidos]
+    yield incremento[colunas] if colunas is not None else incremento
+
+def _manifest_path(tenant):
+    return os.path.join(ETL_SNAPSHOT_DIR, tenant, MANIFEST_NAME)
+
+def ler_manifesto(tenant):
+    """
+    Manifesto dos snapshots de um cliente
+
+    Returns:
+        Dicionário {tabela: {'colunas', 'marca', 'extraido_em'}} (vazio se não existir)
+    """
+    try:
+        with open(_manifest_path(tenant), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def registrar_extracao(tenant, nome, marca):
+    """
+    Registra no manifesto as colunas e a marca d'água do snapshot de uma tabela (escrita atômica)
+
+    Args:
+        tenant (str): Nome do cliente
+        nome (str): Nome da tabela
+        marca (Timestamp): Maior data de COLUNA_MARCA do snapshot (None fora de INCREMENTAL)
+    """
+    manifesto = ler_manifesto(tenant)
+    manifesto[nome] = {
+        "colunas": list(TABELAS[nome]) if nome in TABELAS else colunas_snapshot(tenant, nome),
+        "marca": None if marca is None or pd.isna(marca) else pd.Timestamp(marca).isoformat(),
+        "extraido_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    caminho = _manifest_path(tenant)
+    caminho_temporario = f"{caminho}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho_temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+    os.replace(caminho_temporario, caminho)
+
+def marca_dagua(tenant, nome):
+    """
+    Marca d'água da última extração de uma tabela
+
+    Returns:
+        Timestamp, ou None quando a tabela não é incremental, ainda não foi
+        extraída, não tem snapshot ou suas colunas mudaram desde a extração
+    """
+    if nome not in INCREMENTAL:
+        return None
+    entrada = ler_manifesto(tenant).get(nome)
+    if not entrada or not entrada.get("marca") or entrada.get("colunas") != list(TABELAS[nome]):
+        return None
+    if not os.path.exists(caminho_snapshot(tenant, nome)):
+        return None
+    return pd.Timestamp(entrada["marca"])
+
+def caminho_snapshot(tenant, nome):
+    """Caminho do snapshot Parquet de uma tabela de um cliente"""
+    return os.path.join(ETL_SNAPSHOT_DIR, tenant, f"{nome}.parquet")
+
+def salvar_snapshot(blocos, tenant, nome, schema=None):
+    """
+    Grava o snapshot Parquet de uma tabela, bloco a bloco (escrita atômica)
+
+    Cada bloco é gravado como um row group e descartado em seguida, de modo
+    que a memória usada dependa do tamanho do bloco, não do da tabela. O
+    esquema do arquivo é o do primeiro bloco (ou 'schema'); os blocos
+    seguintes são convertidos para ele.
+
+    Args:
+        blocos: DataFrame ou iterável de DataFrames com as mesmas colunas
+        tenant (str): Nome do cliente
+        nome (str): Nome da tabela
+        schema (pyarrow.Schema): Esquema do arquivo (opcional)
+
+    Returns:
+        Tupla (registros gravados, maior data de COLUNA_MARCA ou None)
+    """
+    if isinstance(blocos, pd.DataFrame):
+        blocos = [blocos]
+    caminho = caminho_snapshot(tenant, nome)
+    caminho_temporario = f"{caminho}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    registros, marca, writer = 0, None, None
+    try:
+        for bloco in blocos:
+            tabela = pa.Table.from_pandas(bloco, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = tabela.schema
+                writer = pq.ParquetWriter(caminho_temporario, schema)
+            writer.write_table(tabela)
+            registros += len(bloco)
+            if COLUNA_MARCA in bloco.columns:
+                marca_bloco = bloco[COLUNA_MARCA].max()
+                if pd.notna(marca_bloco) and (marca is None or marca_bloco > marca):
+                    marca = marca_bloco
+        if writer is None:
+            raise ValueError(f"Nenhum bloco da tabela '{nome}' para gravar")
+        writer.close()
+        writer = None
+        os.replace(caminho_temporario, caminho)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+    return registros, marca
+
+def _caminho_existente(tenant, nome):
+    caminho = caminho_snapshot(tenant, nome)
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Snapshot da tabela '{nome}' não encontrado em {caminho}")
+    return caminho
+
+def registros_snapshot(tenant, nome):
+    """Quantidade de registros do snapshot de uma tabela (lida dos metadados do arquivo)"""
+    return pq.ParquetFile(_caminho_existente(tenant, nome)).metadata.num_rows
+
+def ler_snapshot(tenant, nome, colunas=None, filtros=None):
+    """
+    Lê o snapshot Parquet de uma tabela
+
+    Args:
+        tenant (str): Nome do cliente
+        nome (str): Nome da tabela
+        colunas (list): Colunas a ler (padrão: todas)
+        filtros (list): Filtros do pyarrow, ex: [('data_venda', '>=', inicio)] (opcional); os
+            row groups fora do intervalo nem são lidos
+
+    Raises:
+        FileNotFoundError: Se a tabela ainda não foi extraída para o cliente
+    """
+    return pd.read_parquet(_caminho_existente(tenant, nome), columns=colunas, filters=filtros)
+
+def ler_snapshot_em_blocos(tenant, nome, colunas=None, tamanho_bloco=None, filtros=None):
+    """
+    Lê o snapshot Parquet de uma tabela em blocos de até 'tamanho_bloco' registros
+
+    Args:
+        tenant (str): Nome do cliente
+        nome (str): Nome da tabela
+        colunas (list): Colunas a ler (padrão: todas)
+        tamanho_bloco (int): Registros por bloco (padrão: ETL_TAMANHO_BLOCO)
+        filtros (list): Filtros do pyarrow, no formato de ler_snapshot (opcional)
+
+    Yields:
+        DataFrames com os tipos gravados no snapshot (com filtros, os blocos
+        podem ter menos registros, e um bloco vazio é retornado se nenhum passar)
+
+    Raises:
+        FileNotFoundError: Se a tabela ainda não foi extraída para o cliente
+    """
+    caminho = _caminho_existente(tenant, nome)
+    tamanho_bloco = tamanho_bloco or ETL_TAMANHO_BLOCO
+    if filtros:
+        dataset = ds.dataset(caminho, format="parquet")
+        lotes = dataset.to_batches(columns=colunas, filter=pq.filters_to_expression(filtros), batch_size=tamanho_bloco)
+        vazio = True
+        for lote in lotes:
+            if lote.num_rows:
+                vazio = False
+                yield lote.to_pandas()
+        if vazio:
+            yield dataset.schema.empty_table().select(colunas or dataset.schema.names).to_pandas()
+        return
+
+    arquivo = pq.ParquetFile(caminho)
+    try:
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield lote.to_pandas()
+    finally:
+        arquivo.close()
+
+def colunas_snapshot(tenant, nome):
+    """Colunas do snapshot de uma tabela"""
+    return pq.read_schema(_caminho_existente(tenant, nome)).names
@@ -0,0 +1,83 @@
+import time
+import traceback
+
+from etl.contexto import ContextoETL
+from etl.etapas import (curva_cobertura, faturamento, historico_estoque, metricas_compra, previsao_retorno, recorrencia,
+                        segmentacao, vendas_atipicas)
+
+# Etapas disponíveis, na ordem de execução (módulos com TABELAS e executar(ctx))
+ETAPAS = {
+    "analytics_cliente": segmentacao,
+    "metricas_recorrencia": recorrencia,
+    "faturamento": faturamento,
+    "analise_curva_cobertura": curva_cobertura,
+    "metricas_de_compra": metricas_compra,
+    "previsao_retorno": previsao_retorno,
+    "vendas_atipicas": vendas_atipicas,
+    "historico_estoque": historico_estoque,
+}
+
+def tabelas_necessarias(etapas):
+    """Tabelas de maloka_core usadas pelas etapas, sem repetição e na ordem em que aparecem"""
+    tabelas = []
+    for etapa in etapas:
+        for tabela in ETAPAS[etapa].TABELAS:
+            if tabela not in tabelas:
+                tabelas.append(tabela)
+    return tabelas
+
+def executar_pipeline(tenant, etapas=None, data_corte=None, usar_snapshot=False, extracao_completa=False):
+    """
+    Executa as etapas do pipeline para um cliente
+
+    Antes das etapas, cada tabela que elas usam é extraída uma única vez
+    (ver ContextoETL.extrair) e compartilhada entre elas; ao fim de cada
+    etapa, as tabelas que as seguintes não usam são liberadas. A falha de uma
+    etapa é registrada e não interrompe as demais; sem a extração, nenhuma
+    etapa é executada.
+
+    Args:
+        tenant (str): Nome do cliente (chave de TENANTS)
+        etapas (list): Etapas a executar (padrão: etapas configuradas para o cliente)
+        data_corte (datetime): Data de corte opcional (ver ContextoETL)
+        usar_snapshot (bool): Lê as tabelas do snapshot local em vez do banco
+        extracao_completa (bool): Extrai as tabelas por inteiro, ignorando as marcas d'água
+
+    Returns:
+        Dicionário {etapa: lista de arquivos gravados, ou None se a etapa falhou}
+    """
+    ctx = ContextoETL(tenant, data_corte=data_corte, usar_snapshot=usar_snapshot,
+                      extracao_completa=extracao_completa)
+    etapas = etapas or ctx.config["etapas"]
+    desconhecidas = [etapa for etapa in etapas if etapa not in ETAPAS]
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas: {', '.join(desconhecidas)}. Disponíveis: {', '.join(ETAPAS)}")
+
+    resultados = {}
+    inicio_pipeline = time.time()
+    try:
+        try:
+            ctx.extrair(tabelas_necessarias(etapas))
+        except Exception as e:
+            print(f"[ETL] {ctx.tenant}: erro na extração das tabelas: {e}")
+            traceback.print_exc()
+            return {etapa: None for etapa in etapas}
+        print(f"[ETL] {ctx.tenant}: extração concluída em {time.time() - inicio_pipeline:.1f}s")
+
+        for posicao, etapa in enumerate(etapas):
+            print(f"[ETL] {ctx.tenant}: iniciando etapa '{etapa}'")
+            inicio = time.time()
+            try:
+                resultados[etapa] = ETAPAS[etapa].executar(ctx)
+                print(f"[ETL] {ctx.tenant}: etapa '{etapa}' concluída em {time.time() - inicio:.1f}s")
+            except Exception as e:
+                print(f"[ETL] {ctx.tenant}: erro na etapa '{etapa}': {e}")
+                traceback.print_exc()
+                resultados[etapa] = None
+            # Manter em memória apenas as tabelas usadas pelas etapas seguintes
+            ctx.liberar(tabelas_necessarias(etapas[posicao + 1:]))
+    finally:
+        ctx.fechar()
+
+    print(f"[ETL] {ctx.tenant}: pipeline concluído em {time.time() - inicio_pipeline:.1f}s")
+    return resultados
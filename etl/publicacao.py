@@ -0,0 +1,162 @@
+import io
+import uuid
+
+import pandas as pd
+
+from etl.extracao import ETL_TAMANHO_BLOCO
+
+# Marcador de valor nulo no CSV enviado ao COPY
+NULO_COPY = r"\N"
+
+def tipos_postgres(df):
+    """
+    Tipo do PostgreSQL de cada coluna de um DataFrame, inferido uma única vez pelos dtypes
+
+    Colunas categóricas usam o tipo das categorias.
+
+    Returns:
+        Dicionário {coluna: tipo}
+    """
+    tipos = {}
+    for coluna, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = dtype.categories.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            tipo = 'BOOLEAN'
+        elif pd.api.types.is_integer_dtype(dtype):
+            tipo = 'BIGINT'
+        elif pd.api.types.is_float_dtype(dtype):
+            tipo = 'DECIMAL'
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            tipo = 'TIMESTAMP'
+        else:
+            tipo = 'TEXT'
+        tipos[coluna] = tipo
+    return tipos
+
+def _colunas_existentes(cursor, schema, tabela):
+    """Colunas da tabela no banco, na ordem da tabela (lista vazia se ela não existir)"""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position",
+        (schema, tabela)
+    )
+    return [linha[0] for linha in cursor.fetchall()]
+
+def _visoes_dependentes(cursor, destino):
+    """Visões (comuns ou materializadas) que dependem da tabela"""
+    cursor.execute(
+        "SELECT DISTINCT r.ev_class::regclass::text FROM pg_depend d "
+        "JOIN pg_rewrite r ON r.oid = d.objid "
+        "WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = %s::regclass AND r.ev_class <> d.refobjid",
+        (destino,)
+    )
+    return sorted(linha[0] for linha in cursor.fetchall())
+
+def _chaves_estrangeiras(cursor, destino):
+    """Chaves estrangeiras de outras tabelas que referenciam a tabela"""
+    cursor.execute(
+        "SELECT conrelid::regclass::text || '.' || conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = %s::regclass AND conrelid <> confrelid",
+        (destino,)
+    )
+    return sorted(linha[0] for linha in cursor.fetchall())
+
+def _privilegios(cursor, destino):
+    """Privilégios concedidos na tabela a outros papéis: lista de (papel, privilégio, com grant option)"""
+    cursor.execute(
+        "SELECT CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(a.grantee)) END, "
+        "a.privilege_type, a.is_grantable "
+        "FROM pg_class c, aclexplode(c.relacl) a "
+        "WHERE c.oid = %s::regclass AND a.grantee <> c.relowner",
+        (destino,)
+    )
+    return cursor.fetchall()
+
+def _copiar(cursor, df, destino, tamanho_bloco):
+    """Envia o DataFrame ao COPY FROM STDIN em blocos de CSV montados na memória"""
+    colunas = ", ".join(f'"{col}"' for col in df.columns)
+    comando = f"COPY {destino} ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '{NULO_COPY}')"
+    for inicio in range(0, len(df), tamanho_bloco):
+        buffer = io.StringIO()
+        df.iloc[inicio:inicio + tamanho_bloco].to_csv(buffer, index=False, header=False, na_rep=NULO_COPY)
+        buffer.seek(0)
+        cursor.copy_expert(comando, buffer)
+
+def publicar_tabela(conn, df, tabela, schema="maloka_core", tamanho_bloco=None):
+    """
+    Substitui o conteúdo de uma tabela do banco pelo DataFrame, com COPY e troca atômica
+
+    Os dados são carregados com COPY FROM STDIN em uma tabela de carga, que
+    toma o lugar da tabela publicada por renomeação na mesma transação:
+    quem lê a tabela vê o conteúdo anterior até o commit, e uma falha na
+    carga mantém a tabela como estava. Se a tabela já existe, a tabela de
+    carga copia sua definição (tipos, padrões, restrições CHECK e índices) e os
+    privilégios concedidos nela; senão, os tipos são inferidos do DataFrame
+    (ver tipos_postgres).
+
+    A troca exige que o usuário do ETL seja dono da tabela (ALTER TABLE ...
+    RENAME e DROP TABLE). Publicações simultâneas da mesma tabela (de outro
+    processo ou servidor) são serializadas por um advisory lock da
+    transação. A tabela não é alterada, e a publicação falha antes da carga,
+    quando suas colunas diferem das do DataFrame (a migração fica a cargo de
+    uma pessoa) ou quando há visões ou chaves estrangeiras que dependem dela
+    (continuariam apontando para a tabela anterior, que é removida).
+
+    Args:
+        conn: Conexão psycopg2
+        df (DataFrame): Dados a publicar
+        tabela (str): Nome da tabela (ex: 'segmentacao')
+        schema (str): Schema da tabela
+        tamanho_bloco (int): Registros por COPY (padrão: ETL_TAMANHO_BLOCO)
+
+    Returns:
+        Quantidade de registros publicados
+
+    Raises:
+        RuntimeError: Se as colunas diferem ou se alguma visão ou chave estrangeira depende da tabela
+    """
+    destino = f'"{schema}"."{tabela}"'
+    sufixo = uuid.uuid4().hex[:12]
+    carga = f"{tabela}_carga_{sufixo}"
+    antiga = f"{tabela}_antiga_{sufixo}"
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"{schema}.{tabela}",))
+            existentes = _colunas_existentes(cursor, schema, tabela)
+            privilegios = []
+            if existentes:
+                if sorted(existentes) != sorted(df.columns):
+                    faltando = [coluna for coluna in existentes if coluna not in df.columns]
+                    novas = [coluna for coluna in df.columns if coluna not in existentes]
+                    raise RuntimeError(
+                        f"As colunas de {schema}.{tabela} diferem das publicadas "
+                        f"(só na tabela: {faltando}; só nos dados: {novas}); migre a tabela antes de publicar"
+                    )
+                dependentes = _visoes_dependentes(cursor, destino) + _chaves_estrangeiras(cursor, destino)
+                if dependentes:
+                    raise RuntimeError(
+                        f"{schema}.{tabela} não pode ser substituída; objetos que dependem dela: {', '.join(dependentes)}"
+                    )
+                privilegios = _privilegios(cursor, destino)
+                cursor.execute(f'CREATE TABLE "{schema}"."{carga}" (LIKE {destino} INCLUDING ALL)')
+            else:
+                colunas = ", ".join(f'"{coluna}" {tipo}' for coluna, tipo in tipos_postgres(df).items())
+                cursor.execute(f'CREATE TABLE "{schema}"."{carga}" ({colunas})')
+
+            _copiar(cursor, df, f'"{schema}"."{carga}"', tamanho_bloco or ETL_TAMANHO_BLOCO)
+            for papel, privilegio, com_grant in privilegios:
+                opcao = " WITH GRANT OPTION" if com_grant else ""
+                cursor.execute(f'GRANT {privilegio} ON "{schema}"."{carga}" TO {papel}{opcao}')
+
+            if existentes:
+                cursor.execute(f'ALTER TABLE {destino} RENAME TO "{antiga}"')
+            cursor.execute(f'ALTER TABLE "{schema}"."{carga}" RENAME TO "{tabela}"')
+            if existentes:
+                cursor.execute(f'DROP TABLE "{schema}"."{antiga}"')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(df)
@@ -0,0 +1,10 @@
+# Configuração do gunicorn (lida automaticamente do diretório de execução)
+
+def on_starting(server):
+    """Tarefas únicas do processo mestre, antes de iniciar os workers"""
+    from data_load.cache_config import setup_diskcache
+    from data_load.tenant_sessions import clear_legacy_sessions
+
+    removed = clear_legacy_sessions(setup_diskcache())
+    if removed:
+        print(f"[SESSOES] {removed} contadores de sessão antigos removidos")
@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -8,6 +7,7 @@ from datetime import datetime
 
 from utils.formatters import formatar_percentual, formatar_numero, format_iso_date
 from utils.helpers import color, button_style, create_card, create_metric_row, content_style
+from data_load.dataset_registry import get_dataframe
 
 def get_predicao_layout(data):
     # if data.get("df_Previsoes") is None:
@@ -24,7 +24,7 @@ def get_predicao_layout(data):
     #         )
     #     ], style=content_style)
     
-    # df_Previsoes = pd.read_json(io.StringIO(data["df_Previsoes"]), orient='split')
+    # df_Previsoes = get_dataframe(data, "df_Previsoes")
     
     if data.get("df_previsao_retorno") is None:
         return html.Div([
@@ -40,7 +40,7 @@ def get_predicao_layout(data):
             )
         ], style=content_style)
     
-    df_previsao_retorno = pd.read_json(io.StringIO(data["df_previsao_retorno"]), orient='split')
+    df_previsao_retorno = get_dataframe(data, "df_previsao_retorno")
     
     # # Calculate metrics for the metrics row
     # total_customers = len(df_Previsoes)
@@ -354,8 +354,6 @@ def get_predicao_layout(data):
             # Métricas de retorno
             retorno_metrics_row,
             
-            dcc.Store(id='selected-data', data=data),
-            
             # Seleção de cliente e detalhes com o histórico de desempenho
             dbc.Row([
                 create_card(
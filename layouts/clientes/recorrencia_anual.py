@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc, dash_table
@@ -8,6 +7,7 @@ from plotly.subplots import make_subplots
 
 from utils import formatar_numero, formatar_percentual
 from utils import create_card, create_metric_row, content_style, color
+from data_load.dataset_registry import get_dataframe
 
 def get_recorrencia_anual_layout(data):
     if data.get("df_RC_Anual") is None:
@@ -24,7 +24,7 @@ def get_recorrencia_anual_layout(data):
             )
         ], style=content_style)
     
-    df_RC_Anual = pd.read_json(io.StringIO(data["df_RC_Anual"]), orient='split')
+    df_RC_Anual = get_dataframe(data, "df_RC_Anual")
     
     # Calculate metrics for the metrics row
     current_retention = df_RC_Anual['retention_rate'].iloc[-1] if not df_RC_Anual.empty else 0
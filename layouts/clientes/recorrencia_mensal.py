@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc, dash_table
@@ -6,6 +5,7 @@ import plotly.graph_objects as go
 
 from utils import formatar_percentual
 from utils import create_card, create_metric_row, content_style, color
+from data_load.dataset_registry import get_dataframe
 
 def get_recorrencia_mensal_layout(data):
     if data.get("df_RC_Mensal") is None:
@@ -22,7 +22,7 @@ def get_recorrencia_mensal_layout(data):
             )
         ], style=content_style)
     
-    df_RC_Mensal = pd.read_json(io.StringIO(data["df_RC_Mensal"]), orient='split')
+    df_RC_Mensal = get_dataframe(data, "df_RC_Mensal")
     
     # Calculate metrics for the metrics row
     current_retention = df_RC_Mensal['retention_rate'].iloc[-1] if not df_RC_Mensal.empty else 0
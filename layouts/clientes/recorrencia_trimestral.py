@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc, dash_table
@@ -7,6 +6,7 @@ import numpy as np
 
 from utils import formatar_numero, formatar_percentual
 from utils import create_card, create_metric_row, content_style, color
+from data_load.dataset_registry import get_dataframe
 
 def get_recorrencia_trimestral_layout(data):
     if data.get("df_RC_Trimestral") is None:
@@ -23,7 +23,7 @@ def get_recorrencia_trimestral_layout(data):
             )
         ], style=content_style)
     
-    df_RC_Trimestral = pd.read_json(io.StringIO(data["df_RC_Trimestral"]), orient='split')
+    df_RC_Trimestral = get_dataframe(data, "df_RC_Trimestral")
     
     # Calculate metrics for the metrics row
     current_rate = df_RC_Trimestral['recurrence_rate'].iloc[-1] if not df_RC_Trimestral.empty else 0
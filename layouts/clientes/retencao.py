@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc
@@ -7,6 +6,7 @@ import numpy as np
 
 from utils import formatar_percentual
 from utils import create_card, create_metric_row, content_style, color
+from data_load.dataset_registry import get_dataframe
 
 
 def get_retencao_layout(data):
@@ -25,7 +25,7 @@ def get_retencao_layout(data):
                 )
             ], style=content_style)
         
-        df_RT_Anual = pd.read_json(io.StringIO(data["df_RT_Anual"]), orient='split')
+        df_RT_Anual = get_dataframe(data, "df_RT_Anual")
         
         # Calculate metrics for the metrics row - ajustado para calcular apenas após o primeiro ano
         avg_retention = df_RT_Anual[(df_RT_Anual['period_index'] > 0) & ~pd.isna(df_RT_Anual['retention_rate'])]['retention_rate'].mean() * 100  # Apenas períodos > 0
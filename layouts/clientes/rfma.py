@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc
@@ -6,6 +5,7 @@ import dash_bootstrap_components as dbc
 
 from utils import formatar_numero, formatar_moeda
 from utils import create_card, create_metric_row, content_style, colors
+from data_load.dataset_registry import get_dataframe
 
 def get_rfma_layout(data):
     if data.get("df") is None:
@@ -22,7 +22,7 @@ def get_rfma_layout(data):
             )
         ], style=content_style)
     
-    df = pd.read_json(io.StringIO(data["df"]), orient='split')
+    df = get_dataframe(data, "df")
     
     # Calculate metrics for the metrics row
     avg_recency = df['Recency'].mean()
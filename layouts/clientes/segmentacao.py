@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc
@@ -6,6 +5,7 @@ import dash_bootstrap_components as dbc
 
 from utils import formatar_numero
 from utils import create_card, create_metric_row, content_style, color, gradient_colors, cores_segmento
+from data_load.segment_index import get_segment_index
 
 def get_segmentacao_layout(data):
     if data.get("df_analytics") is None:
@@ -22,13 +22,25 @@ def get_segmentacao_layout(data):
             )
         ], style=content_style)
     
-    df = pd.read_json(io.StringIO(data["df_analytics"]), orient='split')
+    # Índice de segmentos: montado aqui, ao abrir a página, e reutilizado nos cliques do gráfico
+    index = get_segment_index(data)
+    if index is None:
+        return html.Div([
+            html.H2("Segmentação de Clientes", className="dashboard-title"),
+            create_card(
+                "Dados Indisponíveis",
+                html.P("O arquivo analytics_cliente não contém a coluna de segmentos.", className="text-center text-muted my-4")
+            )
+        ], style=content_style)
+    
+    def clientes_em(segmentos):
+        return sum(index["summary"].get(segmento, {}).get("clientes", 0) for segmento in segmentos)
     
     # Calculate metrics for the metrics row
-    total_clients = len(df)
-    active_clients = len(df[df['Segmento'].isin(['Novos', 'Campeões', 'Fiéis Alto Valor', 'Fiéis Baixo Valor', 'Recentes Alto Valor', 'Recentes Baixo Valor'])])
-    inactive_clients = len(df[df['Segmento'].isin(['Sumidos', 'Inativos'])])
-    champions = len(df[df['Segmento'] == 'Campeões'])
+    total_clients = index["summary"]["Todos"]["clientes"]
+    active_clients = clientes_em(['Novos', 'Campeões', 'Fiéis Alto Valor', 'Fiéis Baixo Valor', 'Recentes Alto Valor', 'Recentes Baixo Valor'])
+    inactive_clients = clientes_em(['Sumidos', 'Inativos'])
+    champions = clientes_em(['Campeões'])
     
     # Create metrics row
     metrics = [
@@ -41,8 +53,10 @@ def get_segmentacao_layout(data):
     metrics_row = create_metric_row(metrics)
     
     # Construir gráfico diretamente aqui, em vez de depender de um callback
-    segment_counts = df['Segmento'].value_counts().reset_index()
-    segment_counts.columns = ['Segmento', 'Quantidade de Clientes']
+    segment_counts = pd.DataFrame(
+        [(segmento, resumo["clientes"]) for segmento, resumo in index["summary"].items() if segmento != "Todos"],
+        columns=['Segmento', 'Quantidade de Clientes']
+    )
 
     # Calcular percentuais
     total_clients = segment_counts['Quantidade de Clientes'].sum()
@@ -114,7 +128,6 @@ def get_segmentacao_layout(data):
     layout = html.Div(
         [
             html.H2("Segmentação de Clientes", className="dashboard-title"),
-            dcc.Store(id='selected-data', data=data),
             # Summary metrics row
             metrics_row,
             
@@ -1,10 +1,10 @@
-import io
 import pandas as pd
 from dash import html, dcc
 import plotly.express as px
 import plotly.graph_objects as go
 
 from utils import create_card, content_style, create_metric_row, color, gradient_colors
+from data_load.dataset_registry import get_dataframe
 
 def get_giro_estoque_layout(data):
     """
@@ -26,7 +26,7 @@ def get_giro_estoque_layout(data):
         ], style=content_style)
     
     # Carregar os dados do DataFrame
-    df_curva_cobertura = pd.read_json(io.StringIO(data["df_analise_curva_cobertura"]), orient='split')
+    df_curva_cobertura = get_dataframe(data, "df_analise_curva_cobertura")
     
     # Definir o período de análise
     periodo_analise = "90 dias"
@@ -229,7 +229,6 @@ def get_giro_estoque_layout(data):
     #layout final com os gráficos
     layout = html.Div([
         html.H2("Análise de Situação do Estoque", className="dashboard-title"),
-        dcc.Store(id='selected-data', data=data),
         # Linha de métricas
         metrics_row,
         
@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc
@@ -6,6 +5,7 @@ import dash_bootstrap_components as dbc
 
 from utils import formatar_numero
 from utils import create_card, create_metric_row, content_style, gradient_colors, color
+from data_load.dataset_registry import get_dataframe, page_data
 
 
 def get_produtos_layout(data):
@@ -28,7 +28,7 @@ def get_produtos_layout(data):
         ], style=content_style)
     
     # Carregamos os dados de produtos críticos
-    df_produtos = pd.read_json(io.StringIO(data["df_metricas_compra"]), orient='split')
+    df_produtos = get_dataframe(data, "df_metricas_compra")
 
     #Caso todos os dados dentro da coluna critico forem falsos
     if 'critico' in df_produtos.columns and df_produtos['critico'].any():
@@ -195,12 +195,8 @@ def get_produtos_layout(data):
     layout = html.Div([
         html.H2("Análise de Cobertura de Estoque", className="dashboard-title"),
 
-        # Armazenamento para os dados de produtos
-        dcc.Store(
-            id="store-produtos-data", 
-            data=data["df_metricas_compra"] if data and "df_metricas_compra" in data else None
-        ),
-        dcc.Store(id='selected-data', data=data),
+        # Handle apenas com os dados de produtos (os DataFrames ficam no servidor)
+        dcc.Store(id="store-produtos-data", data=page_data(data, ["df_metricas_compra"])),
 
         # # Botão de filtro críticos adicionado abaixo do título
         filtro_criticos,
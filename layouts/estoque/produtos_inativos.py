@@ -1,9 +1,9 @@
-import io
 import pandas as pd
 import datetime
 from dash import html, dcc
 
 from utils import create_card, content_style
+from data_load.dataset_registry import get_dataframe
 
 def get_produtos_inativos_layout(data):
     """
@@ -25,7 +25,7 @@ def get_produtos_inativos_layout(data):
         ], style=content_style)
     else:
         # Carregar os dados do DataFrame
-        df_produtos = pd.read_json(io.StringIO(data["df_analise_curva_cobertura"]), orient='split')
+        df_produtos = get_dataframe(data, "df_analise_curva_cobertura")
     
     # Garantir que a coluna 'recencia' esteja no formato de data
     if 'Data Última Venda' in df_produtos.columns and df_produtos['Data Última Venda'].dtype == 'object':
@@ -35,7 +35,7 @@ def get_produtos_inativos_layout(data):
         # Definir uma data padrão para valores que não puderam ser convertidos (NULL/NaT)
         # Usando a data atual para calcular corretamente os dias de inatividade
         data_atual = datetime.datetime.now()
-        df_produtos['Data Última Venda'].fillna(data_atual, inplace=True)
+        df_produtos['Data Última Venda'] = df_produtos['Data Última Venda'].fillna(data_atual)
     
     # Calcular os dias de inatividade
     data_atual = datetime.datetime.now()
@@ -51,7 +51,6 @@ def get_produtos_inativos_layout(data):
     # Criamos um layout com um slider para definir o tempo de inatividade
     layout = html.Div([
         html.H2("Análise de Produtos Inativos", className="dashboard-title"),
-        dcc.Store(id='selected-data', data=data),
         # Cartão com slider para definir os dias de inatividade
         create_card(
             "Filtro de Tempo de Inatividade",
@@ -1,4 +1,3 @@
-import io
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -6,8 +5,9 @@ from dash import html, dcc, dash_table
 import traceback
 import datetime
 
-from utils import formatar_moeda, formatar_percentual
+from utils import formatar_moeda, formatar_percentual, formatar_moeda_serie, formatar_percentual_serie
 from utils import create_card, create_metric_row, content_style, color, gradient_colors
+from data_load.dataset_registry import get_dataframe, page_data
 
 def get_faturamento_anual_layout(data, selected_client=None):
     # Dicionário para armazenar os gráficos que foram criados com sucesso
@@ -52,15 +52,18 @@ def get_faturamento_anual_layout(data, selected_client=None):
     # --- Gráfico 1: Evolução Percentual Anual das Vendas ---
     # -------------------------------------------------------
     try:
-        df_fat = pd.read_json(io.StringIO(data["df_fat_Anual"]), orient='split')
+        df_fat = get_dataframe(data, "df_fat_Anual")
         df_fat = df_fat.sort_values("Ano")
         
         # Verificar se já temos a coluna de evolução, senão calculá-la
         if 'Evolucao Total (%)' not in df_fat.columns:
             df_fat['Evolucao Total (%)'] = df_fat['Total'].pct_change() * 100
         
-        df_fat['label'] = df_fat.apply(lambda row: f"{formatar_percentual(row['Evolucao Total (%)'])}\n{formatar_moeda(row['Total'])}" 
-                                    if not pd.isna(row['Evolucao Total (%)']) else f"{formatar_moeda(row['Total'])}", axis=1)
+        total_formatado = formatar_moeda_serie(df_fat['Total'])
+        df_fat['label'] = total_formatado.where(
+            df_fat['Evolucao Total (%)'].isna(),
+            formatar_percentual_serie(df_fat['Evolucao Total (%)']) + "\n" + total_formatado
+        )
         
         # Calculate YoY growth for the metrics row
         total_sales = df_fat['Total'].iloc[-1] if not df_fat.empty else 0
@@ -77,7 +80,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
                 x=df_fat['Ano'],
                 y=df_fat['Faturamento em Serviços'],
                 name='Serviços',
-                text=df_fat['Faturamento em Serviços'].apply(formatar_moeda),
+                text=formatar_moeda_serie(df_fat['Faturamento em Serviços']),
                 textposition='inside',
                 insidetextanchor='middle',
                 marker_color=color['secondary'],
@@ -89,7 +92,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
                 x=df_fat['Ano'],
                 y=df_fat['Faturamento em Produtos'],
                 name='Produtos',
-                text=df_fat['Faturamento em Produtos'].apply(formatar_moeda),
+                text=formatar_moeda_serie(df_fat['Faturamento em Produtos']),
                 textposition='inside',
                 insidetextanchor='middle',
                 marker_color=color['accent'],
@@ -202,7 +205,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
         # Obter o faturamento do mês atual até o último dia de venda
         current_month_sales = 0
         try:
-            df_mensal = pd.read_json(io.StringIO(data["df_fat_Mensal"]), orient='split')
+            df_mensal = get_dataframe(data, "df_fat_Mensal")
             
             # Identificar o último ano com dados
             anos_colunas = [col for col in df_mensal.columns if col != 'Mês' and not pd.isna(col)]
@@ -306,7 +309,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
     # --- Gráfico 2: Faturamento Anual ---------
     # ------------------------------------------
     try:
-        df_ano = pd.read_json(io.StringIO(data["df_fat_Anual_Geral"]), orient='split')
+        df_ano = get_dataframe(data, "df_fat_Anual_Geral")
         if df_ano.index.name == 'Ano' or (hasattr(df_ano.index, 'name') and df_ano.index.name is not None):
             # Se o índice for nomeado 'Ano', transforme-o em coluna
             df_ano = df_ano.reset_index()
@@ -334,9 +337,9 @@ def get_faturamento_anual_layout(data, selected_client=None):
             # Para BIBI: gráfico de barras empilhadas Cadastrado vs Sem Cadastro
             
             # Preparar os valores formatados para o hover
-            df_ano['Cadastrado_Formatado'] = df_ano['Cadastrado'].apply(formatar_moeda)
-            df_ano['SemCadastro_Formatado'] = df_ano['Sem Cadastro'].apply(formatar_moeda)
-            df_ano['Total_Formatado'] = (df_ano['Cadastrado'] + df_ano['Sem Cadastro']).apply(formatar_moeda)
+            df_ano['Cadastrado_Formatado'] = formatar_moeda_serie(df_ano['Cadastrado'])
+            df_ano['SemCadastro_Formatado'] = formatar_moeda_serie(df_ano['Sem Cadastro'])
+            df_ano['Total_Formatado'] = formatar_moeda_serie(df_ano['Cadastrado'] + df_ano['Sem Cadastro'])
             
             fig_ano = px.bar(
                 df_ano,
@@ -414,7 +417,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
                             break
             
             # Adicionar valores formatados para o hover
-            df_ano['total_formatado'] = df_ano['total_item'].apply(formatar_moeda)
+            df_ano['total_formatado'] = formatar_moeda_serie(df_ano['total_item'])
             
             # Gráfico de barras padrão para outros clientes
             fig_ano = px.bar(
@@ -485,7 +488,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
     # --- Gráfico 3: Faturamento Mensal por Ano ----
     # ----------------------------------------------
     try:
-        df_mensal = pd.read_json(io.StringIO(data["df_fat_Mensal"]), orient='split')
+        df_mensal = get_dataframe(data, "df_fat_Mensal")
         if 'Mês' not in df_mensal.columns:
             df_mensal = df_mensal.reset_index(drop=True)
             # Se o número de linhas for 12, atribuimos os meses de 1 a 12; caso contrário, usamos o número de linhas existente
@@ -499,7 +502,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
         # Enhanced monthly sales chart with custom colors
         custom_colors = ["orange", "darkred", gradient_colors['blue_gradient'][0], color['accent'], gradient_colors['green_gradient'][0], "red", gradient_colors['blue_gradient'][2], gradient_colors['green_gradient'][2]]
         
-        df_mensal_long['Faturamento_Formatado'] = df_mensal_long['Faturamento'].apply(formatar_moeda)
+        df_mensal_long['Faturamento_Formatado'] = formatar_moeda_serie(df_mensal_long['Faturamento'])
         
         fig_mensal = px.bar(
             df_mensal_long,
@@ -563,7 +566,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
     # --- Gráfico 4: Faturamento Mensal por Ano por loja ---
     # ------------------------------------------------------
     try:
-        df_mensal_lojas = pd.read_json(io.StringIO(data["df_fat_Mensal_lojas"]), orient='split')
+        df_mensal_lojas = get_dataframe(data, "df_fat_Mensal_lojas")
         if 'Mês' not in df_mensal_lojas.columns:
             df_mensal_lojas = df_mensal_lojas.reset_index(drop=True)
             # Se o número de linhas for 12, atribuimos os meses de 1 a 12; caso contrário, usamos o número de linhas existente
@@ -623,7 +626,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
             nome_loja = df_loja['nome'].iloc[0] if 'nome' in df_loja.columns and not df_loja.empty else f"Loja {loja}"
             
             # Formatar os valores para exibição
-            valores_formatados = df_loja['total_venda'].apply(formatar_moeda)
+            valores_formatados = formatar_moeda_serie(df_loja['total_venda'])
             
             fig_lojas.add_trace(go.Bar(
                 x=df_loja['Mês'],
@@ -724,7 +727,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
     # --- Gráfico 5: Faturamento Diário nos últimos 3 meses ----
     # ----------------------------------------------------------
     try:
-        df_diario = pd.read_json(io.StringIO(data["df_fat_Diario"]), orient='split')
+        df_diario = get_dataframe(data, "df_fat_Diario")
 
         # Converter valores com vírgula para ponto (formato numérico correto)
         df_diario['total_venda'] = df_diario['total_venda'].astype(str).str.replace(',', '.').astype(float)
@@ -840,7 +843,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
     # ----------------------------------------------------------
     try:
         # Usar diretamente os dados do df_fat_Diario_lojas
-        df_fat_Diario_lojas = pd.read_json(io.StringIO(data["df_fat_Diario_lojas"]), orient='split')
+        df_fat_Diario_lojas = get_dataframe(data, "df_fat_Diario_lojas")
         
         # Garantir que todos os valores numéricos estejam formatados corretamente
         colunas_numericas = [col for col in df_fat_Diario_lojas.columns if col != 'nome']
@@ -850,7 +853,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
         
         # Formatar valores monetários para todas as colunas numéricas
         for col in colunas_numericas:
-            df_formatado[col] = df_formatado[col].apply(lambda x: formatar_moeda(x) if pd.notnull(x) and x != 0 else "-")
+            df_formatado[col] = formatar_moeda_serie(df_formatado[col].where(df_formatado[col] != 0), na_rep="-")
         
         # Converter todas as colunas para string para garantir compatibilidade com a DataTable
         df_formatado_dict = df_formatado.reset_index().to_dict('records')
@@ -920,7 +923,7 @@ def get_faturamento_anual_layout(data, selected_client=None):
     
     # Construir o layout com os gráficos que foram criados com sucesso
     componentes_layout = [
-        dcc.Store(id='store-faturamento-data', data=data),
+        dcc.Store(id='store-faturamento-data', data=page_data(data, ["df_fat_Mensal_lojas", "df_fat_Diario"])),
         html.H2("Crescimento do Negócio", className="dashboard-title"),
     ]
     
@@ -1,11 +1,11 @@
-import io
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from dash import html, dcc, dash_table
+from dash import html, dcc
 
 from utils import formatar_numero
 from utils import create_card, create_metric_row, content_style, color, gradient_colors
+from data_load.dataset_registry import get_dataframe
+from utils.server_table import create_server_table
 
 def get_vendas_atipicas_layout(data):
     """
@@ -27,13 +27,7 @@ def get_vendas_atipicas_layout(data):
         ], style=content_style)
     
     # Carregamos os dados de vendas atípicas
-    df_atipicas = pd.read_json(io.StringIO(data["df_Vendas_Atipicas"]), orient='split')
-    
-    # Convertemos a coluna 'data' para o formato de data, se ainda não estiver
-    if df_atipicas['data'].dtype == 'object':
-        df_atipicas['data'] = pd.to_datetime(df_atipicas['data'])
-
-    df_atipicas['Dia_formatada'] = df_atipicas['data'].dt.strftime('%d/%m/%Y')
+    df_atipicas = get_dataframe(data, "df_Vendas_Atipicas")
     
     # Calculamos métricas gerais para cards de resumo
     total_produtos_atipicos = len(df_atipicas)
@@ -73,9 +67,9 @@ def get_vendas_atipicas_layout(data):
         paper_bgcolor='rgba(0,0,0,0)'
     )
     
-    # Criamos uma tabela interativa com os dados completos
-    table = dash_table.DataTable(
-        id='table-vendas-atipicas',
+    # Tabela paginada no servidor: o navegador recebe apenas a página atual
+    table = create_server_table(
+        'table-vendas-atipicas',
         columns=[
             {"name": "Data", "id": "Dia_formatada"},
             {"name": "Quantidade Atípica", "id": "quantidade_atipica"},
@@ -86,12 +80,7 @@ def get_vendas_atipicas_layout(data):
             {"name": "ID Venda", "id": "id_venda"},
             {"name": "ID Produto", "id": "id_produto"},
         ],
-        data=df_atipicas.reset_index().to_dict("records"),
-        filter_action="native",
-        sort_action="native",
-        sort_mode="multi",
         page_size=10,
-        export_format="xlsx",
         style_table={"overflowX": "auto"},
         style_cell={
             "textAlign": "left",
@@ -137,7 +126,7 @@ def get_vendas_atipicas_layout(data):
             "Detalhamento de Vendas Atípicas",
             html.Div([
                 html.P("Esta tabela apresenta todos os produtos com vendas fora do padrão esperado. Utilize os filtros e ordenação para análise detalhada.", className="text-muted mb-3"),
-                table
+                *table
             ])
         ),
         
@@ -3,6 +3,9 @@ from utils.formatters import (
     formatar_moeda,
     formatar_percentual,
     formatar_numero,
+    formatar_moeda_serie,
+    formatar_percentual_serie,
+    formatar_numero_serie,
     format_iso_date
 )
 
@@ -32,6 +35,21 @@ from utils.chat_helpers import (
     DATAFRAME_KEYS,
 )
 
+from utils.posicao_estoque import (
+    calcular_posicao_diaria,
+    calcular_metricas_estoque,
+    analisar_movimentos_estoque,
+    precalcular_historicos_estoque,
+    tipar_ids_produto,
+    normalizar_id_produto
+)
+
+from utils.server_table import (
+    create_server_table,
+    register_server_table,
+    query_table
+)
+
 from utils.sidebar_utils import (
     create_sidebar,
     get_available_data_types,
@@ -44,6 +62,9 @@ __all__ = [
     'formatar_moeda',
     'formatar_percentual',
     'formatar_numero',
+    'formatar_moeda_serie',
+    'formatar_percentual_serie',
+    'formatar_numero_serie',
     'format_iso_date',
     
     # Helpers
@@ -69,6 +90,19 @@ __all__ = [
     'SEGMENTOS_PADRAO',
     'DATAFRAME_KEYS',
 
+    # Posição de estoque
+    'calcular_posicao_diaria',
+    'calcular_metricas_estoque',
+    'analisar_movimentos_estoque',
+    'precalcular_historicos_estoque',
+    'tipar_ids_produto',
+    'normalizar_id_produto',
+
+    # Tabelas paginadas no servidor
+    'create_server_table',
+    'register_server_table',
+    'query_table',
+
     #sidebar utils
     'create_sidebar',
     'get_available_data_types',
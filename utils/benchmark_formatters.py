@@ -0,0 +1,49 @@
+"""
+Compara as versões escalares (.apply) e vetorizadas dos formatadores
+
+Uso: python -m utils.benchmark_formatters [n_valores]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.formatters import (
+    formatar_moeda,
+    formatar_percentual,
+    formatar_numero,
+    formatar_moeda_serie,
+    formatar_percentual_serie,
+    formatar_numero_serie
+)
+
+def _medir(funcao, repeticoes=3):
+    """Melhor tempo (em segundos) de algumas execuções"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+def main(n_valores=200_000):
+    rng = np.random.default_rng(42)
+    valores = pd.Series(rng.lognormal(mean=6, sigma=2.5, size=n_valores) * rng.choice([-1, 1], size=n_valores))
+
+    casos = [
+        ("moeda", lambda: valores.apply(formatar_moeda), lambda: formatar_moeda_serie(valores)),
+        ("percentual", lambda: valores.apply(formatar_percentual), lambda: formatar_percentual_serie(valores)),
+        ("numero", lambda: valores.apply(lambda x: formatar_numero(x, 0)), lambda: formatar_numero_serie(valores, 0))
+    ]
+
+    print(f"[BENCHMARK] {n_valores} valores")
+    for nome, escalar, vetorizada in casos:
+        tempo_escalar, esperado = _medir(escalar)
+        tempo_vetorizado, obtido = _medir(vetorizada)
+        iguais = bool((esperado == obtido).all())
+        print(f"[BENCHMARK] {nome:<10} apply: {tempo_escalar:.3f}s  vetorizada: {tempo_vetorizado:.3f}s  "
+              f"({tempo_escalar / tempo_vetorizado:.1f}x)  resultados iguais: {iguais}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -1,3 +1,8 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+
 def formatar_moeda(valor):
     """Formata um valor monetário no padrão brasileiro: R$ 1.234,56"""
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -55,4 +60,134 @@ def format_iso_date(date_str):
         return date_str
     except Exception as e:
         # Em caso de qualquer erro, retorne o original
-        return f"{date_str}"
\ No newline at end of file
+        return f"{date_str}"
+
+# =============================================================================
+# Versões vetorizadas (formatam uma coluna inteira de uma vez)
+# =============================================================================
+
+def _formatar_vetor(valores, decimais, prefixo="", sufixo="", na_rep="", milhar=True):
+    """
+    Formata um array de números no padrão brasileiro sem laço por valor
+
+    Os valores são agrupados pela quantidade de dígitos da parte inteira e pelo
+    sinal; dentro de um grupo todas as strings têm o mesmo layout, então são
+    montadas como uma matriz de bytes (uma linha por valor) preenchida coluna a
+    coluna. Valores no limite do arredondamento (meia unidade da última casa),
+    infinitos e grandes demais para int64 são formatados pela versão escalar,
+    para resultado idêntico.
+
+    Diferença em relação à versão escalar: valores ausentes (NaN/None) viram
+    na_rep, em vez de 'R$ nan' (NaN) ou TypeError (None). Valores não
+    numéricos (ex: texto) geram ValueError, como na versão escalar.
+
+    Args:
+        valores: Série, array ou lista de números
+        decimais (int): Casas decimais
+        prefixo (str): Texto ASCII antes do número (ex: 'R$ ')
+        sufixo (str): Texto ASCII depois do número (ex: '%')
+        na_rep (str): Texto para valores ausentes (NaN/None)
+        milhar (bool): Separar os milhares com '.'
+
+    Returns:
+        Array (dtype object) de strings, do mesmo tamanho da entrada
+
+    Raises:
+        ValueError: Se algum valor não ausente não for um número
+    """
+    serie = pd.Series(valores)
+    if not (pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie)):
+        nao_numericos = serie[serie.notna() & ~serie.map(lambda valor: isinstance(valor, numbers.Number))]
+        if len(nao_numericos):
+            raise ValueError(f"Valor não numérico para formatar: {nao_numericos.iloc[0]!r}")
+    valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    n = len(valores)
+    resultado = np.full(n, na_rep, dtype=object)
+    if n == 0:
+        return resultado
+
+    escala = 10 ** decimais
+    with np.errstate(invalid="ignore"):
+        escalados = np.abs(valores) * escala
+        validos = np.isfinite(valores) & (escalados < 2 ** 62)
+
+        # Meia unidade após a multiplicação: usar o arredondamento do format
+        fracao = escalados - np.floor(escalados)
+    ambiguos = validos & (np.abs(fracao - 0.5) < 1e-6)
+    mascara_vetorizados = validos & ~ambiguos
+    vetorizados = np.flatnonzero(mascara_vetorizados)
+
+    if len(vetorizados):
+        x = valores[vetorizados]
+        unidades = np.rint(escalados[vetorizados]).astype(np.int64)
+        inteiros = unidades // escala
+        fracoes = unidades % escala
+        negativos = np.signbit(x)
+        n_digitos = np.maximum(np.floor(np.log10(np.maximum(inteiros, 1))).astype(np.int64) + 1, 1)
+        # log10 pode errar por um perto das potências de 10
+        n_digitos += inteiros >= 10 ** np.minimum(n_digitos, 18)
+
+        prefixo_bytes = np.frombuffer(prefixo.encode("ascii"), dtype=np.uint8)
+        sufixo_bytes = np.frombuffer(sufixo.encode("ascii"), dtype=np.uint8)
+        chaves = n_digitos * 2 + negativos
+
+        for chave in np.unique(chaves):
+            grupo = np.flatnonzero(chaves == chave)
+            digitos, negativo = divmod(int(chave), 2)
+            n_separadores = (digitos - 1) // 3 if milhar else 0
+            largura_decimal = decimais + 1 if decimais > 0 else 0
+            largura = len(prefixo_bytes) + negativo + digitos + n_separadores + largura_decimal + len(sufixo_bytes)
+            matriz = np.empty((len(grupo), largura), dtype=np.uint8)
+
+            matriz[:, :len(prefixo_bytes)] = prefixo_bytes
+            if negativo:
+                matriz[:, len(prefixo_bytes)] = ord("-")
+            matriz[:, largura - len(sufixo_bytes):] = sufixo_bytes
+
+            # Parte fracionária, da última casa para a primeira
+            coluna = largura - len(sufixo_bytes) - 1
+            resto = fracoes[grupo]
+            for _ in range(decimais):
+                resto, digito = np.divmod(resto, 10)
+                matriz[:, coluna] = digito + ord("0")
+                coluna -= 1
+            if decimais > 0:
+                matriz[:, coluna] = ord(",")
+                coluna -= 1
+
+            # Parte inteira, das unidades para a esquerda, com '.' a cada 3 dígitos
+            resto = inteiros[grupo]
+            for casa in range(digitos):
+                if milhar and casa > 0 and casa % 3 == 0:
+                    matriz[:, coluna] = ord(".")
+                    coluna -= 1
+                resto, digito = np.divmod(resto, 10)
+                matriz[:, coluna] = digito + ord("0")
+                coluna -= 1
+
+            resultado[vetorizados[grupo]] = matriz.view(f"S{largura}").ravel().astype(str)
+
+    # Casos raros: mesma regra da versão escalar
+    for i in np.flatnonzero(~np.isnan(valores) & ~mascara_vetorizados):
+        texto = f"{valores[i]:{',' if milhar else ''}.{decimais}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        resultado[i] = f"{prefixo}{texto}{sufixo}"
+
+    return resultado
+
+def _como_serie(resultado, valores):
+    """Devolve o resultado como Série quando a entrada é uma Série (mantendo o índice)"""
+    if isinstance(valores, pd.Series):
+        return pd.Series(resultado, index=valores.index, name=valores.name, dtype=object)
+    return resultado
+
+def formatar_moeda_serie(valores, na_rep=""):
+    """Versão vetorizada de formatar_moeda: R$ 1.234,56 para cada valor da coluna"""
+    return _como_serie(_formatar_vetor(valores, 2, prefixo="R$ ", na_rep=na_rep), valores)
+
+def formatar_percentual_serie(valores, na_rep=""):
+    """Versão vetorizada de formatar_percentual: 12,50% para cada valor da coluna"""
+    return _como_serie(_formatar_vetor(valores, 2, sufixo="%", na_rep=na_rep, milhar=False), valores)
+
+def formatar_numero_serie(valores, decimais=0, na_rep=""):
+    """Versão vetorizada de formatar_numero: 1.234 (ou 1.234,5 com decimais) para cada valor"""
+    return _como_serie(_formatar_vetor(valores, decimais, na_rep=na_rep), valores)
@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+def calcular_posicao_diaria(df_movimentos, data_inicial, data_final):
+    """
+    Calcula a posição diária de estoque a partir dos movimentos de um produto
+
+    Para cada dia do período, o estoque é o 'estoque_depois' do último movimento
+    até aquela data (inclusive). A busca é feita de uma vez com searchsorted
+    sobre as datas ordenadas, em vez de filtrar os movimentos dia a dia.
+
+    Args:
+        df_movimentos (DataFrame): Movimentos com 'data_movimento', 'estoque_depois' e 'tipo'
+        data_inicial: Primeiro dia da série
+        data_final: Último dia da série
+
+    Returns:
+        DataFrame com 'data', 'estoque', 'ultima_movimentacao', 'tipo_ultimo_movimento'
+        e 'media_movel_7d'
+    """
+    df_movimentos = df_movimentos.sort_values('data_movimento', kind='stable')
+    datas_movimento = df_movimentos['data_movimento']
+    if isinstance(datas_movimento.dtype, pd.DatetimeTZDtype):
+        # Datas com fuso não se comparam com datetime64: usar o horário local sem fuso
+        datas_movimento = datas_movimento.dt.tz_localize(None)
+    datas_movimento = datas_movimento.to_numpy(dtype='datetime64[ns]')
+    data_inicial = _sem_fuso(data_inicial)
+    data_final = _sem_fuso(data_final)
+    todas_datas = pd.date_range(start=data_inicial, end=data_final, freq='D')
+
+    # Estoque antes do período: último movimento anterior à data inicial
+    n_anteriores = np.searchsorted(datas_movimento, data_inicial.to_datetime64(), side='left')
+    estoque_inicial = df_movimentos['estoque_depois'].iloc[n_anteriores - 1] if n_anteriores > 0 else 0
+
+    # Índice do último movimento até cada data (-1 quando ainda não houve movimento)
+    posicoes = np.searchsorted(datas_movimento, todas_datas.to_numpy(dtype='datetime64[ns]'), side='right') - 1
+    tem_movimento = posicoes >= 0
+    indices = np.where(tem_movimento, posicoes, 0)
+
+    estoque = df_movimentos['estoque_depois'].to_numpy()[indices]
+    ultima_movimentacao = pd.Series(datas_movimento[indices]).where(tem_movimento)
+    tipo_ultimo_movimento = pd.Series(df_movimentos['tipo'].to_numpy(dtype=object)[indices]).where(tem_movimento, None)
+
+    df_evolucao_diaria = pd.DataFrame({
+        'data': todas_datas,
+        'estoque': np.where(tem_movimento, estoque, estoque_inicial),
+        'ultima_movimentacao': ultima_movimentacao,
+        'tipo_ultimo_movimento': tipo_ultimo_movimento
+    })
+
+    # Adicionar média móvel para suavizar flutuações
+    df_evolucao_diaria['media_movel_7d'] = df_evolucao_diaria['estoque'].rolling(window=7, min_periods=1).mean()
+
+    return df_evolucao_diaria
+
+def _sem_fuso(data):
+    """Timestamp sem fuso horário (mantém o horário local de datas com fuso)"""
+    data = pd.Timestamp(data)
+    return data.tz_localize(None) if data.tzinfo is not None else data
+
+def calcular_metricas_estoque(df_evolucao_diaria, df_movimentos, data_inicial, data_final):
+    """
+    Calcula estatísticas, giro, cobertura e tendência de uma série diária de estoque
+
+    Args:
+        df_evolucao_diaria (DataFrame): Resultado de calcular_posicao_diaria
+        df_movimentos (DataFrame): Movimentos do período (com 'tipo' e 'quantidade')
+        data_inicial: Primeiro dia do período
+        data_final: Último dia do período
+
+    Returns:
+        Dicionário com as métricas
+    """
+    estoque = df_evolucao_diaria['estoque']
+    estoque_medio = estoque.mean()
+    estoque_atual = estoque.iloc[-1]
+
+    # Calcular dias com zero estoque
+    dias_zerados = int((estoque <= 0).sum())
+    pct_dias_zerados = (dias_zerados / len(df_evolucao_diaria)) * 100
+
+    # 1. Calcular total de saídas no período
+    total_saidas = df_movimentos.loc[df_movimentos['tipo'] == 'S', 'quantidade'].sum()
+
+    # 2. Calcular média diária de saídas (demanda média diária)
+    dias_periodo = (data_final - data_inicial).days + 1
+    demanda_media_diaria = total_saidas / dias_periodo if dias_periodo > 0 else 0
+
+    # 3. Calcular índice de giro de estoque (anualizado)
+    # Giro = (Total de saídas no período / Estoque médio) * (365 / dias no período)
+    if estoque_medio > 0:
+        giro_estoque = (total_saidas / estoque_medio) * (365 / dias_periodo)
+    else:
+        giro_estoque = float('inf') if total_saidas > 0 else 0
+
+    # 4. Calcular cobertura de estoque (em dias)
+    # Cobertura = Estoque atual / demanda média diária
+    if demanda_media_diaria > 0:
+        cobertura_estoque = estoque_atual / demanda_media_diaria
+    else:
+        cobertura_estoque = float('inf') if estoque_atual > 0 else 0
+
+    # Calcular tendência (primeiros 10% vs últimos 10%)
+    n_amostras_10pct = max(1, int(len(df_evolucao_diaria) * 0.1))
+    estoque_inicio = estoque.iloc[:n_amostras_10pct].mean()
+    estoque_fim = estoque.iloc[-n_amostras_10pct:].mean()
+
+    if estoque_inicio > 0:
+        variacao_pct = ((estoque_fim - estoque_inicio) / estoque_inicio) * 100
+    else:
+        variacao_pct = float('inf') if estoque_fim > 0 else 0
+
+    if variacao_pct > 10:
+        tendencia = "CRESCIMENTO"
+    elif variacao_pct < -10:
+        tendencia = "REDUÇÃO"
+    else:
+        tendencia = "ESTÁVEL"
+
+    return {
+        'estoque_medio': estoque_medio,
+        'estoque_mediano': estoque.median(),
+        'estoque_min': estoque.min(),
+        'estoque_max': estoque.max(),
+        'estoque_atual': estoque_atual,
+        'desvio_padrao': estoque.std(),
+        'dias_zerados': dias_zerados,
+        'pct_dias_zerados': pct_dias_zerados,
+        'total_saidas': total_saidas,
+        'demanda_media_diaria': demanda_media_diaria,
+        'giro_estoque': giro_estoque,
+        'cobertura_estoque': cobertura_estoque,
+        'variacao_pct': variacao_pct,
+        'tendencia': tendencia
+    }
+
+def analisar_movimentos_estoque(df_movimentos, dias_analise=365):
+    """
+    Gera a evolução diária de estoque e as métricas de um produto
+
+    A análise cobre no máximo os últimos `dias_analise` dias até o último movimento.
+
+    Args:
+        df_movimentos (DataFrame): Movimentos do produto
+        dias_analise (int): Tamanho máximo do período analisado
+
+    Returns:
+        Tupla (df_evolucao_diaria, df_movimentos_periodo, metricas); as datas do
+        período ficam em metricas['data_inicial'], ['data_final'] e
+        ['data_inicial_original']
+    """
+    df_movimentos = df_movimentos.copy()
+    df_movimentos['data_movimento'] = pd.to_datetime(df_movimentos['data_movimento'])
+
+    # Determinar período de análise
+    data_inicial_original = df_movimentos['data_movimento'].min()
+    data_final = df_movimentos['data_movimento'].max()
+
+    # Limitar a análise ao período desejado
+    data_inicial = max(data_inicial_original, data_final - timedelta(days=dias_analise))
+
+    # Filtrar movimentos apenas do período
+    df_movimentos = df_movimentos[df_movimentos['data_movimento'] >= data_inicial]
+
+    df_evolucao_diaria = calcular_posicao_diaria(df_movimentos, data_inicial, data_final)
+    metricas = calcular_metricas_estoque(df_evolucao_diaria, df_movimentos, data_inicial, data_final)
+    metricas.update({
+        'data_inicial': data_inicial,
+        'data_final': data_final,
+        'data_inicial_original': data_inicial_original
+    })
+
+    return df_evolucao_diaria, df_movimentos, metricas
+
+def precalcular_historicos_estoque(df_movimentos, dias_analise=365):
+    """
+    Calcula a série diária e as métricas de estoque de todos os produtos
+
+    Usado pela etapa historico_estoque do ETL para que o dashboard leia o
+    histórico de um produto do arquivo Parquet, sem consultar o banco. As
+    duas tabelas são ordenadas por 'id_produto', que é inteiro quando todos
+    os IDs são números (senão, categórico; ver tipar_ids_produto).
+
+    Args:
+        df_movimentos (DataFrame): Movimentos de todos os produtos (com 'id_produto')
+        dias_analise (int): Tamanho máximo do período analisado por produto
+
+    Returns:
+        Tupla (df_series, df_metricas): série diária ('id_produto', 'data',
+        'estoque', 'media_movel_7d') e uma linha de métricas por produto
+    """
+    df_movimentos = df_movimentos.copy()
+    df_movimentos['id_produto'] = df_movimentos['id_produto'].map(normalizar_id_produto)
+
+    series = []
+    metricas = []
+    for id_produto, df_produto in df_movimentos.groupby('id_produto', sort=True):
+        df_evolucao_diaria, _, metricas_produto = analisar_movimentos_estoque(df_produto, dias_analise)
+
+        df_serie = df_evolucao_diaria[['data', 'estoque', 'media_movel_7d']].copy()
+        df_serie.insert(0, 'id_produto', id_produto)
+        series.append(df_serie)
+
+        metricas_produto['id_produto'] = id_produto
+        metricas.append(metricas_produto)
+
+    if not series:
+        return (
+            pd.DataFrame(columns=['id_produto', 'data', 'estoque', 'media_movel_7d']),
+            pd.DataFrame(columns=['id_produto'])
+        )
+
+    df_series = pd.concat(series, ignore_index=True)
+    df_series['id_produto'] = tipar_ids_produto(df_series['id_produto'])
+    df_series['estoque'] = df_series['estoque'].astype('float32')
+    df_series['media_movel_7d'] = df_series['media_movel_7d'].astype('float32')
+
+    df_metricas = pd.DataFrame(metricas)
+    df_metricas = df_metricas[['id_produto'] + [col for col in df_metricas.columns if col != 'id_produto']]
+    df_metricas['id_produto'] = tipar_ids_produto(df_metricas['id_produto'])
+
+    # Ordenadas por produto, a leitura de um produto com filtro só abre os row groups dele
+    df_series = df_series.sort_values(['id_produto', 'data'], kind='stable', ignore_index=True)
+    df_metricas = df_metricas.sort_values('id_produto', kind='stable', ignore_index=True)
+    return df_series, df_metricas
+
+def tipar_ids_produto(ids):
+    """
+    Tipo compacto para uma coluna de IDs de produto já normalizados (ver normalizar_id_produto)
+
+    Os IDs viram int64 quando todos são inteiros escritos sem zeros à
+    esquerda (a conversão não muda nenhum ID); senão, uma coluna categórica
+    de texto.
+    """
+    numeros = pd.to_numeric(ids, errors='coerce')
+    if numeros.notna().all() and (numeros == numeros.round()).all():
+        inteiros = numeros.astype('int64')
+        if (inteiros.astype(str) == ids.astype(str)).all():
+            return inteiros
+    return ids.astype(str).astype('category')
+
+def normalizar_id_produto(id_produto):
+    """Converte o ID do produto para texto ('123', e não '123.0')"""
+    if isinstance(id_produto, float) and id_produto.is_integer():
+        id_produto = int(id_produto)
+    return str(id_produto)
@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+# Granularidades da análise de recorrência
+GRANULARIDADES = ("mensal", "trimestral", "anual")
+
+# Coluna da coorte no resultado de calcular_retencao_coorte
+COLUNAS_COORTE = {"mensal": "cohort_month", "trimestral": "cohort_quarter", "anual": "cohort_year"}
+
+# Código de cliente direto (sem tabela hash) quando os IDs são inteiros numa faixa até este tamanho
+FAIXA_MAXIMA_IDS = 2 ** 40
+
+def _codigos_periodo(datas, granularidade):
+    """
+    Código inteiro do período de cada data (mês, trimestre ou ano)
+
+    Os códigos são consecutivos no tempo, então a diferença entre dois códigos
+    é a distância em períodos. As datas viram dias inteiros e o mês de cada
+    dia sai de uma tabela com os dias entre a primeira e a última venda, em
+    vez da conversão de calendário linha a linha.
+    """
+    if isinstance(datas.dtype, pd.DatetimeTZDtype):
+        datas = datas.dt.tz_localize(None)
+    if len(datas) == 0:
+        return np.array([], dtype=np.int64)
+
+    dias = datas.to_numpy(dtype="datetime64[ns]").view(np.int64) // (86400 * 10 ** 9)
+    primeiro_dia = dias.min()
+    tabela_dias = np.arange(primeiro_dia, dias.max() + 1).astype("datetime64[D]")
+    tabela_meses = tabela_dias.astype("datetime64[M]").astype(np.int64) + 1970 * 12
+    meses = tabela_meses[dias - primeiro_dia]
+
+    if granularidade == "mensal":
+        return meses
+    if granularidade == "trimestral":
+        return meses // 3
+    return meses // 12
+
+def _codigos_cliente(ids):
+    """
+    Código inteiro (>= 0) de cada cliente, -1 quando ausente
+
+    IDs numéricos inteiros viram códigos pela diferença para o menor ID, o que
+    evita a tabela hash do factorize em bases grandes; os demais são fatorados.
+    """
+    if pd.api.types.is_integer_dtype(ids) and not ids.hasnans:
+        valores = ids.to_numpy(dtype=np.int64)
+        if len(valores) and int(valores.max()) - int(valores.min()) < FAIXA_MAXIMA_IDS:
+            return valores - valores.min()
+    elif pd.api.types.is_float_dtype(ids):
+        valores = ids.to_numpy(dtype=float, na_value=np.nan)
+        presentes = ~np.isnan(valores)
+        if presentes.any():
+            minimo, maximo = valores[presentes].min(), valores[presentes].max()
+            inteiros = np.array_equal(valores[presentes], np.floor(valores[presentes]))
+            if inteiros and maximo - minimo < FAIXA_MAXIMA_IDS:
+                return np.where(presentes, valores - minimo, -1).astype(np.int64)
+
+    codigos, _ = pd.factorize(ids)
+    return codigos.astype(np.int64)
+
+def _preparar_vendas(df_vendas):
+    """
+    Códigos de cliente e datas das vendas válidas
+
+    Vendas sem data ou sem cliente ficam de fora, como nos groupby por cliente.
+
+    Returns:
+        Tupla (datas, codigos_cliente)
+    """
+    datas = pd.to_datetime(df_vendas['data_venda'])
+    codigos_cliente = _codigos_cliente(df_vendas['id_cliente'])
+
+    validas = (codigos_cliente >= 0) & datas.notna().to_numpy()
+    return datas[validas], codigos_cliente[validas]
+
+def _rotulo_periodo(codigo, granularidade):
+    """Período (pd.Period) correspondente a um código de _codigos_periodo"""
+    if granularidade == "mensal":
+        return pd.Period(year=int(codigo // 12), month=int(codigo % 12) + 1, freq="M")
+    if granularidade == "trimestral":
+        return pd.Period(year=int(codigo // 4), quarter=int(codigo % 4) + 1, freq="Q")
+    return pd.Period(year=int(codigo), freq="Y")
+
+def contar_recorrencia(codigos_periodo, codigos_cliente):
+    """
+    Conta clientes totais, retidos e novos de cada período em relação ao período anterior
+
+    Trabalha sobre os pares (período, cliente) distintos, ordenados como uma
+    única chave inteira, em vez de uma matriz clientes x períodos: um cliente é
+    retido no período i quando o par (i - 1, cliente) também existe, o que é
+    verificado com searchsorted sobre as chaves ordenadas. O período anterior é
+    o anterior entre os períodos com vendas, como na comparação entre colunas
+    consecutivas do pivot.
+
+    Args:
+        codigos_periodo (ndarray): Código do período de cada venda (inteiros crescentes no tempo)
+        codigos_cliente (ndarray): Código do cliente de cada venda (inteiros >= 0)
+
+    Returns:
+        Tupla (periodos, total, retidos): códigos dos períodos com vendas em
+        ordem, clientes distintos em cada período e clientes que também
+        compraram no período anterior (0 no primeiro)
+    """
+    if len(codigos_periodo) == 0:
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio, vazio
+
+    # Períodos com vendas e a posição de cada venda entre eles (os códigos são inteiros pequenos)
+    minimo = codigos_periodo.min()
+    presentes = np.bincount(codigos_periodo - minimo) > 0
+    periodos = np.flatnonzero(presentes) + minimo
+    posicao_periodo = (np.cumsum(presentes) - 1)[codigos_periodo - minimo]
+    n_clientes = int(codigos_cliente.max()) + 1
+
+    # Pares distintos (posição do período, cliente), ordenados por período e cliente
+    chaves = np.sort(posicao_periodo * n_clientes + codigos_cliente)
+    chaves = chaves[np.concatenate(([True], chaves[1:] != chaves[:-1]))]
+    posicao_chave = chaves // n_clientes
+
+    # O mesmo cliente no período anterior
+    anteriores = chaves - n_clientes
+    indices = np.minimum(np.searchsorted(chaves, anteriores), len(chaves) - 1)
+    retido = (chaves[indices] == anteriores) & (posicao_chave > 0)
+
+    total = np.bincount(posicao_chave, minlength=len(periodos))
+    retidos = np.bincount(posicao_chave[retido], minlength=len(periodos))
+    return periodos, total, retidos
+
+def calcular_metricas_recorrencia(df_vendas, granularidades=GRANULARIDADES):
+    """
+    Calcula as métricas de recorrência mensal, trimestral e anual das vendas
+
+    Os clientes são codificados uma única vez e reaproveitados em todas as
+    granularidades; cada uma usa contar_recorrencia. Os DataFrames têm as
+    mesmas colunas dos arquivos metricas_recorrencia_*.
+
+    Args:
+        df_vendas (DataFrame): Vendas com 'data_venda' (datetime) e 'id_cliente'
+        granularidades: Subconjunto de 'mensal', 'trimestral' e 'anual'
+
+    Returns:
+        Dicionário granularidade -> DataFrame de métricas (sem o primeiro período)
+    """
+    datas, codigos_cliente = _preparar_vendas(df_vendas)
+
+    metricas = {}
+    for granularidade in granularidades:
+        periodos, total, retidos = contar_recorrencia(_codigos_periodo(datas, granularidade), codigos_cliente)
+        rotulos = [_rotulo_periodo(codigo, granularidade) for codigo in periodos[1:]]
+
+        atual = total[1:]
+        anterior = total[:-1]
+        retidos = retidos[1:]
+        novos = atual - retidos
+        with np.errstate(divide="ignore", invalid="ignore"):
+            taxa_retencao = np.where(anterior > 0, retidos / anterior * 100, 0)
+            taxa_novos = np.where(atual > 0, novos / atual * 100, 0)
+            taxa_recorrentes = np.where(atual > 0, retidos / atual * 100, 0)
+
+        if granularidade == "mensal":
+            df = pd.DataFrame({
+                'yearmonth': [rotulo.strftime('%Y-%m') for rotulo in rotulos],
+                'retained_customers': retidos,
+                'prev_total_customers': anterior,
+                'retention_rate': taxa_retencao
+            })
+        elif granularidade == "trimestral":
+            df = pd.DataFrame({
+                'trimestre': [str(rotulo) for rotulo in rotulos],
+                'trimestre_obj': rotulos,
+                'total_customers': atual,
+                'returning_customers': retidos,
+                'new_customers': novos,
+                'recurrence_rate': taxa_retencao
+            })
+        else:
+            df = pd.DataFrame({
+                'ano': [str(rotulo) for rotulo in rotulos],
+                'ano_obj': rotulos,
+                'total_customers': atual,
+                'returning_customers': retidos,
+                'new_customers': novos,
+                'retention_rate': taxa_retencao,
+                'new_rate': taxa_novos,
+                'returning_rate': taxa_recorrentes
+            })
+        metricas[granularidade] = df
+
+    return metricas
+
+def calcular_retencao_coorte(df_vendas, granularidade="anual"):
+    """
+    Calcula a retenção por coorte (período da primeira compra) das vendas
+
+    Cada par (cliente, período) distinto vira uma chave inteira ordenada por
+    cliente; a primeira chave de cada cliente é a sua coorte, e a distância
+    até ela (period_index) é a diferença entre os códigos dos períodos. Os
+    clientes ativos por coorte e distância são contados com bincount.
+
+    Args:
+        df_vendas (DataFrame): Vendas com 'data_venda' (datetime) e 'id_cliente'
+        granularidade (str): 'mensal', 'trimestral' ou 'anual'
+
+    Returns:
+        DataFrame no layout de metricas_retencao_anual: coluna da coorte
+        (COLUNAS_COORTE), 'period_index', 'num_customers', 'cohort_size' e
+        'retention_rate', ordenado por coorte e period_index
+    """
+    coluna_coorte = COLUNAS_COORTE[granularidade]
+    datas, codigos_cliente = _preparar_vendas(df_vendas)
+    if len(codigos_cliente) == 0:
+        return pd.DataFrame(columns=[coluna_coorte, 'period_index', 'num_customers', 'cohort_size', 'retention_rate'])
+
+    codigos = _codigos_periodo(datas, granularidade)
+    minimo = codigos.min()
+    n_periodos = int(codigos.max() - minimo) + 1
+
+    # Pares distintos (cliente, período), ordenados por cliente e período
+    chaves = np.sort(codigos_cliente * n_periodos + (codigos - minimo))
+    chaves = chaves[np.concatenate(([True], chaves[1:] != chaves[:-1]))]
+    clientes = chaves // n_periodos
+    periodos = chaves % n_periodos
+
+    # Coorte: primeiro período de cada cliente, repetido nas suas demais chaves
+    inicio_cliente = np.concatenate(([True], clientes[1:] != clientes[:-1]))
+    coortes = periodos[np.maximum.accumulate(np.where(inicio_cliente, np.arange(len(chaves)), 0))]
+    distancias = periodos - coortes
+
+    # Clientes ativos por (coorte, distância)
+    contagem = np.bincount(coortes * n_periodos + distancias, minlength=n_periodos * n_periodos)
+    celulas = np.flatnonzero(contagem)
+    coorte_celula = celulas // n_periodos
+    num_customers = contagem[celulas]
+    cohort_size = contagem[coorte_celula * n_periodos]
+
+    rotulos = {codigo: _rotulo_periodo(codigo + minimo, granularidade) for codigo in np.unique(coorte_celula)}
+
+    return pd.DataFrame({
+        coluna_coorte: [rotulos[codigo] for codigo in coorte_celula],
+        'period_index': celulas % n_periodos,
+        'num_customers': num_customers,
+        'cohort_size': cohort_size,
+        'retention_rate': num_customers / cohort_size
+    })
@@ -0,0 +1,370 @@
+import json
+import math
+import re
+from urllib.parse import urlencode
+
+import pandas as pd
+from dash import Input, Output, State, dash_table, dcc, html
+
+# Operadores da sintaxe de filtro do DataTable: nome por extenso e símbolo equivalente
+FILTER_OPERATORS = [
+    ['ge', '>='],
+    ['le', '<='],
+    ['lt', '<'],
+    ['gt', '>'],
+    ['ne', '!='],
+    ['eq', '='],
+    ['contains'],
+    ['datestartswith']
+]
+
+# Operador por extenso de cada forma aceita no filter_query
+_OPERATOR_NAMES = {alias: operator_type[0] for operator_type in FILTER_OPERATORS for alias in operator_type}
+
+# '{coluna} operador valor': o operador é o token logo após a coluna, de modo
+# que um valor como "Jorge Silva" (que contém 'ge ') não é confundido com ele
+FILTER_PART_RE = re.compile(
+    r'^\{(.+?)\}\s+(' + '|'.join(re.escape(alias) for alias in sorted(_OPERATOR_NAMES, key=len, reverse=True))
+    + r')\s+(.*)$'
+)
+
+# Tabelas registradas (table_id -> fonte e formatação), usadas também na exportação
+_server_tables = {}
+
+def split_filter_part(filter_part):
+    """
+    Separa uma condição do filter_query do DataTable em coluna, operador e valor
+
+    Exemplo: '{nome} contains "Jorge Silva"' -> ('nome', 'contains', 'Jorge Silva')
+
+    Args:
+        filter_part (str): Uma condição (o filter_query as separa com ' && ')
+
+    Returns:
+        Tupla (coluna, operador por extenso, valor); (None, None, None) se não reconhecida
+    """
+    match = FILTER_PART_RE.match(filter_part.strip())
+    if match is None:
+        return None, None, None
+
+    name, operator, value_part = match.group(1), _OPERATOR_NAMES[match.group(2)], match.group(3).strip()
+    if not value_part:
+        return None, None, None
+
+    # Aspas em volta do valor são removidas depois de separar a condição
+    v0 = value_part[0]
+    if v0 == value_part[-1] and v0 in ("'", '"', '`') and len(value_part) > 1:
+        value = value_part[1:-1].replace('\\' + v0, v0)
+    else:
+        try:
+            value = float(value_part)
+        except ValueError:
+            value = value_part
+
+    return name, operator, value
+
+def _filter_mask(series, operator, value):
+    """Máscara booleana de uma condição do filtro sobre uma coluna"""
+    if operator == 'contains':
+        return series.astype(str).str.contains(str(value), case=False, regex=False, na=False)
+    if operator == 'datestartswith':
+        return series.astype(str).str.startswith(str(value), na=False)
+
+    if isinstance(value, float) and pd.api.types.is_numeric_dtype(series):
+        values = series
+    else:
+        # Comparação textual (sem diferenciar maiúsculas/minúsculas)
+        values = series.astype(str).str.lower()
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = str(value).lower()
+
+    comparisons = {
+        'eq': values.__eq__,
+        'ne': values.__ne__,
+        'lt': values.__lt__,
+        'le': values.__le__,
+        'gt': values.__gt__,
+        'ge': values.__ge__,
+    }
+    return comparisons[operator](value).fillna(False).astype(bool)
+
+def filter_table(df, filter_query, source_columns=None):
+    """
+    Aplica o filter_query do DataTable (filter_action='custom') a um DataFrame
+
+    Args:
+        df (DataFrame): Dados completos da tabela (valores brutos, sem formatação)
+        filter_query (str): Filtro digitado no cabeçalho da tabela
+        source_columns (dict): Coluna exibida -> coluna do DataFrame usada para
+            filtrar (ex: {'recencia_formatada': 'Data Última Venda'})
+
+    Returns:
+        DataFrame filtrado
+    """
+    if not filter_query:
+        return df
+
+    source_columns = source_columns or {}
+    mask = pd.Series(True, index=df.index)
+    for filter_part in filter_query.split(' && '):
+        col_name, operator, value = split_filter_part(filter_part)
+        col_name = source_columns.get(col_name, col_name)
+        if col_name not in df.columns:
+            continue
+        mask &= _filter_mask(df[col_name], operator, value)
+
+    return df[mask]
+
+def sort_table(df, sort_by, source_columns=None):
+    """
+    Aplica o sort_by do DataTable (sort_action='custom') a um DataFrame
+
+    A ordenação usa os valores brutos: números e datas ficam na ordem correta,
+    mesmo que a tabela os exiba formatados.
+
+    Args:
+        df (DataFrame): Dados da tabela
+        sort_by (list): Lista de {'column_id', 'direction'}
+        source_columns (dict): Coluna exibida -> coluna do DataFrame usada para ordenar
+
+    Returns:
+        DataFrame ordenado
+    """
+    if not sort_by:
+        return df
+
+    source_columns = source_columns or {}
+    columns = []
+    ascending = []
+    for sort in sort_by:
+        col_name = source_columns.get(sort['column_id'], sort['column_id'])
+        if col_name in df.columns:
+            columns.append(col_name)
+            ascending.append(sort['direction'] == 'asc')
+
+    if not columns:
+        return df
+    return df.sort_values(columns, ascending=ascending, kind='stable', na_position='last')
+
+def query_table(df, page_current, page_size, sort_by=None, filter_query=None,
+                format_page=None, source_columns=None, columns=None):
+    """
+    Filtra, ordena e pagina um DataFrame para um DataTable do lado do servidor
+
+    Apenas as linhas da página atual são formatadas e convertidas em registros.
+
+    Args:
+        df (DataFrame): Dados completos da tabela (valores brutos)
+        page_current (int): Página atual (começando em 0)
+        page_size (int): Linhas por página
+        sort_by (list): Ordenação do DataTable
+        filter_query (str): Filtro do DataTable
+        format_page: Função (DataFrame da página) -> DataFrame formatado para exibição
+        source_columns (dict): Coluna exibida -> coluna bruta usada em filtro/ordenação
+        columns (list): IDs das colunas enviadas ao navegador (todas se None)
+
+    Returns:
+        Tupla (registros da página, número de páginas, total de linhas filtradas)
+    """
+    df = filter_table(df, filter_query, source_columns)
+    df = sort_table(df, sort_by, source_columns)
+
+    total = len(df)
+    page_size = page_size or 10
+    page_count = max(1, math.ceil(total / page_size))
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+
+    start = page_current * page_size
+    df_page = df.iloc[start:start + page_size].copy()
+    if format_page is not None and not df_page.empty:
+        df_page = format_page(df_page)
+    if columns is not None:
+        df_page = df_page[[col for col in columns if col in df_page.columns]]
+
+    return df_page.to_dict('records'), page_count, total
+
+def create_server_table(table_id, columns, page_size=10, params=None, **kwargs):
+    """
+    Cria um DataTable paginado, filtrado e ordenado no servidor
+
+    A tabela é criada vazia; os dados de cada página são enviados pelo callback
+    registrado com register_server_table. Os parâmetros da consulta (ex: o
+    segmento selecionado) vão em um dcc.Store '<table_id>-params' criado junto,
+    e os links de exportação (CSV/Excel) geram o arquivo completo no servidor.
+
+    Args:
+        table_id (str): ID do DataTable
+        columns (list): Colunas do DataTable ({'name', 'id'})
+        page_size (int): Linhas por página
+        params (dict): Parâmetros da consulta, repassados ao load_frame
+        **kwargs: Demais propriedades do DataTable (estilos, row_selectable...)
+
+    Returns:
+        Lista [dcc.Store, links de exportação, DataTable] para incluir no layout
+    """
+    kwargs.setdefault('sort_mode', 'multi')
+    table = dash_table.DataTable(
+        id=table_id,
+        columns=columns,
+        data=[],
+        page_current=0,
+        page_size=page_size,
+        page_count=1,
+        page_action='custom',
+        filter_action='custom',
+        filter_query='',
+        sort_action='custom',
+        sort_by=[],
+        **kwargs
+    )
+    export_links = html.Div([
+        html.A(
+            [html.I(className="fas fa-file-csv me-2"), "Exportar CSV"],
+            id=f"{table_id}-export-csv",
+            className="btn btn-outline-secondary btn-sm me-2"
+        ),
+        html.A(
+            [html.I(className="fas fa-file-excel me-2"), "Exportar Excel"],
+            id=f"{table_id}-export-xlsx",
+            className="btn btn-outline-success btn-sm"
+        )
+    ], className="mb-2 text-end")
+    return [dcc.Store(id=f"{table_id}-params", data=params or {}), export_links, table]
+
+def register_server_table(app, table_id, load_frame, format_page=None, source_columns=None,
+                          clear_selection=False):
+    """
+    Registra o callback que entrega as páginas de um DataTable criado com create_server_table
+
+    Args:
+        app: A instância do aplicativo Dash
+        table_id (str): ID do DataTable
+        load_frame: Função (data, params) -> DataFrame completo da tabela (valores
+            brutos), onde data é o handle do dcc.Store 'selected-data'
+        format_page: Função (DataFrame da página) -> DataFrame formatado
+        source_columns (dict): Coluna exibida -> coluna bruta usada em filtro/ordenação
+        clear_selection (bool): Limpa selected_rows a cada nova página (para tabelas
+            com row_selectable, cujos índices se referem às linhas da página)
+    """
+    _server_tables[table_id] = {
+        "load_frame": load_frame,
+        "source_columns": source_columns or {}
+    }
+
+    outputs = [Output(table_id, 'data'), Output(table_id, 'page_count')]
+    if clear_selection:
+        outputs.append(Output(table_id, 'selected_rows', allow_duplicate=True))
+
+    @app.callback(
+        outputs,
+        [Input(table_id, 'page_current'),
+         Input(table_id, 'page_size'),
+         Input(table_id, 'sort_by'),
+         Input(table_id, 'filter_query'),
+         Input(f"{table_id}-params", 'data')],
+        [State(table_id, 'columns'),
+         State('selected-data', 'data')],
+        prevent_initial_call='initial_duplicate' if clear_selection else False
+    )
+    def update_server_table(page_current, page_size, sort_by, filter_query, params, columns, data):
+        df = load_frame(data, params or {}) if data else None
+        if df is None or df.empty:
+            records, page_count = [], 1
+        else:
+            records, page_count, _ = query_table(
+                df, page_current, page_size, sort_by, filter_query,
+                format_page=format_page, source_columns=source_columns,
+                columns=[col['id'] for col in columns or []] or None
+            )
+
+        if clear_selection:
+            return records, page_count, []
+        return records, page_count
+
+    @app.callback(
+        [Output(f"{table_id}-export-csv", 'href'),
+         Output(f"{table_id}-export-xlsx", 'href')],
+        [Input(table_id, 'sort_by'),
+         Input(table_id, 'filter_query'),
+         Input(f"{table_id}-params", 'data')],
+        [State(table_id, 'columns'),
+         State('selected-data', 'data')]
+    )
+    def update_export_links(sort_by, filter_query, params, columns, data):
+        data_type = (data or {}).get("data_type")
+        return (
+            export_url(table_id, "csv", data_type, params, filter_query, sort_by, columns),
+            export_url(table_id, "xlsx", data_type, params, filter_query, sort_by, columns)
+        )
+
+    return update_server_table
+
+def is_server_table(table_id):
+    """Indica se a tabela foi registrada com register_server_table"""
+    return table_id in _server_tables
+
+def export_url(table_id, fmt, data_type, params, filter_query, sort_by, columns):
+    """
+    URL da rota de exportação com o estado atual da tabela
+
+    A empresa não vai na URL: a rota usa a da sessão do usuário.
+
+    Args:
+        table_id (str): ID do DataTable
+        fmt (str): 'csv' ou 'xlsx'
+        data_type (str): Tipo de dados ('PF' ou 'PJ')
+        params (dict): Parâmetros da consulta (dcc.Store '<table_id>-params')
+        filter_query (str): Filtro do DataTable
+        sort_by (list): Ordenação do DataTable
+        columns (list): Colunas exibidas ({'name', 'id'})
+    """
+    query = {
+        "data_type": data_type or "",
+        "params": json.dumps(params or {}),
+        "filter_query": filter_query or "",
+        "sort_by": json.dumps(sort_by or []),
+        "columns": json.dumps([{"id": col["id"], "name": col["name"]} for col in columns or []])
+    }
+    return f"/export/{table_id}.{fmt}?{urlencode(query)}"
+
+def export_frame(table_id, data, params=None, filter_query=None, sort_by=None, columns=None):
+    """
+    Todas as linhas de uma tabela (com o filtro e a ordenação atuais) para exportação
+
+    As colunas formatadas são exportadas com os valores brutos (números e datas
+    continuam numéricos no Excel), com os nomes exibidos na tabela.
+
+    Args:
+        table_id (str): ID de uma tabela registrada com register_server_table
+        data (dict): Handle do dataset (ver dataset_handle)
+        params (dict): Parâmetros da consulta
+        filter_query (str): Filtro do DataTable
+        sort_by (list): Ordenação do DataTable
+        columns (list): Colunas exibidas ({'name', 'id'}); todas se vazio
+
+    Returns:
+        DataFrame pronto para exportar (vazio se não houver dados)
+    """
+    table = _server_tables[table_id]
+    source_columns = table["source_columns"]
+
+    df = table["load_frame"](data, params or {}) if data else None
+    if df is None:
+        return pd.DataFrame()
+
+    df = filter_table(df, filter_query, source_columns)
+    df = sort_table(df, sort_by, source_columns)
+
+    if not columns:
+        return df
+
+    sources = []
+    names = []
+    for col in columns:
+        source = source_columns.get(col["id"], col["id"])
+        if source in df.columns:
+            sources.append(source)
+            names.append(col.get("name", col["id"]))
+
+    return df[sources].set_axis(names, axis=1)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+# Linhas convertidas por vez ao gerar o arquivo (limita a memória usada na exportação)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+# Tamanho dos blocos enviados ao navegador na exportação em Excel
+EXPORT_STREAM_BYTES = 64 * 1024
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+def iter_csv(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Gera um CSV (padrão brasileiro: ';' e vírgula decimal) em blocos de linhas
+
+    O arquivo é enviado ao navegador à medida que é gerado.
+
+    Args:
+        df (DataFrame): Dados a exportar (colunas já renomeadas)
+        chunk_rows (int): Linhas convertidas por bloco
+
+    Yields:
+        Blocos do arquivo em bytes
+    """
+    # BOM para o Excel reconhecer o UTF-8
+    yield "\ufeff".encode("utf-8")
+    yield df.iloc[0:0].to_csv(sep=";", decimal=",", index=False).encode("utf-8")
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(sep=";", decimal=",", index=False, header=False).encode("utf-8")
+
+def _excel_rows(chunk):
+    """Linhas de um bloco com valores aceitos pelo openpyxl (None no lugar de NaN/NaT)"""
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        # O Excel não aceita datas com fuso horário
+        if isinstance(chunk[col].dtype, pd.DatetimeTZDtype):
+            chunk[col] = chunk[col].dt.tz_localize(None)
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return chunk.itertuples(index=False, name=None)
+
+def iter_xlsx(df, sheet_name="Dados", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Gera um arquivo Excel com o openpyxl em modo write-only
+
+    O modo write-only grava as linhas em disco em vez de montar a planilha em
+    memória; o arquivo temporário é enviado em blocos e removido ao final.
+
+    Args:
+        df (DataFrame): Dados a exportar (colunas já renomeadas)
+        sheet_name (str): Nome da aba
+        chunk_rows (int): Linhas convertidas por bloco
+
+    Yields:
+        Blocos do arquivo em bytes
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_name[:31])
+    worksheet.append([str(col) for col in df.columns])
+
+    for start in range(0, len(df), chunk_rows):
+        for row in _excel_rows(df.iloc[start:start + chunk_rows]):
+            worksheet.append(row)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(EXPORT_STREAM_BYTES)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.remove(path)
+
+def iter_export(df, fmt):
+    """
+    Gera o arquivo de exportação no formato pedido
+
+    Args:
+        df (DataFrame): Dados a exportar
+        fmt (str): 'csv' ou 'xlsx'
+    """
+    if fmt == "xlsx":
+        return iter_xlsx(df)
+    return iter_csv(df)